@@ -7,4 +7,12 @@ A simple, customizable static site generator that converts Markdown to HTML.
 __version__ = "0.1.0"
 __author__ = "Brady Clarke"
 
-from simple_ssg.builder import build_site  # noqa
+__all__ = ['build_site']
+
+def __getattr__(name):
+    # The builder (and Markdown with it) is imported on first use, so that
+    # importing the package, e.g. for `simple-ssg --version`, stays fast
+    if name == 'build_site':
+        from simple_ssg.builder import build_site
+        return build_site
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
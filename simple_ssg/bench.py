@@ -0,0 +1,331 @@
+"""
+Benchmarks for Simple-SSG.
+
+Generates a synthetic site from a seed and times each build stage on its
+own (Markdown conversion, section wrapping, template injection,
+minification, sitemap generation, static asset copying) as well as complete
+builds. The same seed and scale always produce the same site, so the
+throughput figures of the JSON report can be compared across releases.
+
+The corpus covers:
+
+- many small pages
+- a few huge pages
+- pages heavy with {.class} annotations
+- a deep directory tree
+- large static directories
+"""
+
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+STAGES = ('convert', 'wrap_sections', 'inject_content', 'minify_html', 'sitemap',
+          'asset_copy', 'build')
+
+WORDS = ('static', 'site', 'generator', 'markdown', 'template', 'section', 'render', 'page',
+         'content', 'build', 'output', 'asset', 'style', 'simple', 'fast', 'quick', 'brown',
+         'fox', 'lorem', 'ipsum', 'dolor', 'amet', 'python', 'cache', 'index', 'link')
+
+TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Benchmark</title>
+    <meta name="description" content="">
+    <link rel="stylesheet" href="css/styles.css">
+</head>
+<body>
+    <header><nav><a href="index.html">Home</a> <a href="about.html">About</a></nav></header>
+    <main>
+        <div id="content-container"><div class="loading">Loading...</div></div>
+    </main>
+    <footer><p>Benchmark site</p></footer>
+</body>
+</html>
+"""
+
+class CorpusGenerator:
+    """
+    Write a reproducible synthetic site.
+    """
+
+    def __init__(self, seed=0, scale=1.0):
+        """
+        Parameters:
+        - seed: Random seed; the same seed always produces the same site
+        - scale: Multiplier for the number and size of pages and files
+        """
+        self.random = random.Random(seed)
+        self.scale = scale
+
+    def count(self, base):
+        return max(1, int(base * self.scale))
+
+    def sentence(self, words=12):
+        text = ' '.join(self.random.choice(WORDS) for _ in range(words))
+        return text[0].upper() + text[1:] + '.'
+
+    def paragraph(self, sentences=4):
+        return ' '.join(self.sentence(self.random.randint(6, 16)) for _ in range(sentences))
+
+    def small_page(self, number):
+        return (f"# Page {number}\n\n{self.paragraph()}\n\n"
+                f"## Details\n\n- {self.sentence(4)}\n- *{self.sentence(4)}*\n\n"
+                f"{self.paragraph(2)} [Home](index.html)\n")
+
+    def huge_page(self, number, sections):
+        parts = [f"# Huge page {number}\n\n{self.paragraph()}\n"]
+        for section in range(sections):
+            parts.append(f"\n## Section {section}\n\n{self.paragraph(6)}\n\n"
+                         f"| name | value |\n|------|-------|\n| a | {section} |\n\n"
+                         f"```\ncode block {section}\n```\n")
+        return ''.join(parts)
+
+    def annotated_page(self, number, blocks):
+        parts = [f"# Annotated {number} {{.title}}\n"]
+        for block in range(blocks):
+            # Headings take a trailing annotation, other blocks one on their last line
+            parts.append(f"\n## Block {block} {{.block.b{block % 7}}}\n\n"
+                         f"{self.paragraph(2)}\n{{.lead}}\n\n"
+                         f"- {self.sentence(4)}\n  {{.item}}\n- {self.sentence(4)}\n  {{.item.alt}}\n\n"
+                         f"> {self.sentence(6)}\n> {{.note}}\n")
+        return ''.join(parts)
+
+    def write(self, directory):
+        """
+        Write the site.
+
+        Parameters:
+        - directory: Directory to create the site in
+
+        Returns:
+        - Dictionary describing the corpus (page and file counts and sizes)
+        """
+        content_dir = os.path.join(directory, 'content')
+        pages = {}
+
+        pages['index.md'] = "# Benchmark\n\n" + self.paragraph() + "\n"
+        for i in range(self.count(1000)):
+            pages[f'small/page-{i}.md'] = self.small_page(i)
+        for i in range(3):
+            pages[f'huge/huge-{i}.md'] = self.huge_page(i, self.count(1500))
+        for i in range(self.count(100)):
+            pages[f'annotated/annotated-{i}.md'] = self.annotated_page(i, 40)
+
+        # Ten levels deep, a few pages per level
+        path = 'deep'
+        for level in range(10):
+            path += f'/level-{level}'
+            for i in range(self.count(5)):
+                pages[f'{path}/page-{i}.md'] = self.small_page(i)
+
+        content_bytes = 0
+        for name, text in pages.items():
+            file_path = os.path.join(content_dir, *name.split('/'))
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            content_bytes += len(text.encode('utf-8'))
+
+        static_files = 0
+        static_bytes = 0
+        for static_dir, count, size in (('css', self.count(100), 4096),
+                                        ('images', self.count(300), 32768)):
+            for i in range(count):
+                file_path = os.path.join(directory, static_dir, f'group-{i % 10}', f'file-{i}.bin')
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                data = self.random.getrandbits(size * 8).to_bytes(size, 'little')
+                with open(file_path, 'wb') as f:
+                    f.write(data)
+                static_files += 1
+                static_bytes += size
+        with open(os.path.join(directory, 'css', 'styles.css'), 'w', encoding='utf-8') as f:
+            f.write('body { margin: 0; }\n')
+
+        with open(os.path.join(directory, 'template.html'), 'w', encoding='utf-8') as f:
+            f.write(TEMPLATE)
+
+        return {
+            'pages': len(pages),
+            'content_bytes': content_bytes,
+            'static_files': static_files + 1,
+            'static_bytes': static_bytes,
+        }
+
+def get_bench_config(directory, **options):
+    """Get the configuration dictionary of a generated site."""
+    return dict({
+        'content_dir': os.path.join(directory, 'content'),
+        'template_path': os.path.join(directory, 'template.html'),
+        'output_dir': os.path.join(directory, 'build'),
+        'static_dirs': [os.path.join(directory, 'css'), os.path.join(directory, 'images')],
+        'index_path': None,
+        'base_url': 'https://bench.example.com',
+    }, **options)
+
+def time_best(function, repeat):
+    """Run a function `repeat` times and return the shortest time in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def throughput(seconds, items, size):
+    """Describe a stage's timing as items and megabytes per second."""
+    seconds = max(seconds, 1e-9)
+    return {
+        'seconds': round(seconds, 6),
+        'items': items,
+        'bytes': size,
+        'items_per_second': round(items / seconds, 1),
+        'mb_per_second': round(size / seconds / 1e6, 3),
+    }
+
+def bench_stages(directory, stages, repeat=3, jobs=1):
+    """
+    Time the build stages of a generated site.
+
+    Parameters:
+    - directory: Directory of a site written by CorpusGenerator
+    - stages: Names of the stages to run (see STAGES)
+    - repeat: Number of runs per stage; the fastest run is reported
+    - jobs: Number of worker processes for complete builds
+
+    Returns:
+    - Dictionary mapping stage names to their results
+    """
+    from simple_ssg.builder import build_site, fix_image_paths, get_content_files, wrap_sections
+    from simple_ssg.config import SiteConfig
+    from simple_ssg.converters.markdown import convert_markdown_to_html
+    from simple_ssg.enhancers.minifier import minify_html
+    from simple_ssg.enhancers.seo import generate_sitemap
+    from simple_ssg.utils.fs import copy_static_assets
+    from simple_ssg.utils.templates import compile_template, inject_content_parts
+
+    config_dict = get_bench_config(directory)
+    config = SiteConfig(config_dict=config_dict, test_mode=True)
+    compile_template(config)
+    os.makedirs(config.output_dir, exist_ok=True)
+
+    content_files = get_content_files(config.content_dir)
+    sources = []
+    for path in content_files:
+        with open(path, 'r', encoding='utf-8') as f:
+            sources.append(fix_image_paths(f.read(), config))
+    source_bytes = sum(len(text.encode('utf-8')) for text in sources)
+
+    # Each stage works on the output of the previous one
+    converted = [convert_markdown_to_html(text, config) for text in sources]
+    wrapped = [wrap_sections(html, config) for html in converted]
+    injected = [inject_content_parts(html, path, config) for html, path in zip(wrapped, content_files)]
+
+    def size(texts):
+        return sum(len(text.encode('utf-8')) for text in texts)
+
+    results = {}
+    for stage in stages:
+        if stage == 'convert':
+            seconds = time_best(lambda: [convert_markdown_to_html(text, config) for text in sources], repeat)
+            results[stage] = throughput(seconds, len(sources), source_bytes)
+        elif stage == 'wrap_sections':
+            seconds = time_best(lambda: [wrap_sections(html, config) for html in converted], repeat)
+            results[stage] = throughput(seconds, len(converted), size(converted))
+        elif stage == 'inject_content':
+            seconds = time_best(lambda: [''.join(inject_content_parts(html, path, config))
+                                         for html, path in zip(wrapped, content_files)], repeat)
+            results[stage] = throughput(seconds, len(wrapped), size(wrapped))
+        elif stage == 'minify_html':
+            seconds = time_best(lambda: [minify_html(parts) for parts in injected], repeat)
+            results[stage] = throughput(seconds, len(injected), size(''.join(parts) for parts in injected))
+        elif stage == 'sitemap':
+            # Many more URLs than pages, to exercise splitting into several files
+            pages = [{'path': f'section-{i % 100}/page-{i}.html', 'lastmod': 1700000000 + i}
+                     for i in range(int(200000 * max(len(content_files) / 1200, 0.05)))]
+            seconds = time_best(lambda: generate_sitemap(config, pages), repeat)
+            sitemap_bytes = sum(entry.stat().st_size for entry in os.scandir(config.output_dir)
+                                if entry.name.startswith('sitemap'))
+            results[stage] = throughput(seconds, len(pages), sitemap_bytes)
+        elif stage == 'asset_copy':
+            stats = {}
+
+            def copy_cold():
+                shutil.rmtree(config.output_dir, ignore_errors=True)
+                os.makedirs(config.output_dir)
+                stats.update(copy_static_assets(config.static_dirs, config.output_dir))
+
+            cold = time_best(copy_cold, repeat)
+            files = stats['copied'] + stats['skipped']
+            total = stats['bytes_copied'] + stats['bytes_skipped']
+            results[stage] = throughput(cold, files, total)
+            warm = time_best(lambda: copy_static_assets(config.static_dirs, config.output_dir), repeat)
+            results['asset_sync_unchanged'] = throughput(warm, files, total)
+        elif stage == 'build':
+            shutil.rmtree(config.output_dir, ignore_errors=True)
+            full = time_best(lambda: build_site(config_dict=config_dict, jobs=jobs), repeat)
+            results['build'] = throughput(full, len(content_files), source_bytes)
+
+            incremental = dict(config_dict, incremental=True)
+            build_site(config_dict=incremental, jobs=jobs)
+            noop = time_best(lambda: build_site(config_dict=incremental, jobs=jobs), repeat)
+            results['build_incremental_unchanged'] = throughput(noop, len(content_files), source_bytes)
+        else:
+            raise ValueError(f"Unknown benchmark stage: {stage}")
+    return results
+
+def run_bench(seed=0, scale=1.0, repeat=3, jobs=1, stages=STAGES, directory=None):
+    """
+    Generate a synthetic site and benchmark it.
+
+    Parameters:
+    - seed: Random seed of the generated site
+    - scale: Size multiplier of the generated site
+    - repeat: Number of runs per stage; the fastest run is reported
+    - jobs: Number of worker processes for complete builds
+    - stages: Names of the stages to run (see STAGES)
+    - directory: Directory to generate the site in and keep (default: a
+      temporary directory that is removed afterwards)
+
+    Returns:
+    - Report dictionary
+    """
+    from simple_ssg import __version__
+
+    work_dir = directory or tempfile.mkdtemp(prefix='simple-ssg-bench-')
+    try:
+        start = time.perf_counter()
+        corpus = CorpusGenerator(seed, scale).write(work_dir)
+        corpus['generate_seconds'] = round(time.perf_counter() - start, 3)
+
+        # Stage functions print progress; keep the report clean
+        with redirect_stdout(io.StringIO()):
+            results = bench_stages(work_dir, stages, repeat, jobs)
+    finally:
+        if directory is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'simple_ssg': __version__,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'seed': seed,
+        'scale': scale,
+        'repeat': repeat,
+        'jobs': jobs,
+        'corpus': corpus,
+        'stages': results,
+    }
+
+def format_report(report):
+    """Format a report as JSON."""
+    return json.dumps(report, indent=2)
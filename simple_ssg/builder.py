@@ -2,105 +2,372 @@
 Core build functionality for Simple-SSG.
 """
 
+import logging
 import os
 import sys
 import re
 import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
 from simple_ssg.converters.markdown import convert_markdown_to_html
-from simple_ssg.utils.fs import ensure_dir, copy_static_assets
-from simple_ssg.utils.templates import inject_content
+from simple_ssg.utils.fs import (
+    ensure_dir, copy_file, copy_static_assets, format_size, write_if_changed
+)
+from simple_ssg.utils.templates import compile_template, extract_metadata, inject_content_parts
+from simple_ssg.utils.manifest import (
+    compute_input_hashes, hash_bytes, hash_file, load_manifest, new_manifest,
+    page_is_current, save_manifest
+)
+from simple_ssg.utils.links import check_links, extract_references, print_link_report
+from simple_ssg.utils.log import Progress
+from simple_ssg.utils.pipeline import Pipeline, format_pipeline_stats
+from simple_ssg.utils.publish import begin_staging, discard_staging, publish_build
+from simple_ssg.utils.timing import (
+    BuildTimer, PageClock, format_phases, stage_span, start_profile, write_profile
+)
 from simple_ssg.enhancers.seo import generate_sitemap, create_robots_txt, create_htaccess
+from simple_ssg.enhancers.feeds import add_to_feeds, create_feeds, write_feeds
+from simple_ssg.enhancers.search import SearchIndex, tokenize, write_search_index
 from simple_ssg.enhancers.minifier import minify_html
+from simple_ssg.enhancers.compression import (
+    COMPRESSED_SUFFIXES, COMPRESSION_STATE_NAME, precompress_site
+)
+from simple_ssg.enhancers.assets import (
+    get_asset_table, plan_fingerprints, rewrite_asset_references, set_asset_table,
+    write_asset_manifest
+)
 from simple_ssg.config import SiteConfig
 
-def build_site(config_file=None, config_dict=None):
+logger = logging.getLogger(__name__)
+
+# Opening tags of h1-h6 headings
+_HEADING_PATTERN = re.compile(r'<h([1-6])[\s>]')
+
+# Per-process configuration for worker processes in parallel builds
+_worker_config = None
+
+def build_site(config_file=None, config_dict=None, jobs=1, profile=None):
     """
     Build the static site based on configuration.
     
     Parameters:
     - config_file: Path to a YAML/JSON configuration file
     - config_dict: Dictionary containing configuration values
+    - jobs: Number of worker processes used to render pages
+      (1 renders serially, 0 or None uses every available CPU)
+    - profile: Path prefix for a cProfile dump (<profile>.prof) and a Chrome
+      trace of the build's phases and pages (<profile>.trace.json)
     
     Returns:
-    - Dictionary with build statistics
+    - Dictionary with build statistics, including the seconds spent in each
+      build phase ('phases'), in each page rendering phase summed over all
+      pages ('page_phases') and on each page ('page_times')
     """
     # Load configuration
     config = SiteConfig(config_file, config_dict)
     
-    print(f"Building site at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    # With atomic publishing the build goes to a staging directory first
+    live_config = config
+    
+    logger.info(f"Building site at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     # Stats for reporting
     stats = {
         'processed': 0,
+        'written': 0,
+        'unchanged': 0,
         'errors': 0,
         'start_time': datetime.now()
     }
     
+    # Phases and pages are timed on the monotonic clock
+    timer = BuildTimer(trace=bool(profile))
+    profiler = start_profile() if profile else None
+    
     try:
-        # Set up build directory
-        setup_build_dir(config)
+        if config.atomic_publish:
+            config = begin_staging(live_config)
+        
+        # A valid manifest lets an incremental build reuse the existing output
+        manifest = load_manifest(config.output_dir) if config.incremental else None
         
-        # Process content files
-        content_files = get_content_files(config.content_dir)
+        # Set up build directory (a staging directory starts as a linked copy
+        # of the live build, which is updated in place of being cleaned)
+        stats['static'] = setup_build_dir(config, keep_output=manifest is not None
+                                          or config is not live_config, timer=timer)
         
-        for content_path in content_files:
-            if process_content_file(content_path, config):
-                stats['processed'] += 1
+        # Read and compile the template once for the whole build
+        with timer.phase('template'):
+            compile_template(config)
+        
+        # Process content files, recording every page of the site
+        with timer.phase('pages'):
+            content_files = get_content_files(config.content_dir)
+            site = new_site_index(config)
+            
+            if config.incremental:
+                # cProfile only sees the calling thread, so a profiled build runs
+                # the page stages in it
+                build_incremental(content_files, config, manifest, stats, jobs, site, timer,
+                                  threads=not profiler)
             else:
-                stats['errors'] += 1
+                progress = Progress(logger, len(content_files))
+                pages = build_pages(content_files, config, jobs,
+                                    pipeline_stats=stats.setdefault('pipeline', {}),
+                                    threads=not profiler)
+                # The pipeline comes first so that it runs to its end
+                for page, content_path in zip(pages, content_files):
+                    if page:
+                        count_page(stats, page, content_path)
+                        add_site_page(site, page['output_path'], page['source_mtime'], page, config)
+                        timer.add_page(get_source_key(content_path, config), page['timing'])
+                    else:
+                        stats['errors'] += 1
+                    progress.update(errors=not page)
+                progress.finish()
+                
+                if config is not live_config:
+                    stats['removed'] = remove_stale_pages(
+                        config, [get_output_path(path, config) for path in content_files])
         
         # Generate additional files
         if config.generate_sitemap:
-            generate_sitemap(config)
+            with timer.phase('sitemap'):
+                generate_sitemap(config, site['pages'])
+        
+        with timer.phase('feeds_and_search'):
+            write_site_index(site, config)
         
         if config.generate_robots:
-            create_robots_txt(config)
+            with timer.phase('robots'):
+                create_robots_txt(config)
             
         if config.generate_htaccess:
-            create_htaccess(config)
+            with timer.phase('htaccess'):
+                create_htaccess(config)
+        
+        # Check links against the finished output, reusing the rendered pages' links
+        if config.check_links:
+            with timer.phase('check_links'):
+                broken = check_links(config.output_dir, site['links'])
+            print_link_report(broken, len(site['links']))
+            stats['broken_links'] = sum(len(references) for references in broken.values())
+        
+        # Compress text outputs once here, rather than on every request
+        if config.precompress:
+            with timer.phase('precompress'):
+                stats['compression'] = precompress_site(config)
+        
+        # Only a build without errors replaces the live site
+        if config is not live_config:
+            with timer.phase('publish'):
+                if stats['errors'] == 0:
+                    publish_build(config.output_dir, live_config)
+                else:
+                    logger.warning("Build had errors; keeping the previously published build.")
+                    discard_staging(config.output_dir)
         
         # Calculate build time
-        stats['end_time'] = datetime.now()
-        stats['build_time'] = (stats['end_time'] - stats['start_time']).total_seconds()
+        record_timings(stats, timer)
         
         # Print build summary
-        print_build_summary(stats, config)
+        print_build_summary(stats, live_config)
         
         return stats
         
     except Exception as e:
-        print(f"Error building site: {str(e)}")
+        logger.error(f"Error building site: {str(e)}")
+        if config is not live_config:
+            discard_staging(config.output_dir)
         stats['errors'] += 1
-        stats['end_time'] = datetime.now()
-        stats['build_time'] = (stats['end_time'] - stats['start_time']).total_seconds()
+        record_timings(stats, timer)
         stats['fatal_error'] = str(e)
         return stats
+    
+    finally:
+        if profiler:
+            write_profile(profile, profiler, timer)
+
+def record_timings(stats, timer):
+    """Store the build time and the timings of a build's phases and pages in its statistics."""
+    stats['end_time'] = datetime.now()
+    stats['build_time'] = time.perf_counter() - timer.origin
+    stats['phases'] = timer.phases
+    stats['page_phases'] = timer.page_phases
+    stats['page_times'] = timer.page_times
 
-def setup_build_dir(config):
-    """Set up the build directory and copy static assets."""
+def setup_build_dir(config, keep_output=False, timer=None):
+    """
+    Set up the build directory and copy static assets.
+    
+    Parameters:
+    - config: Configuration object
+    - keep_output: Keep existing output even if clean_output is set
+      (used by incremental builds with a valid manifest)
+    - timer: Optional BuildTimer that times the 'clean' and 'static_assets' phases
+    
+    Returns:
+    - Static asset sync statistics (see copy_static_assets)
+    """
+    def phase(name):
+        return timer.phase(name) if timer else nullcontext()
+    
     try:
         # Remove existing build directory if it exists
-        if os.path.exists(config.output_dir):
-            if config.clean_output:
-                shutil.rmtree(config.output_dir)
-            else:
-                print(f"Warning: Output directory {config.output_dir} exists and clean_output=False. Files may be overwritten.")
+        with phase('clean'):
+            if os.path.exists(config.output_dir):
+                if keep_output:
+                    pass
+                elif config.clean_output:
+                    if os.path.islink(config.output_dir):
+                        # Left over from atomic publishing: drop the link, keep the builds
+                        os.remove(config.output_dir)
+                    else:
+                        clean_output_dir(config)
+                else:
+                    logger.warning(f"Warning: Output directory {config.output_dir} exists and clean_output=False. Files may be overwritten.")
+            
+            # Create build directory
+            ensure_dir(config.output_dir)
         
-        # Create build directory
-        ensure_dir(config.output_dir)
+        with phase('static_assets'):
+            static_stats = sync_static_assets(config)
         
-        # Copy static assets
-        copy_static_assets(config.static_dirs, config.output_dir)
+        # Copy index.html if specified (unless content/index.md renders its
+        # own index.html, which would replace the copy anyway)
+        if has_index_page(config):
+            pass
+        elif config.index_path and os.path.exists(config.index_path):
+            copy_index_page(config)
         
-        # Copy index.html if specified
-        if config.index_path and os.path.exists(config.index_path):
-            shutil.copy2(config.index_path, os.path.join(config.output_dir, 'index.html'))
+        return static_stats
             
     except Exception as e:
-        print(f"Error setting up build directory: {str(e)}")
+        logger.error(f"Error setting up build directory: {str(e)}")
         sys.exit(1)
 
+def sync_static_assets(config, static_dirs=None):
+    """
+    Sync static directories to the output, fingerprinting and keeping
+    precompressed files the way the configuration asks.
+    
+    Parameters:
+    - config: Configuration object
+    - static_dirs: Static directories to sync (default: all of them)
+    
+    Returns:
+    - Static asset sync statistics (see copy_static_assets)
+    """
+    # Work out fingerprinted asset names before syncing, so the sync
+    # writes (and later skips) the fingerprinted files directly
+    names = None
+    if config.fingerprint_assets:
+        asset_table, names = plan_fingerprints(config)
+        set_asset_table(asset_table)
+    else:
+        set_asset_table(None)
+    
+    static_stats = copy_static_assets(config.static_dirs if static_dirs is None else static_dirs,
+                                      config.output_dir, config.static_checksum,
+                                      config.static_link, names,
+                                      COMPRESSED_SUFFIXES if config.precompress else ())
+    
+    if config.fingerprint_assets:
+        write_asset_manifest(get_asset_table() or {}, config.output_dir)
+    
+    return static_stats
+
+def copy_index_page(config):
+    """Copy index_path to index.html, rewriting asset references if needed."""
+    output_path = os.path.join(config.output_dir, 'index.html')
+    if get_asset_table() is None:
+        copy_file(config.index_path, output_path)
+        return
+    
+    with open(config.index_path, 'r', encoding='utf-8') as f:
+        html = rewrite_asset_references(f.read())
+    write_if_changed(output_path, html.encode('utf-8'))
+
+def clean_output_dir(config):
+    """
+    Empty the output directory, except for the copies of the static directories.
+    
+    The static directories are synced afterwards, which removes anything in
+    them that is not in the source, so only unchanged assets survive. With
+    precompress, compressed variants and their state are kept as well; they
+    are checked against the new output by precompress_site.
+    
+    Parameters:
+    - config: Configuration object
+    """
+    static_names = {os.path.basename(os.path.normpath(d)) for d in config.static_dirs}
+    
+    def keep(name):
+        return config.precompress and (name == COMPRESSION_STATE_NAME
+                                       or name.endswith(COMPRESSED_SUFFIXES))
+    
+    for entry in os.scandir(config.output_dir):
+        if entry.is_dir(follow_symlinks=False):
+            if entry.name not in static_names and _clean_tree(entry.path, keep):
+                os.rmdir(entry.path)
+        elif not keep(entry.name):
+            os.remove(entry.path)
+
+def remove_stale_pages(config, output_paths):
+    """
+    Remove the pages of an earlier build that this build did not render.
+    
+    An atomic build starts from a linked copy of the live build instead of
+    a clean directory, so pages whose source is gone are removed afterwards.
+    
+    Parameters:
+    - config: Configuration object
+    - output_paths: Paths of the pages this build rendered
+    
+    Returns:
+    - Number of removed pages
+    """
+    keep = {os.path.abspath(path) for path in output_paths}
+    if config.index_path and os.path.exists(config.index_path):
+        keep.add(os.path.abspath(os.path.join(config.output_dir, 'index.html')))
+    static_names = {os.path.basename(os.path.normpath(d)) for d in config.static_dirs}
+    
+    removed = 0
+    for root, dirs, files in os.walk(config.output_dir):
+        if root == config.output_dir:
+            # Static directories are synced with their sources
+            dirs[:] = [name for name in dirs if name not in static_names]
+        for name in files:
+            path = os.path.abspath(os.path.join(root, name))
+            if name.endswith('.html') and path not in keep:
+                os.remove(path)
+                logger.info(f"Removed {os.path.relpath(path, config.output_dir)}")
+                removed += 1
+    return removed
+
+def _clean_tree(directory, keep):
+    """Remove all files in a directory tree except kept ones; return True if it is now empty."""
+    empty = True
+    for entry in os.scandir(directory):
+        if entry.is_dir(follow_symlinks=False):
+            if _clean_tree(entry.path, keep):
+                os.rmdir(entry.path)
+            else:
+                empty = False
+        elif keep(entry.name):
+            empty = False
+        else:
+            os.remove(entry.path)
+    return empty
+
+def has_index_page(config):
+    """Check whether the content directory renders its own index.html."""
+    return any(os.path.exists(os.path.join(config.content_dir, f'index{ext}'))
+               for ext in ('.md', '.markdown'))
+
 def get_content_files(content_dir):
     """Get all content files from the content directory."""
     content_files = []
@@ -112,57 +379,639 @@ def get_content_files(content_dir):
     
     return content_files
 
+def build_incremental(content_files, config, manifest, stats, jobs=1, site=None, timer=None,
+                      threads=True):
+    """
+    Render only the pages whose source or inputs changed since the last build.
+    
+    Parameters:
+    - content_files: List of content file paths
+    - config: Configuration object
+    - manifest: Manifest loaded from the output directory (or None)
+    - stats: Build statistics dictionary to update
+    - jobs: Number of worker processes used to render pages
+    - site: Optional site index (see new_site_index) to which every page is
+      added, whether it was rendered or not
+    - timer: Optional BuildTimer that records the rendered pages' timings
+    - threads: Run the page pipeline's stages in threads (see build_pages)
+    """
+    if site is None:
+        site = new_site_index(config)
+    inputs = compute_input_hashes(config)
+    old_pages = manifest['pages'] if manifest else {}
+    new = new_manifest()
+    pending = []
+    
+    stats['skipped'] = 0
+    stats['removed'] = 0
+    
+    for content_path in content_files:
+        source = get_source_key(content_path, config)
+        entry = old_pages.get(source)
+        stored = get_stored_output(entry)
+        
+        # Only hash sources whose size or modification time changed
+        source_stat = os.stat(content_path)
+        if (entry and entry.get('source_size') == source_stat.st_size
+                and entry.get('source_mtime') == source_stat.st_mtime_ns):
+            source_hash = entry.get('source_hash')
+        else:
+            source_hash = hash_file(content_path)
+        
+        # Feeds and search need the details recorded when the page was rendered
+        if (page_is_current(entry, source_hash, inputs, config.output_dir)
+                and all(key in entry for key in get_page_info_keys(config))):
+            new['pages'][source] = dict(entry, source_size=source_stat.st_size,
+                                        source_mtime=source_stat.st_mtime_ns)
+            add_site_page(site, os.path.join(config.output_dir, entry['output']),
+                          source_stat.st_mtime, entry, config)
+            stats['skipped'] += 1
+        else:
+            pending.append((content_path, source, stored, {
+                'source_hash': source_hash,
+                'source_size': source_stat.st_size,
+                'source_mtime': source_stat.st_mtime_ns,
+                'inputs': inputs,
+            }))
+    
+    rendered = build_pages([item[0] for item in pending], config, jobs,
+                           [item[2] for item in pending], stats.setdefault('pipeline', {}),
+                           threads)
+    progress = Progress(logger, len(pending))
+    for page, (content_path, source, stored, entry) in zip(rendered, pending):
+        if page:
+            new['pages'][source] = record_output(entry, page, config)
+            count_page(stats, page, content_path)
+            add_site_page(site, page['output_path'], page['source_mtime'], page, config)
+            if timer:
+                timer.add_page(source, page['timing'])
+        else:
+            stats['errors'] += 1
+        progress.update(errors=not page)
+    progress.finish()
+    
+    # Remove output for sources that no longer exist
+    current_sources = {get_source_key(path, config) for path in content_files}
+    current_outputs = {get_output_path(path, config) for path in content_files}
+    for source, entry in old_pages.items():
+        if source in current_sources:
+            continue
+        output_path = os.path.join(config.output_dir, entry.get('output', ''))
+        if output_path not in current_outputs and os.path.isfile(output_path):
+            os.remove(output_path)
+            logger.info(f"Removed {os.path.relpath(output_path, config.output_dir)}")
+            stats['removed'] += 1
+    
+    save_manifest(config.output_dir, new)
+
+def rebuild_pages(content_paths, config, jobs=1):
+    """
+    Re-render specific content files and remove the output of deleted ones.
+    
+    Used by watch mode. When the build is incremental, the manifest entries
+    of the affected pages are updated as well.
+    
+    Parameters:
+    - content_paths: Paths of changed or deleted content files
+    - config: Configuration object
+    - jobs: Number of worker processes used to render pages
+    
+    Returns:
+    - Dictionary with processed, written, unchanged, removed and errors counts
+    """
+    stats = {'processed': 0, 'written': 0, 'unchanged': 0, 'removed': 0, 'errors': 0}
+    
+    manifest = load_manifest(config.output_dir) if config.incremental else None
+    if config.incremental and manifest is None:
+        manifest = new_manifest()
+    inputs = compute_input_hashes(config) if manifest is not None else None
+    
+    existing = []
+    for content_path in content_paths:
+        source = get_source_key(content_path, config)
+        if os.path.exists(content_path):
+            source_stat = os.stat(content_path)
+            entry = manifest['pages'].get(source) if manifest is not None else None
+            existing.append((content_path, source, get_stored_output(entry), {
+                'source_hash': hash_file(content_path),
+                'source_size': source_stat.st_size,
+                'source_mtime': source_stat.st_mtime_ns,
+                'inputs': inputs,
+            }))
+            continue
+        
+        output_path = get_output_path(content_path, config)
+        if os.path.isfile(output_path):
+            os.remove(output_path)
+            logger.info(f"Removed {os.path.relpath(output_path, config.output_dir)}")
+            stats['removed'] += 1
+        if manifest is not None:
+            manifest['pages'].pop(source, None)
+    
+    rendered = build_pages([item[0] for item in existing], config, jobs,
+                           [item[2] for item in existing])
+    for page, (content_path, source, stored, entry) in zip(rendered, existing):
+        if page:
+            if manifest is not None:
+                manifest['pages'][source] = record_output(entry, page, config)
+            count_page(stats, page, content_path)
+        else:
+            if manifest is not None:
+                manifest['pages'].pop(source, None)
+            stats['errors'] += 1
+    
+    if manifest is not None:
+        save_manifest(config.output_dir, manifest)
+        if get_page_info_keys(config):
+            write_site_index_from_manifest(manifest, config)
+    
+    return stats
+
+def write_site_index_from_manifest(manifest, config):
+    """Write the feeds and search index from the page details recorded in the manifest."""
+    site = new_site_index(config)
+    for entry in manifest['pages'].values():
+        if 'output' in entry:
+            add_site_page(site, os.path.join(config.output_dir, entry['output']),
+                          entry['source_mtime'] / 1e9, entry, config)
+    write_site_index(site, config)
+
+def count_page(stats, page, content_path):
+    """Count a successfully built page in the build statistics and log it."""
+    stats['processed'] += 1
+    if page['written']:
+        stats['written'] += 1
+    else:
+        stats['unchanged'] += 1
+    
+    # Logged here rather than in build_page, which may run in a worker process
+    if logger.isEnabledFor(logging.DEBUG):
+        status = '' if page['written'] else ' (unchanged)'
+        logger.debug(f"Processed {os.path.basename(content_path)} → "
+                     f"{os.path.basename(page['output_path'])}{status}",
+                     extra={'page': content_path, 'written': page['written'],
+                            'seconds': round(page['timing']['seconds'], 6)})
+
+def get_stored_output(entry):
+    """
+    Get the recorded output details of a manifest entry for write_if_changed.
+    
+    Parameters:
+    - entry: Manifest entry of a page (or None)
+    
+    Returns:
+    - Dictionary with the output hash, size and mtime, or None
+    """
+    if not entry or 'output_hash' not in entry:
+        return None
+    return {
+        'hash': entry['output_hash'],
+        'size': entry.get('output_size'),
+        'mtime': entry.get('output_mtime'),
+    }
+
+def record_output(entry, page, config):
+    """Add the output details of a freshly built page to its manifest entry."""
+    output_stat = os.stat(page['output_path'])
+    entry.update((key, page[key]) for key in ('title', 'summary', 'terms') if key in page)
+    entry.update(
+        output=os.path.relpath(page['output_path'], config.output_dir).replace(os.sep, '/'),
+        output_hash=page['output_hash'],
+        output_size=output_stat.st_size,
+        output_mtime=output_stat.st_mtime_ns,
+    )
+    return entry
+
+def get_site_page(output_path, source_mtime, config):
+    """
+    Describe a page of the site for the sitemap.
+    
+    Parameters:
+    - output_path: Path of the page's HTML file
+    - source_mtime: Modification time of the page's source file
+    - config: Configuration object
+    
+    Returns:
+    - Dictionary with 'path' (relative to the output directory, with forward
+      slashes) and 'lastmod'
+    """
+    return {
+        'path': os.path.relpath(output_path, config.output_dir).replace(os.sep, '/'),
+        'lastmod': source_mtime,
+    }
+
+def new_site_index(config):
+    """
+    Create the collections that pages are added to as they are built.
+    
+    Parameters:
+    - config: Configuration object
+    
+    Returns:
+    - Dictionary with the list of 'pages' (see get_site_page), the 'feeds',
+      the 'search' index and the 'links' of each page for the link checker
+      (None when disabled)
+    """
+    return {
+        'pages': [],
+        'feeds': create_feeds(config),
+        'search': SearchIndex() if config.search_index else None,
+        'links': {} if config.check_links else None,
+    }
+
+def add_site_page(site, output_path, source_mtime, info, config):
+    """
+    Add a built page to the site index.
+    
+    Parameters:
+    - site: Site index (see new_site_index)
+    - output_path: Path of the page's HTML file
+    - source_mtime: Modification time of the page's source file
+    - info: Page details from build_page or the manifest ('title', 'summary'
+      and 'terms' when collected, and 'links' for pages rendered in this build)
+    - config: Configuration object
+    """
+    site_page = get_site_page(output_path, source_mtime, config)
+    site['pages'].append(site_page)
+    if site['feeds']:
+        add_to_feeds(site['feeds'], site_page, info['title'], info['summary'])
+    if site['search'] is not None and not site_page['path'].endswith('404.html'):
+        site['search'].add(site_page['path'], info['title'], info['terms'])
+    if site['links'] is not None:
+        # Pages that were not rendered are read from disk by the link checker
+        site['links'][site_page['path']] = info.get('links')
+
+def write_site_index(site, config):
+    """Write the feeds and search index of a build."""
+    if site['feeds']:
+        write_feeds(config, site['feeds'])
+    if site['search'] is not None:
+        write_search_index(config, site['search'])
+
+def get_page_info_keys(config):
+    """Get the page details that build_page collects for this configuration."""
+    keys = ()
+    if config.feeds or config.search_index:
+        keys += ('title', 'summary')
+    if config.search_index:
+        keys += ('terms',)
+    return keys
+
+def collect_site_pages(config):
+    """Describe every page of the site from the content directory (see get_site_page)."""
+    return [get_site_page(get_output_path(path, config), os.stat(path).st_mtime, config)
+            for path in get_content_files(config.content_dir)]
+
+def get_source_key(content_path, config):
+    """Get the manifest key for a content file (its path relative to content_dir)."""
+    return os.path.relpath(content_path, config.content_dir).replace(os.sep, '/')
+
+def get_output_path(content_path, config):
+    """Get the output HTML path for a content file."""
+    rel_path = os.path.relpath(content_path, config.content_dir)
+    base_name = os.path.splitext(rel_path)[0]
+    return os.path.join(config.output_dir, f"{base_name}.html")
+
+def build_pages(content_files, config, jobs=1, stored_outputs=None, pipeline_stats=None,
+                threads=True):
+    """
+    Build pages in a streaming pipeline.
+    
+    A reader thread reads sources ahead of the renderer, pages are rendered
+    in this process or across a pool of worker processes, and a writer
+    thread writes them behind it, so disk and CPU work overlap. The queues
+    between the stages hold at most pipeline_queue_size pages each, which
+    caps the memory used on large sites.
+    
+    Parameters:
+    - content_files: List of content file paths
+    - config: Configuration object
+    - jobs: Number of worker processes (1 for serial, 0 or None for all CPUs)
+    - stored_outputs: List of recorded output details (see get_stored_output),
+      one per content file, or None
+    - pipeline_stats: Optional dictionary that receives the pipeline's stage
+      utilization and queue depths (see Pipeline) when the build is done
+    - threads: Run the reader, renderer and writer in threads of their own;
+      with False they run in the calling thread, e.g. for cProfile, which
+      only profiles that thread
+    
+    Returns:
+    - Iterator of build_page results, in the order of content_files
+    """
+    if not jobs:
+        jobs = os.cpu_count() or 1
+    
+    if stored_outputs is None:
+        stored_outputs = [None] * len(content_files)
+    
+    return _run_pipeline(zip(content_files, stored_outputs), len(content_files), config, jobs,
+                         pipeline_stats, threads)
+
+def _run_pipeline(items, total, config, jobs, pipeline_stats, threads):
+    """Yield the results of the page pipeline, then hand over its statistics."""
+    executor = None
+    pipeline = Pipeline(config.pipeline_queue_size, threads)
+    pipeline.add_stage('read', lambda item: read_page(item[0], item[1]))
+    if jobs == 1 or total < 2:
+        pipeline.add_stage('render', lambda job: render_page_job(job, config))
+    else:
+        workers = min(jobs, total)
+        executor = _start_worker_pool(config, workers)
+        pipeline.add_stream_stage('render', lambda page_jobs: _render_pages_parallel(
+            page_jobs, executor, workers, total))
+    created_dirs = set()
+    pipeline.add_stage('write', lambda job: write_page(job, config, created_dirs))
+    
+    try:
+        yield from pipeline.run(items)
+    finally:
+        if executor:
+            executor.shutdown()
+        if pipeline_stats is not None:
+            pipeline_stats.update(pipeline.stats)
+
+def _start_worker_pool(config, workers):
+    """Start a process pool whose workers hold the config, before any stage thread runs."""
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(config, get_asset_table()))
+    # The pool starts its workers on the first task. Forking them now, while
+    # this is the only thread, keeps them from inheriting a lock held by a
+    # stage thread (a logging handler's or a queue's), which would deadlock them.
+    executor.submit(os.getpid)
+    return executor
+
+def _render_pages_parallel(page_jobs, executor, workers, total):
+    """Render page jobs in a process pool started by _start_worker_pool."""
+    # Batch several pages per task to keep the IPC overhead low on large sites,
+    # and keep only a few batches per worker in flight to bound memory
+    batch_size = max(1, min(32, total // (workers * 4)))
+    in_flight = deque()
+    
+    batch = []
+    for job in page_jobs:
+        batch.append(job)
+        if len(batch) < batch_size:
+            continue
+        in_flight.append((batch, executor.submit(_render_batch_in_worker, _get_sources(batch))))
+        batch = []
+        while len(in_flight) >= workers * 2:
+            yield from _finish_batch(*in_flight.popleft())
+    if batch:
+        in_flight.append((batch, executor.submit(_render_batch_in_worker, _get_sources(batch))))
+    while in_flight:
+        yield from _finish_batch(*in_flight.popleft())
+
+def _get_sources(batch):
+    """Get the (path, source) pairs a worker renders, with None for pages that already failed."""
+    return [None if job['failed'] else (job['content_path'], job.pop('content')) for job in batch]
+
+def _finish_batch(batch, future):
+    """Wait for a batch rendered by a worker and apply the results to its page jobs."""
+    for job, result in zip(batch, future.result()):
+        yield job if result is None else apply_render_result(job, result)
+
+def _init_worker(config, asset_table=None):
+    """Store the site configuration in a freshly started worker process."""
+    global _worker_config
+    _worker_config = config
+    set_asset_table(asset_table)
+    compile_template(config)
+
+def _render_batch_in_worker(sources):
+    """Render a batch of page sources using the worker's configuration."""
+    return [None if source is None else render_source(source[0], source[1], _worker_config)
+            for source in sources]
+
 def process_content_file(content_path, config):
     """Process a single content file and create the corresponding HTML."""
-    try:
-        # Determine output path
-        rel_path = os.path.relpath(content_path, config.content_dir)
-        base_name = os.path.splitext(rel_path)[0]
-        output_path = os.path.join(config.output_dir, f"{base_name}.html")
+    return build_page(content_path, config) is not None
+
+def render_page(content_path, config, page_info=None, clock=None):
+    """
+    Render a content file to the complete HTML page.
+    
+    Parameters:
+    - content_path: Path to the content file
+    - config: Configuration object
+    - page_info: Optional dictionary that receives the page's 'title' and
+      'summary' (as used in feeds), and its search 'terms' when the search
+      index is enabled
+    - clock: Optional PageClock that times the rendering phases
+    
+    Returns:
+    - The page HTML, or None if the file type is not supported
+    
+    Raises:
+    - UnicodeDecodeError: If the content file is not valid UTF-8
+    """
+    clock = clock or PageClock()
+    
+    # Read content file
+    with open(content_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    clock.lap('read')
+    
+    return render_content(content, content_path, config, page_info, clock)
+
+def render_content(content, content_path, config, page_info=None, clock=None):
+    """
+    Render the source of a content file to the complete HTML page.
+    
+    Parameters:
+    - content: Source text of the content file
+    - content_path: Path to the content file
+    - config: Configuration object
+    - page_info: Optional dictionary for the page details (see render_page)
+    - clock: Optional PageClock that times the rendering phases
+    
+    Returns:
+    - The page HTML, or None if the file type is not supported
+    """
+    clock = clock or PageClock()
+    
+    # Determine converter based on file extension
+    if content_path.endswith(('.md', '.markdown')):
+        # Fix image paths
+        content = fix_image_paths(content, config)
         
-        # Create output directory if it doesn't exist
-        ensure_dir(os.path.dirname(output_path))
-        
-        # Read content file
-        try:
-            with open(content_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except UnicodeDecodeError:
-            print(f"Error: File {content_path} has encoding issues. Try saving as UTF-8.")
-            return False
-        
-        # Determine converter based on file extension
-        if content_path.endswith(('.md', '.markdown')):
-            # Fix image paths
-            content = fix_image_paths(content, config)
-            
-            # Convert content to HTML
-            html_content = convert_markdown_to_html(content, config)
-            
-            # Wrap sections if enabled
-            if config.wrap_sections:
-                html_content = wrap_sections(html_content, config)
-        else:
-            print(f"Warning: Unsupported file type: {content_path}")
-            return False
+        # Convert content to HTML
+        html_content = convert_markdown_to_html(content, config)
+        clock.lap('convert')
+        
+        # Wrap sections if enabled
+        if config.wrap_sections:
+            html_content = wrap_sections(html_content, config)
+            clock.lap('wrap_sections')
         
-        # Inject content into template
-        page_html = inject_content(html_content, content_path, config)
+        # Point references to static files at their fingerprinted names
+        html_content = rewrite_asset_references(html_content)
+        clock.lap('rewrite_assets')
         
-        # Minify HTML if enabled
-        if config.minify:
-            page_html = minify_html(page_html)
+        if page_info is not None:
+            page_info['title'], page_info['summary'] = extract_metadata(html_content)
+            if config.search_index:
+                page_info['terms'] = ' '.join(tokenize(html_content))
+            clock.lap('page_info')
+    else:
+        logger.warning(f"Warning: Unsupported file type: {content_path}")
+        return None
+    
+    # Inject content into template
+    page_parts = inject_content_parts(html_content, content_path, config)
+    clock.lap('inject_content')
+    
+    # Minify HTML if enabled, straight from the template parts
+    if config.minify:
+        page_html = minify_html(page_parts)
+        clock.lap('minify_html')
+        return page_html
+    return ''.join(page_parts)
+
+def build_page(content_path, config, stored=None):
+    """
+    Process a single content file and write the corresponding HTML.
+    
+    The output file is left untouched when its content would not change.
+    This runs the stages of build_pages one after the other.
+    
+    Parameters:
+    - content_path: Path to the content file
+    - config: Configuration object
+    - stored: Recorded details of the existing output (see get_stored_output)
+    
+    Returns:
+    - Dictionary with the output path, output hash, whether the file was
+      written, the source modification time and the page's 'timing' (see
+      BuildTimer.add_page), plus the title, summary and search terms when
+      feeds or search are enabled, and the page's links when checking links;
+      or None on failure
+    """
+    return write_page(render_page_job(read_page(content_path, stored), config), config)
+
+def read_page(content_path, stored=None):
+    """
+    Read a content file, the first stage of building a page.
+    
+    Parameters:
+    - content_path: Path to the content file
+    - stored: Recorded details of the existing output (see get_stored_output)
+    
+    Returns:
+    - Page job dictionary for render_page_job, with the source 'content'
+      unless the page 'failed'
+    """
+    start = time.perf_counter()
+    job = {'content_path': content_path, 'stored': stored, 'start': start,
+           'phases': {}, 'stages': [], 'failed': False}
+    try:
+        job['source_mtime'] = os.stat(content_path).st_mtime
+        with open(content_path, 'r', encoding='utf-8') as f:
+            job['content'] = f.read()
+    except UnicodeDecodeError:
+        logger.error(f"Error: File {content_path} has encoding issues. Try saving as UTF-8.")
+        job['failed'] = True
+    except Exception as e:
+        logger.error(f"Error processing {content_path}: {str(e)}")
+        job['failed'] = True
+    job['stages'].append(stage_span('read', start))
+    job['phases']['read'] = job['stages'][-1]['end'] - start
+    return job
+
+def render_page_job(job, config):
+    """Render a page job in this process, the second stage of building a page."""
+    if job['failed']:
+        return job
+    return apply_render_result(job, render_source(job['content_path'], job.pop('content'), config))
+
+def render_source(content_path, content, config):
+    """
+    Render the source of a page, in this process or in a worker process.
+    
+    Parameters:
+    - content_path: Path to the content file
+    - content: Source text of the content file
+    - config: Configuration object
+    
+    Returns:
+    - Dictionary with the page 'html' (None if it was not rendered), its
+      'page_info' (see render_page) and 'links' (when checking links), the
+      timed 'phases', the rendering's 'stage' (see stage_span) and the
+      'error' message if rendering failed
+    """
+    phases = {}
+    clock = PageClock(phases)
+    result = {'html': None, 'page_info': None, 'links': None, 'phases': phases,
+              'stage': None, 'error': None}
+    try:
+        page_info = {} if get_page_info_keys(config) else None
+        page_html = render_content(content, content_path, config, page_info, clock)
         
-        # Write to output file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(page_html)
+        # Collect links while the page is in memory
+        if page_html is not None and config.check_links:
+            result['links'] = extract_references(page_html)
+            clock.lap('links')
         
-        print(f"Processed {os.path.basename(content_path)} → {os.path.basename(output_path)}")
-        return True
+        result.update(html=page_html, page_info=page_info)
+    except Exception as e:
+        result['error'] = f"Error processing {content_path}: {str(e)}"
+    result['stage'] = stage_span('render', clock.start)
+    return result
+
+def apply_render_result(job, result):
+    """Add the result of render_source to its page job, logging any error in this process."""
+    job['phases'].update(result['phases'])
+    job['stages'].append(result['stage'])
+    job.update(html=result['html'], page_info=result['page_info'], links=result['links'])
+    if result['error']:
+        logger.error(result['error'])
+    job['failed'] = job['html'] is None
+    return job
+
+def write_page(job, config, created_dirs=None):
+    """
+    Write a rendered page job, the last stage of building a page.
+    
+    Parameters:
+    - job: Page job from render_page_job
+    - config: Configuration object
+    - created_dirs: Optional set of output directories known to exist
+    
+    Returns:
+    - Page dictionary (see build_page), or None on failure
+    """
+    if job['failed']:
+        return None
+    
+    content_path = job['content_path']
+    start = time.perf_counter()
+    try:
+        # Create output directory if it doesn't exist
+        output_path = get_output_path(content_path, config)
+        directory = os.path.dirname(output_path)
+        if created_dirs is None or directory not in created_dirs:
+            ensure_dir(directory)
+            if created_dirs is not None:
+                created_dirs.add(directory)
         
+        # Write to output file, unless it already has exactly this content
+        data = job['html'].encode('utf-8')
+        output_hash = hash_bytes(data)
+        written = write_if_changed(output_path, data, output_hash, job['stored'])
     except Exception as e:
-        print(f"Error processing {content_path}: {str(e)}")
-        return False
+        logger.error(f"Error processing {content_path}: {str(e)}")
+        return None
+    
+    job['stages'].append(stage_span('write', start))
+    phases = job['phases']
+    phases['write'] = job['stages'][-1]['end'] - start
+    timing = {'start': job['start'], 'seconds': sum(phases.values()),
+              'phases': phases, 'stages': job['stages']}
+    
+    page = dict(job['page_info'] or {}, output_path=output_path, output_hash=output_hash,
+                written=written, source_mtime=job['source_mtime'], timing=timing)
+    if job['links'] is not None:
+        page['links'] = job['links']
+    return page
 
 def fix_image_paths(content, config):
     """Fix image paths in content."""
@@ -173,32 +1022,109 @@ def fix_image_paths(content, config):
     
     return content
 
+def get_section_classes(config):
+    """
+    Get the heading levels to wrap and their section classes.
+    
+    Parameters:
+    - config: Configuration object
+    
+    Returns:
+    - Dictionary mapping heading level (1-6) to section class
+    """
+    section_classes = config.section_classes
+    if section_classes is None:
+        section_classes = {'h1': config.h1_section_class, 'h2': config.h2_section_class}
+    
+    levels = {}
+    for heading, class_name in section_classes.items():
+        level = int(str(heading).lower().lstrip('h'))
+        if 1 <= level <= 6:
+            levels[level] = class_name
+    return levels
+
 def wrap_sections(html, config):
-    """Wrap content in appropriate section tags."""
+    """
+    Wrap content in appropriate section tags.
+    
+    Each configured heading starts a section that runs until the next
+    configured heading (flat) or the next heading of the same or a higher
+    level (when nest_sections is enabled). The page is scanned once.
+    """
     try:
-        # Find h1 sections and wrap them
-        html = re.sub(r'(<h1.*?<\/h1>)([\s\S]*?)(?=<h2|$)', 
-                    lambda m: f'<section class="{config.h1_section_class}">{m.group(1)}{m.group(2)}</section>', 
-                    html)
+        levels = get_section_classes(config)
+        if not levels:
+            return html
         
-        # Find h2 sections and wrap them
-        html = re.sub(r'(<h2.*?<\/h2>)([\s\S]*?)(?=<h2|$)', 
-                    lambda m: f'<section class="{config.h2_section_class}">{m.group(1)}{m.group(2)}</section>', 
-                    html)
+        # Sections close before a trailing newline, like the end of the page
+        end = len(html) - 1 if html.endswith('\n') else len(html)
         
-        return html
+        parts = []
+        open_levels = []
+        last_pos = 0
+        
+        for match in _HEADING_PATTERN.finditer(html, 0, end):
+            level = int(match.group(1))
+            if level not in levels:
+                continue
+            
+            parts.append(html[last_pos:match.start()])
+            last_pos = match.start()
+            
+            # Close the sections this heading ends
+            while open_levels and (not config.nest_sections or open_levels[-1] >= level):
+                open_levels.pop()
+                parts.append('</section>')
+            
+            class_name = levels[level]
+            parts.append(f'<section class="{class_name}">' if class_name else '<section>')
+            open_levels.append(level)
+        
+        parts.append(html[last_pos:end])
+        parts.append('</section>' * len(open_levels))
+        parts.append(html[end:])
+        
+        return ''.join(parts)
     except Exception as e:
-        print(f"Error wrapping sections: {str(e)}")
+        logger.error(f"Error wrapping sections: {str(e)}")
         return html
 
 def print_build_summary(stats, config):
-    """Print a summary of the build process."""
-    print(f"\nBuild Summary:")
-    print(f"- Files processed successfully: {stats['processed']}")
+    """Log a summary of the build process."""
+    lines = [f"\nBuild Summary:"]
+    lines.append(f"- Files processed successfully: {stats['processed']}")
+    static = stats.get('static')
+    if static:
+        lines.append(f"- Static files copied: {static['copied']} ({format_size(static['bytes_copied'])}), "
+                     f"unchanged: {static['skipped']} ({format_size(static['bytes_skipped'])})")
+    if stats.get('unchanged'):
+        lines.append(f"- Files written: {stats['written']} (unchanged, not rewritten: {stats['unchanged']})")
+    if 'skipped' in stats:
+        lines.append(f"- Files unchanged (skipped): {stats['skipped']}")
+        lines.append(f"- Stale files removed: {stats['removed']}")
     if stats['errors'] > 0:
-        print(f"- Files with errors: {stats['errors']}")
-    print(f"- Output directory: {os.path.abspath(config.output_dir)}")
-    print(f"- Build time: {stats['build_time']:.2f} seconds")
-    print(f"- HTML minification: {'Enabled' if config.minify else 'Disabled'}")
+        lines.append(f"- Files with errors: {stats['errors']}")
+    if 'broken_links' in stats:
+        lines.append(f"- Broken links: {stats['broken_links']}")
+    lines.append(f"- Output directory: {os.path.abspath(config.output_dir)}")
+    lines.append(f"- Build time: {stats['build_time']:.2f} seconds")
+    if stats.get('phases'):
+        lines.append(f"- Phases: {format_phases(stats['phases'])}")
+    if stats.get('page_phases'):
+        lines.append(f"- Page phases (all pages): {format_phases(stats['page_phases'])}")
+    if stats.get('pipeline'):
+        lines.append(f"- Pipeline: {format_pipeline_stats(stats['pipeline'])}")
+    slowest = sorted(stats.get('page_times', {}).items(), key=lambda item: item[1],
+                     reverse=True)[:config.slowest_pages]
+    if slowest:
+        lines.append(f"- Slowest pages:")
+        for page, seconds in slowest:
+            lines.append(f"  {seconds * 1000:8.1f} ms  {page}")
+    lines.append(f"- HTML minification: {'Enabled' if config.minify else 'Disabled'}")
+    lines.append(f"\nBuild complete!")
     
-    print(f"\nBuild complete!")
+    # One record, so the JSON log gets the figures as fields of one entry
+    logger.info('\n'.join(lines), extra={
+        'processed': stats['processed'], 'errors': stats['errors'],
+        'build_time': round(stats['build_time'], 3), 'phases': stats.get('phases'),
+    })
@@ -5,12 +5,12 @@ Command-line interface for Simple-SSG.
 import os
 import sys
 import argparse
-import json
-import yaml
-from simple_ssg.builder import build_site
-from simple_ssg.enhancers.server import serve
 from simple_ssg import __version__
 
+# Each command imports the modules it needs when it runs, so that quick
+# commands like `--version` or `serve` do not pay for Markdown, YAML and the
+# builder
+
 def main():
     """Main CLI entry point."""
     parser = argparse.ArgumentParser(
@@ -24,8 +24,17 @@ def main():
     # Create subparsers for different commands
     subparsers = parser.add_subparsers(dest='command', help='Commands')
     
+    # Output options shared by the commands that log
+    log_options = argparse.ArgumentParser(add_help=False)
+    verbosity = log_options.add_mutually_exclusive_group()
+    verbosity.add_argument('--quiet', '-q', action='store_true', help='Only show warnings and errors')
+    verbosity.add_argument('--verbose', '-v', action='store_true',
+                           help='Show every processed page and other details')
+    log_options.add_argument('--log-json', metavar='FILE',
+                             help='Also write every log record as a line of JSON to FILE')
+    
     # Build command
-    build_parser = subparsers.add_parser('build', help='Build the static site')
+    build_parser = subparsers.add_parser('build', help='Build the static site', parents=[log_options])
     build_parser.add_argument('--config', '-c', help='Path to config file (YAML or JSON)')
     build_parser.add_argument('--content-dir', help='Content directory')
     build_parser.add_argument('--output-dir', help='Output directory')
@@ -34,12 +43,60 @@ def main():
     build_parser.add_argument('--no-minify', action='store_true', help='Disable HTML minification')
     build_parser.add_argument('--no-sitemap', action='store_true', help='Disable sitemap generation')
     build_parser.add_argument('--no-robots', action='store_true', help='Disable robots.txt generation')
+    build_parser.add_argument('--incremental', action='store_true',
+                              help='Only re-render pages whose source or inputs changed')
+    build_parser.add_argument('--watch', '-w', action='store_true',
+                              help='Keep running and rebuild affected pages when sources change')
+    build_parser.add_argument('--jobs', '-j', type=int, default=1,
+                              help='Number of parallel worker processes (default: 1, 0 = all CPUs)')
+    build_parser.add_argument('--check-links', action='store_true',
+                              help='Report links to missing pages and files after the build')
+    build_parser.add_argument('--profile', nargs='?', const='simple-ssg-profile', metavar='PREFIX',
+                              help='Write a cProfile dump (PREFIX.prof) and a Chrome trace '
+                                   '(PREFIX.trace.json) of the build (default PREFIX: simple-ssg-profile)')
+    build_parser.add_argument('--slowest', type=int, metavar='N',
+                              help='Number of slowest pages listed in the summary (default: 5)')
     
     # Serve command
-    serve_parser = subparsers.add_parser('serve', help='Start a local development server')
+    serve_parser = subparsers.add_parser('serve', help='Start a local development server',
+                                         parents=[log_options])
     serve_parser.add_argument('directory', nargs='?', default='build', help='Directory to serve (default: build)')
     serve_parser.add_argument('--port', '-p', type=int, default=8000, help='Port to serve on (default: 8000)')
     serve_parser.add_argument('--no-browser', action='store_true', help='Do not open a browser automatically')
+    serve_mode = serve_parser.add_mutually_exclusive_group()
+    serve_mode.add_argument('--live', action='store_true',
+                            help='Build the site, rebuild it on changes and reload the browser')
+    serve_mode.add_argument('--render-on-demand', action='store_true',
+                            help='Render pages from their sources when requested, without building')
+    serve_parser.add_argument('--config', '-c',
+                              help='Path to config file (YAML or JSON), used with --live and --render-on-demand')
+    
+    # Check command
+    check_parser = subparsers.add_parser('check', help='Check the built site for broken internal links',
+                                         parents=[log_options])
+    check_parser.add_argument('directory', nargs='?', help='Directory to check (default: the output directory)')
+    check_parser.add_argument('--config', '-c', help='Path to config file (YAML or JSON)')
+    
+    # Bench command
+    bench_parser = subparsers.add_parser('bench', help='Benchmark the build on a generated site')
+    bench_parser.add_argument('--seed', type=int, default=0, help='Seed of the generated site (default: 0)')
+    bench_parser.add_argument('--scale', type=float, default=1.0,
+                              help='Size multiplier of the generated site (default: 1.0)')
+    bench_parser.add_argument('--repeat', type=int, default=3,
+                              help='Runs per stage, the fastest is reported (default: 3)')
+    bench_parser.add_argument('--jobs', '-j', type=int, default=1,
+                              help='Number of worker processes for full builds (default: 1, 0 = all CPUs)')
+    bench_parser.add_argument('--stage', action='append', dest='stages',
+                              help='Stage to run (repeatable; default: all)')
+    bench_parser.add_argument('--keep', metavar='DIR', help='Generate the site in DIR and keep it')
+    bench_parser.add_argument('--output', '-o', help='Write the JSON report to a file instead of stdout')
+    
+    # Rollback command
+    rollback_parser = subparsers.add_parser('rollback', help='Switch back to an earlier published build',
+                                            parents=[log_options])
+    rollback_parser.add_argument('--config', '-c', help='Path to config file (YAML or JSON)')
+    rollback_parser.add_argument('--output-dir', help='Output directory')
+    rollback_parser.add_argument('--steps', type=int, default=1, help='Number of builds to go back (default: 1)')
     
     # Init command
     init_parser = subparsers.add_parser('init', help='Initialize a new Simple-SSG project')
@@ -50,40 +107,87 @@ def main():
     # Parse arguments
     args = parser.parse_args()
     
+    if hasattr(args, 'log_json'):
+        setup_logging(args)
+    
     # Execute the appropriate command
     if args.command == 'build':
         run_build(args)
     elif args.command == 'serve':
         run_serve(args)
+    elif args.command == 'check':
+        run_check(args)
+    elif args.command == 'bench':
+        run_bench(args)
+    elif args.command == 'rollback':
+        run_rollback(args)
     elif args.command == 'init':
         run_init(args)
     else:
         parser.print_help()
         sys.exit(1)
 
+def setup_logging(args):
+    """Show the log on stdout at the verbosity chosen with --quiet or --verbose."""
+    from simple_ssg.utils.log import NORMAL, QUIET, VERBOSE, configure_logging
+    
+    verbosity = QUIET if args.quiet else VERBOSE if args.verbose else NORMAL
+    try:
+        configure_logging(verbosity, args.log_json)
+    except OSError as e:
+        print(f"Error opening log file: {str(e)}")
+        sys.exit(1)
+
 def run_build(args):
     """Run the build command."""
+    if args.jobs < 0:
+        print("Error: --jobs must be 0 or a positive number.")
+        sys.exit(1)
+    
+    from simple_ssg.builder import build_site
+    
+    if args.watch:
+        from simple_ssg.watcher import watch_site
+        watch_site(lambda: load_build_config(args), config_file=args.config, jobs=args.jobs)
+        return
+    
+    # Build the site
+    stats = build_site(config_dict=load_build_config(args), jobs=args.jobs, profile=args.profile)
+    
+    # Check for errors
+    if stats.get('errors', 0) > 0 or stats.get('broken_links', 0) > 0:
+        sys.exit(1)
+
+def load_config_file(config_file):
+    """Load a configuration dictionary from a YAML or JSON file (empty if no file is given)."""
     config_dict = {}
     
-    # Load config from file if provided
-    if args.config:
-        if not os.path.exists(args.config):
-            print(f"Error: Config file {args.config} not found.")
+    if config_file:
+        if not os.path.exists(config_file):
+            print(f"Error: Config file {config_file} not found.")
             sys.exit(1)
         
         try:
-            with open(args.config, 'r', encoding='utf-8') as f:
-                if args.config.endswith(('.yaml', '.yml')):
-                    config_dict = yaml.safe_load(f)
-                elif args.config.endswith('.json'):
+            with open(config_file, 'r', encoding='utf-8') as f:
+                if config_file.endswith(('.yaml', '.yml')):
+                    import yaml
+                    config_dict = yaml.safe_load(f) or {}
+                elif config_file.endswith('.json'):
+                    import json
                     config_dict = json.load(f)
                 else:
-                    print(f"Error: Unsupported config file format: {args.config}")
+                    print(f"Error: Unsupported config file format: {config_file}")
                     sys.exit(1)
         except Exception as e:
             print(f"Error loading config file: {str(e)}")
             sys.exit(1)
     
+    return config_dict
+
+def load_build_config(args):
+    """Load the build configuration from the config file and command-line arguments."""
+    config_dict = load_config_file(args.config)
+    
     # Override with command-line arguments
     if args.content_dir:
         config_dict['content_dir'] = args.content_dir
@@ -106,15 +210,34 @@ def run_build(args):
     if args.no_robots:
         config_dict['generate_robots'] = False
     
-    # Build the site
-    stats = build_site(config_dict=config_dict)
+    if args.incremental:
+        config_dict['incremental'] = True
     
-    # Check for errors
-    if stats.get('errors', 0) > 0:
-        sys.exit(1)
+    if args.check_links:
+        config_dict['check_links'] = True
+    
+    if args.slowest is not None:
+        config_dict['slowest_pages'] = args.slowest
+    
+    return config_dict
 
 def run_serve(args):
     """Run the serve command."""
+    if args.live:
+        from simple_ssg.watcher import serve_live
+        serve_live(lambda: load_config_file(args.config), config_file=args.config,
+                   port=args.port, open_browser=not args.no_browser)
+        return
+    
+    if args.render_on_demand:
+        from simple_ssg.config import SiteConfig
+        from simple_ssg.enhancers.server import serve_on_demand
+        config = SiteConfig(config_dict=load_config_file(args.config))
+        serve_on_demand(config, port=args.port, open_browser=not args.no_browser)
+        return
+    
+    from simple_ssg.enhancers.server import serve
+    
     try:
         serve(
             directory=args.directory,
@@ -124,6 +247,56 @@ def run_serve(args):
     except KeyboardInterrupt:
         print("\nServer stopped.")
 
+def run_check(args):
+    """Run the check command."""
+    from simple_ssg.utils.links import check_links, find_html_pages, print_link_report
+    
+    directory = args.directory or load_config_file(args.config).get('output_dir', 'build')
+    if not os.path.isdir(directory):
+        print(f"Error: Directory {directory} does not exist.")
+        sys.exit(1)
+    
+    pages = find_html_pages(directory)
+    broken = check_links(directory, dict.fromkeys(pages))
+    print_link_report(broken, len(pages))
+    if broken:
+        sys.exit(1)
+
+def run_bench(args):
+    """Run the bench command."""
+    from simple_ssg.bench import STAGES, format_report, run_bench as bench
+    
+    stages = args.stages or STAGES
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        print(f"Error: Unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+        sys.exit(1)
+    if args.scale <= 0 or args.repeat < 1 or args.jobs < 0:
+        print("Error: --scale and --repeat must be positive and --jobs 0 or more.")
+        sys.exit(1)
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+    
+    report = format_report(bench(seed=args.seed, scale=args.scale, repeat=args.repeat, jobs=args.jobs,
+                                 stages=stages, directory=args.keep))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report + '\n')
+        print(f"Benchmark report written to {args.output}")
+    else:
+        print(report)
+
+def run_rollback(args):
+    """Run the rollback command."""
+    from simple_ssg.utils.publish import rollback
+    
+    output_dir = args.output_dir
+    if not output_dir:
+        output_dir = load_config_file(args.config).get('output_dir', 'build')
+    
+    if args.steps < 1 or rollback(output_dir, args.steps) is None:
+        sys.exit(1)
+
 def run_init(args):
     """Run the init command."""
     try:
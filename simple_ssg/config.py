@@ -2,10 +2,12 @@
 Configuration handling for Simple-SSG.
 """
 
+import logging
 import os
 import sys
 import json
-import yaml
+
+logger = logging.getLogger(__name__)
 
 class SiteConfig:
     """
@@ -50,12 +52,24 @@ class SiteConfig:
         
         # Build options
         self.clean_output = True
+        self.incremental = False
+        self.atomic_publish = False  # build into a staging directory, then swap it in
+        self.keep_builds = 3  # previous builds kept for rollback with atomic_publish
+        self.static_checksum = False  # compare static file contents when only the mtime differs
+        self.static_link = False  # hard-link static files into the output instead of copying
+        self.fingerprint_assets = False  # publish static files as name.<hash>.ext
+        self.fingerprint_extensions = ['.css', '.js']
+        self.precompress = False  # write .gz (and .br/.zst if available) next to text outputs
+        self.slowest_pages = 5  # pages listed by render time in the build summary
+        self.pipeline_queue_size = 64  # pages buffered between the read, render and write stages
         self.minify = True
         self.wrap_sections = True
         
         # Section wrapping
         self.h1_section_class = 'hero'
         self.h2_section_class = 'section'
+        self.section_classes = None  # e.g. {'h1': 'hero', 'h2': 'section', 'h3': 'subsection'}
+        self.nest_sections = False
         
         # Template settings
         self.content_placeholder = '<div id="content-container">'
@@ -70,6 +84,11 @@ class SiteConfig:
         # SEO settings
         self.base_url = 'https://example.com'
         self.generate_sitemap = True
+        self.sitemap_max_urls = 50000  # URLs per sitemap file before it is split
+        self.sitemap_gzip = False  # write the sitemap as gzipped sitemap-N.xml.gz files
+        self.feeds = []  # e.g. [{'directory': 'blog', 'format': 'atom', 'limit': 20}]
+        self.search_index = False  # write a client-side search index to search/
+        self.check_links = False  # report links to missing files after the build
         self.generate_robots = True
         self.generate_htaccess = True
         
@@ -80,22 +99,23 @@ class SiteConfig:
         """Load configuration from a file."""
         try:
             if not os.path.exists(config_file):
-                print(f"Error: Configuration file {config_file} not found.")
+                logger.error(f"Error: Configuration file {config_file} not found.")
                 sys.exit(1)
             
             with open(config_file, 'r', encoding='utf-8') as f:
                 if config_file.endswith(('.yaml', '.yml')):
+                    import yaml
                     config = yaml.safe_load(f)
                 elif config_file.endswith('.json'):
                     config = json.load(f)
                 else:
-                    print(f"Error: Unsupported configuration file format: {config_file}")
+                    logger.error(f"Error: Unsupported configuration file format: {config_file}")
                     sys.exit(1)
             
             self.update_from_dict(config)
             
         except Exception as e:
-            print(f"Error loading configuration file: {str(e)}")
+            logger.error(f"Error loading configuration file: {str(e)}")
             sys.exit(1)
     
     def update_from_dict(self, config_dict):
@@ -104,7 +124,7 @@ class SiteConfig:
             if hasattr(self, key):
                 setattr(self, key, value)
             else:
-                print(f"Warning: Unknown configuration option: {key}")
+                logger.warning(f"Warning: Unknown configuration option: {key}")
     
     def validate(self):
         """Validate the configuration."""
@@ -114,21 +134,21 @@ class SiteConfig:
             
         # Check required directories
         if not os.path.exists(self.content_dir):
-            print(f"Error: Content directory {self.content_dir} not found.")
+            logger.error(f"Error: Content directory {self.content_dir} not found.")
             sys.exit(1)
 
         if not os.path.exists(self.template_path):
-            print(f"Error: Template file {self.template_path} not found.")
+            logger.error(f"Error: Template file {self.template_path} not found.")
             sys.exit(1)
 
         # Check static directories
         for static_dir in self.static_dirs:
             if not os.path.exists(static_dir):
-                print(f"Warning: Static directory {static_dir} does not exist. It will be skipped.")
+                logger.warning(f"Warning: Static directory {static_dir} does not exist. It will be skipped.")
 
         # Validate base URL for SEO features
         if self.generate_sitemap or self.generate_robots:
             if not self.base_url or self.base_url == 'https://example.com':
-                print("Warning: Using default base URL (https://example.com) for sitemap and robots.txt.")
+                logger.warning("Warning: Using default base URL (https://example.com) for sitemap and robots.txt.")
         
         return True
@@ -0,0 +1,124 @@
+"""
+Class annotation support for the Markdown converter.
+
+Adds CSS classes written as {.classname} (or {.class1.class2}) while the
+Markdown element tree is built:
+
+- Directly after an inline element, the classes go on that element:
+  [Read more](post.html){.button}
+- At the end of a heading, definition term or table cell, they go on the
+  block:
+  ## Section Title {.important}
+- On a line of their own at the end of a paragraph, list item or
+  definition, they go on the block:
+  A paragraph
+  {.note}
+
+Elsewhere (e.g. "A paragraph {.note}") the text is kept as written.
+Annotations after inline raw HTML (<span>x</span>{.note}) are applied to
+the finished HTML by process_class_annotations.
+"""
+
+import re
+from markdown import util
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
+
+# {.class} or {.class1.class2} at the start of an element's tail
+_LEADING_ANNOTATION = re.compile(r'^\{\.([\w-]+(?:\.[\w-]+)*)\}')
+
+# {.class} or {.class1.class2} at the end of a block's text
+_TRAILING_ANNOTATION = re.compile(r'\s*\{\.([\w-]+(?:\.[\w-]+)*)\}\s*$')
+
+# {.class} or {.class1.class2} on the last line of a block's text
+_LAST_LINE_ANNOTATION = re.compile(r'\s*\n[ ]*\{\.([\w-]+(?:\.[\w-]+)*)\}\s*$')
+
+# Block elements that take an annotation at the end of their text
+LINE_BLOCK_TAGS = frozenset(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'dt', 'td', 'th'])
+
+# Block elements that take an annotation on their last line
+BLOCK_TAGS = frozenset(['p', 'li', 'dd'])
+
+# A placeholder of stashed raw HTML followed by an annotation
+_RAW_HTML_ANNOTATION = util.ETX + '{.'
+
+# Elements whose text is never scanned for annotations
+SKIP_TAGS = frozenset(['pre', 'code', 'script', 'style'])
+
+def add_classes(element, classes):
+    """
+    Add classes to an element, keeping any it already has.
+
+    Parameters:
+    - element: ElementTree element
+    - classes: Annotation class string, e.g. 'class1.class2'
+    """
+    new_classes = ' '.join(classes.split('.'))
+    existing = element.get('class')
+    element.set('class', f'{existing} {new_classes}' if existing else new_classes)
+
+class ClassAnnotationTreeprocessor(Treeprocessor):
+    """Move {.class} annotations from the text onto the elements they follow."""
+
+    def run(self, root):
+        # Set when an annotation follows inline raw HTML (see ClassAnnotationExtension)
+        self.raw_html_annotations = False
+        for element in root.iter():
+            if element.tag in SKIP_TAGS:
+                continue
+
+            # Inline annotations: <a>...</a>{.button}
+            for child in element:
+                if child.tail and child.tail.startswith('{.'):
+                    match = _LEADING_ANNOTATION.match(child.tail)
+                    if match:
+                        add_classes(child, match.group(1))
+                        child.tail = child.tail[match.end():]
+                if child.tail and _RAW_HTML_ANNOTATION in child.tail:
+                    self.raw_html_annotations = True
+            if element.text and _RAW_HTML_ANNOTATION in element.text:
+                self.raw_html_annotations = True
+
+            # Block annotations: the annotation ends the block's text
+            if element.tag in LINE_BLOCK_TAGS:
+                self.process_block(element, _TRAILING_ANNOTATION)
+            elif element.tag in BLOCK_TAGS:
+                self.process_block(element, _LAST_LINE_ANNOTATION)
+
+    def process_block(self, element, pattern):
+        """Apply an annotation at the end of a block element's text."""
+        children = list(element)
+        if children:
+            last = children[-1]
+            text = last.tail
+        else:
+            last = None
+            text = element.text
+
+        if not text or '{.' not in text:
+            return
+
+        match = pattern.search(text)
+        if not match or text[:match.start()].endswith(util.ETX):
+            # Annotations after raw HTML belong to that HTML, not the block
+            return
+
+        add_classes(element, match.group(1))
+        if last is None:
+            element.text = text[:match.start()]
+        else:
+            last.tail = text[:match.start()]
+
+class ClassAnnotationExtension(Extension):
+    """
+    Markdown extension for {.class} annotations.
+
+    Raw HTML is only put back into the page after the element tree is
+    serialised, so the converter applies annotations that follow it to the
+    finished HTML when raw_html_annotations of the tree processor is set.
+    """
+
+    def extendMarkdown(self, md):
+        # Run after inline processing (20) and before attr_list (8), so
+        # {.a.b} becomes two classes rather than attr_list's single "a.b"
+        md.treeprocessors.register(ClassAnnotationTreeprocessor(md), 'class_annotations', 15)
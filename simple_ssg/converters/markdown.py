@@ -2,8 +2,94 @@
 Markdown converter for Simple-SSG.
 """
 
+import logging
 import re
-import markdown
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXTENSIONS = ['extra', 'tables', 'smarty']
+
+# Converters are reused across pages and threads. A Markdown instance is not
+# thread-safe, so each is lent to one thread at a time; idle ones wait here,
+# keyed by their extensions. Threads that come and go, like the dev server's
+# one thread per request, reuse them instead of building their own.
+_idle_converters = {}
+_idle_lock = threading.Lock()
+
+
+class MarkdownConverter:
+    """
+    Reusable Markdown converter for a fixed set of extensions.
+
+    Creating a markdown.Markdown instance loads and registers every
+    extension, so the instance is built once and reset between pages.
+    """
+
+    def __init__(self, extensions=None):
+        """
+        Create the converter.
+
+        Parameters:
+        - extensions: List of Markdown extensions to enable
+        """
+        # Markdown and its extensions are only imported once a page is converted
+        import markdown
+        from simple_ssg.converters.annotations import ClassAnnotationExtension
+
+        self.extensions = list(DEFAULT_EXTENSIONS if extensions is None else extensions)
+        self.md = markdown.Markdown(extensions=self.extensions + [ClassAnnotationExtension()])
+        self.annotations = self.md.treeprocessors['class_annotations']
+
+    def convert(self, md_content):
+        """
+        Convert Markdown content to HTML.
+
+        Parameters:
+        - md_content: The Markdown content to convert
+
+        Returns:
+        - HTML content
+        """
+        self.md.reset()
+        html = self.md.convert(md_content)
+        if self.annotations.raw_html_annotations:
+            html = process_class_annotations(html)
+        return html
+
+
+@contextmanager
+def borrow_converter(extensions=None):
+    """
+    Lend a converter for a set of extensions to the calling thread (a with
+    block), creating one when every converter for them is in use.
+
+    Parameters:
+    - extensions: List of Markdown extensions to enable
+
+    Returns:
+    - Context manager that yields a MarkdownConverter instance
+    """
+    extensions = DEFAULT_EXTENSIONS if extensions is None else extensions
+    try:
+        key = tuple(extensions)
+        hash(key)
+    except TypeError:
+        # Unhashable extension configuration, fall back to a fresh converter
+        yield MarkdownConverter(extensions)
+        return
+
+    with _idle_lock:
+        idle = _idle_converters.setdefault(key, [])
+        converter = idle.pop() if idle else None
+    if converter is None:
+        converter = MarkdownConverter(extensions)
+    try:
+        yield converter
+    finally:
+        with _idle_lock:
+            idle.append(converter)
 
 
 def convert_markdown_to_html(md_content, config=None):
@@ -22,31 +108,29 @@ def convert_markdown_to_html(md_content, config=None):
         
     try:
         # Get markdown extensions from config or use defaults
-        extensions = config.markdown_extensions if config else ['extra', 'tables', 'smarty']
-        
-        # Create Markdown processor with extensions
-        md = markdown.Markdown(extensions=extensions)
-        
-        # Convert to HTML
-        html = md.convert(md_content)
+        extensions = config.markdown_extensions if config else DEFAULT_EXTENSIONS
         
-        # Process class annotations {.classname}
-        html = process_class_annotations(html)
-        
-        return html
+        # Convert to HTML with the shared processor for these extensions;
+        # class annotations {.classname} are applied while the tree is built
+        with borrow_converter(extensions) as converter:
+            return converter.convert(md_content)
     except AttributeError as e:
         error_msg = f"Error in configuration: {str(e)}"
-        print(error_msg)
+        logger.error(error_msg)
         return f"<p>{error_msg}</p>"
     except Exception as e:
         error_msg = f"Error converting markdown to HTML: {str(e)}"
-        print(error_msg)
+        logger.error(error_msg)
         return f"<p>{error_msg}</p>"
 
 
 def process_class_annotations(html):
     """
-    Process class annotations in the form of {.classname}.
+    Process class annotations in the form of {.classname} in rendered HTML.
+    
+    The Markdown converter handles annotations while parsing (see
+    simple_ssg.converters.annotations); this is used for annotations after
+    inline raw HTML and for HTML that did not come from Markdown.
     
     Parameters:
     - html: HTML content with class annotations
@@ -91,7 +175,7 @@ def process_class_annotations(html):
                 suffix = opening_tag_match.group(4) or ''
                 
                 # Create a new opening tag with merged classes
-                new_opening = f'<{tag_name}{prefix}class="{existing_classes} {".join(class_list)}"{suffix}>'
+                new_opening = f'<{tag_name}{prefix}class="{existing_classes} {" ".join(class_list)}"{suffix}>'
                 modified_tag = full_tag.replace(opening_tag_match.group(0), new_opening)
             else:
                 # Tag doesn't have a class attribute, just add it
@@ -106,7 +190,7 @@ def process_class_annotations(html):
         
         return html
     except Exception as e:
-        print(f"Error processing class annotations: {str(e)}")
+        logger.error(f"Error processing class annotations: {str(e)}")
         return html
 
 
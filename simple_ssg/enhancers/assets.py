@@ -0,0 +1,212 @@
+"""
+Asset fingerprinting for Simple-SSG.
+
+Static files with a fingerprinted extension are published as
+name.<hash>.ext, where the hash is taken from the file's content. Because
+the name changes whenever the content does, these files can be cached by
+browsers forever. References to the original names in the template and in
+rendered pages are rewritten through a single lookup table, and the table
+is written to asset-manifest.json for other tools.
+"""
+
+import json
+import os
+import posixpath
+import re
+from simple_ssg.utils.fs import write_if_changed
+from simple_ssg.utils.manifest import hash_file
+
+ASSET_MANIFEST_NAME = 'asset-manifest.json'
+
+# Number of hex digits of the content hash used in file names
+HASH_LENGTH = 8
+
+# Lookup table of the current build (see set_asset_table)
+_asset_table = None
+
+# URL values that can refer to static files: href, src, srcset and poster
+# attributes and CSS url(...). <pre> and <code> elements are matched as a
+# whole so that the paths shown in them stay as written.
+_reference_pattern = re.compile(
+    r'(<(pre|code)\b.*?</\2\s*>)'
+    r'|((?<![\w-])(?:href|src|srcset|poster)\s*=\s*)("[^"]*"|\'[^\']*\'|[^\s"\'>]+)'
+    r'|(url\(\s*)("[^"]*"|\'[^\']*\'|[^\s)"\']+)',
+    re.IGNORECASE | re.DOTALL)
+
+# Start of an absolute URL (https:, data:, ...)
+_scheme_pattern = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*:')
+
+def fingerprint_name(name, digest):
+    """Insert a content hash into a file name: styles.css -> styles.<hash>.css."""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest[:HASH_LENGTH]}{ext}"
+
+def _existing_fingerprints(directory):
+    """
+    Index the fingerprinted files already in an output directory.
+
+    Returns:
+    - Dictionary mapping (stem, ext) to a list of (hash, stat) pairs
+    """
+    existing = {}
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return existing
+
+    for entry in entries:
+        stem, ext = os.path.splitext(entry.name)
+        stem, dot, digest = stem.rpartition('.')
+        if dot and len(digest) == HASH_LENGTH and all(c in '0123456789abcdef' for c in digest):
+            try:
+                existing.setdefault((stem, ext), []).append((digest, entry.stat(follow_symlinks=False)))
+            except OSError:
+                pass
+    return existing
+
+def plan_fingerprints(config):
+    """
+    Work out the fingerprinted name of every static file that gets one.
+
+    Files are only hashed when the output does not already hold a
+    fingerprinted copy with the same size and modification time.
+
+    Parameters:
+    - config: Configuration object
+
+    Returns:
+    - Tuple of (lookup table mapping original to fingerprinted site paths,
+      dictionary mapping source file paths to fingerprinted file names)
+    """
+    extensions = tuple(ext.lower() for ext in config.fingerprint_extensions)
+    table = {}
+    names = {}
+
+    for static_dir in config.static_dirs:
+        if not os.path.isdir(static_dir):
+            continue
+        dir_name = os.path.basename(os.path.normpath(static_dir))
+
+        for root, _, files in os.walk(static_dir):
+            rel_root = os.path.relpath(root, static_dir)
+            existing = _existing_fingerprints(os.path.join(config.output_dir, dir_name, rel_root))
+
+            for name in files:
+                if not name.lower().endswith(extensions):
+                    continue
+                source = os.path.join(root, name)
+                st = os.stat(source)
+
+                digest = None
+                for candidate, candidate_stat in existing.get(os.path.splitext(name), ()):
+                    if (candidate_stat.st_size == st.st_size
+                            and candidate_stat.st_mtime_ns == st.st_mtime_ns):
+                        digest = candidate
+                        break
+                if digest is None:
+                    digest = hash_file(source)
+
+                new_name = fingerprint_name(name, digest)
+                names[source] = new_name
+
+                site_dir = dir_name if rel_root == '.' else f"{dir_name}/{rel_root.replace(os.sep, '/')}"
+                table[f"{site_dir}/{name}"] = f"{site_dir}/{new_name}"
+
+    return table, names
+
+def write_asset_manifest(table, output_dir):
+    """
+    Write the lookup table to asset-manifest.json.
+
+    Parameters:
+    - table: Dictionary mapping original to fingerprinted site paths
+    - output_dir: Output directory
+    """
+    data = json.dumps(table, indent=2, sort_keys=True) + '\n'
+    write_if_changed(os.path.join(output_dir, ASSET_MANIFEST_NAME), data.encode('utf-8'))
+
+def set_asset_table(table):
+    """
+    Set the lookup table used by rewrite_asset_references.
+
+    Parameters:
+    - table: Dictionary mapping original to fingerprinted site paths, or None
+    """
+    global _asset_table
+    _asset_table = table or None
+
+def get_asset_table():
+    """Get the lookup table of the current build (or None)."""
+    return _asset_table
+
+def rewrite_asset_references(html):
+    """
+    Replace references to static files with their fingerprinted names.
+
+    Only URL values are rewritten: href, src, srcset and poster attributes
+    and CSS url(...). Paths like css/styles.css, /css/styles.css and
+    ../css/styles.css are looked up in the table; URLs on other hosts
+    (https://cdn.example.com/css/styles.css), other text and the contents
+    of <pre> and <code> are left alone.
+
+    Parameters:
+    - html: HTML content
+
+    Returns:
+    - HTML content with rewritten references
+    """
+    if _asset_table is None:
+        return html
+    return _reference_pattern.sub(_rewrite_match, html)
+
+def _rewrite_match(match):
+    if match.group(1):
+        return match.group(1)
+    if match.group(3):
+        prefix, value = match.group(3), match.group(4)
+        srcset = prefix.lower().startswith('srcset')
+    else:
+        prefix, value = match.group(5), match.group(6)
+        srcset = False
+
+    quote = value[0] if value[:1] in ('"', "'") else ''
+    url = value[1:-1] if quote else value
+    if srcset:
+        # Comma-separated candidates of a URL and an optional descriptor
+        url = ','.join(re.sub(r'^(\s*)(\S+)', lambda m: m.group(1) + rewrite_url(m.group(2)), candidate)
+                       for candidate in url.split(','))
+    else:
+        url = rewrite_url(url)
+    return f"{prefix}{quote}{url}{quote}"
+
+def rewrite_url(url):
+    """
+    Get the fingerprinted form of a URL that refers to a static file.
+
+    Parameters:
+    - url: URL as written in a page
+
+    Returns:
+    - The URL with the file name fingerprinted, or the URL unchanged when it
+      is not a relative or root-relative URL of a file in the table
+    """
+    if url.startswith('//') or _scheme_pattern.match(url):
+        return url
+    end = len(url)
+    for separator in ('?', '#'):
+        index = url.find(separator)
+        if index != -1:
+            end = min(end, index)
+    path, rest = url[:end], url[end:]
+    if not path:
+        return url
+
+    # ./css/styles.css, /css/styles.css and ../css/styles.css all name css/styles.css
+    path = posixpath.normpath(path)
+    key = path.lstrip('/')
+    while key.startswith('../'):
+        key = key[3:]
+    fingerprinted = _asset_table.get(key)
+    if fingerprinted is None:
+        return url
+    return path[:len(path) - len(key)] + fingerprinted + rest
@@ -0,0 +1,165 @@
+"""
+Precompression of text outputs for Simple-SSG.
+
+Writes a compressed sibling next to every text file in the output
+directory (page.html -> page.html.gz), so the web server can send it as is
+instead of compressing the file again on every request. gzip is always
+available; Brotli (.br) and Zstandard (.zst) files are written when the
+brotli and zstandard packages are installed.
+"""
+
+import gzip
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from simple_ssg.utils.fs import write_file
+from simple_ssg.utils.manifest import hash_bytes
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Output files that are worth compressing
+TEXT_EXTENSIONS = ('.html', '.css', '.js', '.xml', '.txt', '.svg', '.json')
+
+# Suffixes of all compressed variants this module may write
+COMPRESSED_SUFFIXES = ('.gz', '.br', '.zst')
+
+# Source hashes of the compressed files, kept in the output directory
+COMPRESSION_STATE_NAME = '.simple-ssg-compressed.json'
+
+def _compress_gzip(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def _compress_brotli(data):
+    return brotli.compress(data, quality=11)
+
+def _compress_zstd(data):
+    return zstandard.ZstdCompressor(level=19).compress(data)
+
+def get_encodings():
+    """
+    Get the available encodings.
+
+    Returns:
+    - List of (file suffix, Content-Encoding name, compress function) tuples
+    """
+    encodings = [('.gz', 'gzip', _compress_gzip)]
+    if brotli is not None:
+        encodings.append(('.br', 'br', _compress_brotli))
+    if zstandard is not None:
+        encodings.append(('.zst', 'zstd', _compress_zstd))
+    return encodings
+
+def _load_state(output_dir):
+    try:
+        with open(os.path.join(output_dir, COMPRESSION_STATE_NAME), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def find_text_files(output_dir):
+    """List the files in the output directory that should be compressed."""
+    text_files = []
+    for root, _, files in os.walk(output_dir):
+        for name in files:
+            # Hidden files (build manifests and the like) are not served
+            if name.lower().endswith(TEXT_EXTENSIONS) and not name.startswith('.'):
+                text_files.append(os.path.join(root, name))
+    return text_files
+
+def compress_file(path, entry, encodings):
+    """
+    Write the compressed variants of a file, unless they are up to date.
+
+    Parameters:
+    - path: Path of the file
+    - entry: State entry from the previous run (or None)
+    - encodings: Result of get_encodings
+
+    Returns:
+    - Tuple of (new state entry, whether the file was compressed)
+    """
+    st = os.stat(path)
+    suffixes = [suffix for suffix, _, _ in encodings]
+    have_variants = all(os.path.exists(path + suffix) for suffix in suffixes)
+
+    # Unchanged size and mtime: the stored hash is still the file's hash
+    if (entry and have_variants and entry.get('size') == st.st_size
+            and entry.get('mtime') == st.st_mtime_ns and entry.get('encodings') == suffixes):
+        return entry, False
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    source_hash = hash_bytes(data)
+    new_entry = {'hash': source_hash, 'size': st.st_size, 'mtime': st.st_mtime_ns,
+                 'encodings': suffixes}
+
+    if (entry and have_variants and entry.get('hash') == source_hash
+            and entry.get('encodings') == suffixes):
+        return new_entry, False
+
+    for suffix, _, compress in encodings:
+        write_file(path + suffix, compress(data))
+    return new_entry, True
+
+def precompress_site(config, workers=None):
+    """
+    Write compressed variants of every text file in the output directory.
+
+    Files whose content did not change since the last run are skipped, and
+    variants whose original file is gone are removed.
+
+    Parameters:
+    - config: Configuration object
+    - workers: Number of compression threads (default: number of CPUs)
+
+    Returns:
+    - Dictionary with compressed, skipped and removed file counts
+    """
+    output_dir = config.output_dir
+    encodings = get_encodings()
+    old_state = _load_state(output_dir)
+    text_files = find_text_files(output_dir)
+    keys = [os.path.relpath(path, output_dir).replace(os.sep, '/') for path in text_files]
+
+    stats = {'compressed': 0, 'skipped': 0, 'removed': 0}
+    state = {}
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        results = executor.map(compress_file, text_files,
+                               [old_state.get(key) for key in keys],
+                               [encodings] * len(text_files))
+        for key, (entry, compressed) in zip(keys, results):
+            state[key] = entry
+            stats['compressed' if compressed else 'skipped'] += 1
+
+    # Remove variants of files that no longer exist (or of encodings no longer
+    # available), but not compressed files written by something else
+    current = {path + suffix for path in text_files for suffix, _, _ in encodings}
+    for root, _, files in os.walk(output_dir):
+        for name in files:
+            base, suffix = os.path.splitext(name)
+            path = os.path.join(root, name)
+            key = os.path.relpath(os.path.join(root, base), output_dir).replace(os.sep, '/')
+            if (suffix in COMPRESSED_SUFFIXES and base.lower().endswith(TEXT_EXTENSIONS)
+                    and path not in current and (key in old_state or key in state)):
+                os.remove(path)
+                stats['removed'] += 1
+
+    data = json.dumps(state, sort_keys=True).encode('utf-8')
+    write_file(os.path.join(output_dir, COMPRESSION_STATE_NAME), data)
+
+    logger.info(f"Precompressed {stats['compressed']} file(s) "
+                f"({', '.join(name for _, name, _ in encodings)}), {stats['skipped']} unchanged")
+    return stats
@@ -0,0 +1,199 @@
+"""
+Atom and RSS feed generation for Simple-SSG.
+
+Each configured feed covers the pages in one directory of the site. While
+pages are rendered, their date, title and summary are offered to every
+matching feed, which keeps only its newest entries in a bounded heap, so
+memory does not grow with the number of pages. The feeds are streamed to
+disk once the build has seen every page.
+"""
+
+import heapq
+import html
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape, quoteattr
+from simple_ssg.utils.fs import replace_if_changed
+
+logger = logging.getLogger(__name__)
+
+FEED_FORMATS = ('atom', 'rss')
+
+# Number of entries in a feed unless the feed sets a limit
+DEFAULT_FEED_LIMIT = 20
+
+# Dated file names: 2024-05-01-my-post.html
+DATE_PREFIX_PATTERN = re.compile(r'^(\d{4})-(\d{2})-(\d{2})-')
+
+class Feed:
+    """
+    The newest entries of one feed.
+    """
+
+    def __init__(self, directory='', format='atom', limit=DEFAULT_FEED_LIMIT,
+                 title=None, output=None):
+        """
+        Parameters:
+        - directory: Site directory whose pages the feed lists ('' for the whole site)
+        - format: 'atom' or 'rss'
+        - limit: Maximum number of entries
+        - title: Feed title (default: the directory name)
+        - output: Path of the feed relative to the output directory
+          (default: <directory>/feed.xml for Atom, <directory>/rss.xml for RSS)
+        """
+        if format not in FEED_FORMATS:
+            raise ValueError(f"Unknown feed format: {format}")
+        self.directory = directory.strip('/')
+        self.prefix = self.directory + '/' if self.directory else ''
+        self.format = format
+        self.limit = limit
+        self.title = title or self.directory
+        default_name = 'feed.xml' if format == 'atom' else 'rss.xml'
+        self.output = output or (self.prefix + default_name)
+        self.entries = []  # min-heap of (date, path, title, summary)
+
+    def matches(self, path):
+        """Check whether a page (path relative to the output directory) belongs in the feed."""
+        name = path.rsplit('/', 1)[-1]
+        return path.startswith(self.prefix) and name not in ('index.html', '404.html')
+
+    def add(self, date, path, title, summary):
+        """Offer an entry, keeping only the newest `limit` entries."""
+        item = (date, path, title or '', summary or '')
+        if len(self.entries) < self.limit:
+            heapq.heappush(self.entries, item)
+        elif item > self.entries[0]:
+            heapq.heapreplace(self.entries, item)
+
+    def newest(self):
+        """Get the entries, newest first."""
+        return sorted(self.entries, reverse=True)
+
+def create_feeds(config):
+    """
+    Create the feeds configured for a site.
+
+    Parameters:
+    - config: Configuration object
+
+    Returns:
+    - List of Feed objects (empty when no feeds are configured)
+    """
+    feeds = []
+    for spec in config.feeds or ():
+        if isinstance(spec, str):
+            spec = {'directory': spec}
+        feeds.append(Feed(spec.get('directory', ''), spec.get('format', 'atom'),
+                          spec.get('limit', DEFAULT_FEED_LIMIT), spec.get('title'),
+                          spec.get('output')))
+    return feeds
+
+def get_page_date(path, mtime):
+    """
+    Get the publication date of a page.
+
+    Parameters:
+    - path: Path of the page; a YYYY-MM-DD- file name prefix sets the date
+    - mtime: Modification time of the page's source, used otherwise
+
+    Returns:
+    - Timestamp
+    """
+    match = DATE_PREFIX_PATTERN.match(path.rsplit('/', 1)[-1])
+    if match:
+        try:
+            return datetime(*map(int, match.groups()), tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            pass
+    return mtime
+
+def add_to_feeds(feeds, site_page, title, summary):
+    """
+    Offer a page to every feed it belongs in.
+
+    Parameters:
+    - feeds: List of Feed objects
+    - site_page: Page record with 'path' and 'lastmod' (see builder.get_site_page)
+    - title: Page title (HTML)
+    - summary: Page summary (text)
+    """
+    path = site_page['path']
+    for feed in feeds:
+        if feed.matches(path):
+            feed.add(get_page_date(path, site_page['lastmod']), path, title, summary)
+
+def _text(value):
+    """Turn title or summary HTML into escaped XML text."""
+    return escape(html.unescape(re.sub(r'<[^>]+>', '', value)).strip())
+
+def _iter_atom(feed, base_url):
+    entries = feed.newest()
+    feed_url = f"{base_url}/{feed.output}"
+    updated = _atom_date(entries[0][0] if entries else 0)
+
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+    yield f'  <title>{_text(feed.title)}</title>\n'
+    yield f'  <link href={quoteattr(f"{base_url}/{feed.prefix}")}/>\n'
+    yield f'  <link rel="self" href={quoteattr(feed_url)}/>\n'
+    yield f'  <id>{escape(feed_url)}</id>\n'
+    yield f'  <updated>{updated}</updated>\n'
+    for date, path, title, summary in entries:
+        url = f"{base_url}/{path}"
+        yield '  <entry>\n'
+        yield f'    <title>{_text(title or path)}</title>\n'
+        yield f'    <link href={quoteattr(url)}/>\n'
+        yield f'    <id>{escape(url)}</id>\n'
+        yield f'    <updated>{_atom_date(date)}</updated>\n'
+        if summary:
+            yield f'    <summary>{_text(summary)}</summary>\n'
+        yield '  </entry>\n'
+    yield '</feed>\n'
+
+def _iter_rss(feed, base_url):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<rss version="2.0">\n  <channel>\n'
+    yield f'    <title>{_text(feed.title)}</title>\n'
+    yield f'    <link>{escape(f"{base_url}/{feed.prefix}")}</link>\n'
+    yield f'    <description>{_text(feed.title)}</description>\n'
+    for date, path, title, summary in feed.newest():
+        url = escape(f"{base_url}/{path}")
+        yield '    <item>\n'
+        yield f'      <title>{_text(title or path)}</title>\n'
+        yield f'      <link>{url}</link>\n'
+        yield f'      <guid>{url}</guid>\n'
+        yield f'      <pubDate>{format_datetime(datetime.fromtimestamp(date, timezone.utc))}</pubDate>\n'
+        if summary:
+            yield f'      <description>{_text(summary)}</description>\n'
+        yield '    </item>\n'
+    yield '  </channel>\n</rss>\n'
+
+def _atom_date(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def write_feeds(config, feeds):
+    """
+    Write the feeds to the output directory.
+
+    Parameters:
+    - config: Configuration object
+    - feeds: List of Feed objects that have seen every page
+    """
+    base_url = config.base_url.rstrip('/')
+    for feed in feeds:
+        path = os.path.join(config.output_dir, *feed.output.split('/'))
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            lines = _iter_atom(feed, base_url) if feed.format == 'atom' else _iter_rss(feed, base_url)
+            with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+                f.writelines(lines)
+            replace_if_changed(temp_path, path)
+            logger.info(f"Feed generated at {feed.output} ({len(feed.entries)} entries)")
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            logger.error(f"Error generating feed {feed.output}: {str(e)}")
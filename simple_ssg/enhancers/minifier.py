@@ -1,35 +1,208 @@
 """
 HTML minification functionality for Simple-SSG.
+
+The minifier is a single-pass tokenizer: it walks the HTML once, splitting it
+into text, tags, comments and whitespace-sensitive elements, and writes the
+minified tokens as it goes. Input can be a string or an iterable of chunks.
 """
 
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
+# Whitespace around these tags is insignificant and is trimmed
+BLOCK_TAGS = frozenset([
+    'html', 'head', 'body', 'div', 'p', 'section', 'header', 'footer', 'nav',
+    'main', 'article', 'aside', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li'
+])
+
+# The contents of these elements are copied verbatim
+PRESERVE_TAGS = ('pre', 'textarea', 'script', 'style')
+
+_TAG_START_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ/!?')
+_TAG_NAME_PATTERN = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9:-]*)')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+_COLLAPSIBLE_PATTERN = re.compile(r'\s\s|[\t\n\r\f\v]')
+_CLOSING_PATTERNS = {
+    tag: re.compile(r'</' + tag + r'\s*>', re.IGNORECASE) for tag in PRESERVE_TAGS
+}
+
+class HtmlMinifier:
+    """
+    Streaming HTML minifier.
+
+    Feed it chunks of HTML with feed() and finish with close(); both return
+    the minified output produced so far as a list of strings. Incomplete
+    tokens at the end of a chunk are held back until the next chunk arrives.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.pending_text = []
+        self.output = []
+        self.started = False
+        self.after_block_open = False
+
+    def feed(self, chunk):
+        """
+        Minify a chunk of HTML.
+
+        Parameters:
+        - chunk: Next piece of the HTML document
+
+        Returns:
+        - List of minified output strings
+        """
+        self.buffer = self.buffer + chunk if self.buffer else chunk
+        self._scan(final=False)
+        return self._take_output()
+
+    def close(self):
+        """
+        Minify whatever input is left.
+
+        Returns:
+        - List of minified output strings
+        """
+        self._scan(final=True)
+        self._flush_text(None)
+        return self._take_output()
+
+    def _take_output(self):
+        output = self.output
+        self.output = []
+        return output
+
+    def _scan(self, final):
+        """Tokenize the buffered input in a single forward pass."""
+        buf = self.buffer
+        length = len(buf)
+        pos = 0
+
+        while pos < length:
+            if buf[pos] != '<' or (pos + 1 < length and buf[pos + 1] not in _TAG_START_CHARS):
+                # Text runs up to the next '<'
+                end = buf.find('<', pos + 1)
+                if end == -1:
+                    if not final:
+                        break
+                    end = length
+                self.pending_text.append(buf[pos:end])
+                pos = end
+                continue
+
+            if pos + 1 == length:
+                if final:
+                    self.pending_text.append(buf[pos:])
+                    pos = length
+                break
+
+            if buf.startswith('<!--', pos):
+                end = buf.find('-->', pos + 4)
+                if end == -1:
+                    if not final:
+                        break
+                    end = length
+                comment = buf[pos:end + 3]
+                pos = end + 3
+                if comment.startswith('<!--[if') or comment.endswith('<![endif]-->'):
+                    # Keep conditional comments
+                    self._flush_text(comment)
+                    self.output.append(comment)
+                    self.started = True
+                    self.after_block_open = False
+                continue
+
+            end = buf.find('>', pos + 1)
+            if end == -1:
+                if not final:
+                    break
+                self.pending_text.append(buf[pos:])
+                pos = length
+                continue
+
+            tag = buf[pos:end + 1]
+            match = _TAG_NAME_PATTERN.match(tag)
+            closing = bool(match and match.group(1))
+            name = match.group(2).lower() if match else ''
+
+            if name in _CLOSING_PATTERNS and not closing:
+                close_match = _CLOSING_PATTERNS[name].search(buf, end + 1)
+                if close_match is None and not final:
+                    break
+                body_end = close_match.end() if close_match else length
+                self._flush_text(tag)
+                self.output.append(self._minify_tag(tag))
+                self.output.append(buf[end + 1:body_end])
+                self.after_block_open = False
+                pos = body_end
+                continue
+
+            self._flush_text(tag, name, closing)
+            self.output.append(self._minify_tag(tag))
+            self.after_block_open = not closing and name in BLOCK_TAGS
+            pos = end + 1
+
+        self.buffer = buf[pos:]
+
+    def _minify_tag(self, tag):
+        """Collapse whitespace inside a tag."""
+        self.started = True
+        if _COLLAPSIBLE_PATTERN.search(tag):
+            return _WHITESPACE_PATTERN.sub(' ', tag)
+        return tag
+
+    def _flush_text(self, next_tag, next_name='', next_closing=False):
+        """Write the text collected since the previous tag."""
+        if not self.pending_text:
+            return
+
+        text = _WHITESPACE_PATTERN.sub(' ', ''.join(self.pending_text))
+        self.pending_text = []
+
+        # Whitespace-only text between tags is dropped
+        if text == ' ' or not text:
+            return
+
+        if text[0] == ' ' and (not self.started or self.after_block_open):
+            text = text[1:]
+        if text[-1] == ' ' and (next_tag is None or (next_closing and next_name in BLOCK_TAGS)):
+            text = text[:-1]
+
+        if text:
+            self.output.append(text)
+            self.started = True
+
+def iter_minify_html(chunks):
+    """
+    Minify HTML given as an iterable of chunks.
+
+    Parameters:
+    - chunks: Iterable of strings that join to an HTML document
+
+    Returns:
+    - Iterator of minified output strings
+    """
+    minifier = HtmlMinifier()
+    for chunk in chunks:
+        if chunk:
+            yield from minifier.feed(chunk)
+    yield from minifier.close()
+
 def minify_html(html):
     """
     Simple HTML minification.
-    
+
     Parameters:
-    - html: HTML content to minify
-    
+    - html: HTML content to minify, as a string or an iterable of chunks
+
     Returns:
     - Minified HTML content
     """
+    chunks = [html] if isinstance(html, str) else list(html)
     try:
-        # Remove comments (except conditional comments for IE)
-        html = re.sub(r'<!--(?![\s\S]*?\[if.*?\])[\s\S]*?-->', '', html, flags=re.DOTALL)
-        
-        # Remove unnecessary whitespace
-        html = re.sub(r'\s+', ' ', html)
-        html = re.sub(r'>\s+<', '><', html)
-        
-        # Trim whitespace around specific tags
-        for tag in ['html', 'head', 'body', 'div', 'p', 'section', 'header', 
-                    'footer', 'nav', 'main', 'article', 'aside', 'h1', 'h2', 
-                    'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li']:
-            html = re.sub(f'<{tag}>\s+', f'<{tag}>', html)
-            html = re.sub(f'\s+</{tag}>', f'</{tag}>', html)
-        
-        return html.strip()
+        return ''.join(iter_minify_html(chunks))
     except Exception as e:
-        print(f"Error minifying HTML: {str(e)}")
-        return html
+        logger.error(f"Error minifying HTML: {str(e)}")
+        return html if isinstance(html, str) else ''.join(chunks)
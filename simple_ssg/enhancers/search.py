@@ -0,0 +1,274 @@
+"""
+Client-side search index for Simple-SSG.
+
+The text of each page is tokenized while the page is rendered, and the
+terms are collected into an inverted index. The index is written to the
+search/ directory of the site:
+
+- index.json lists the pages (URL and title) and the shards
+- each shard covers the terms starting with one prefix, as a JSON table
+  (term -> [offset, length, page count]) and a binary blob of postings
+- postings are the ascending page numbers of a term, stored as deltas
+  encoded as variable-length integers (7 bits per byte)
+- search.js loads the shards a query needs and looks the terms up
+
+A browser only downloads index.json and the shards of the query's prefixes.
+"""
+
+import html
+import json
+import logging
+import os
+import re
+import unicodedata
+from simple_ssg.utils.fs import ensure_dir, write_if_changed
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DIR = 'search'
+
+# Terms are grouped into shards by their first PREFIX_LENGTH characters
+# (code points, not UTF-16 units)
+PREFIX_LENGTH = 2
+
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 40
+
+TERM_PATTERN = re.compile(r'[^\W_]+')
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+SEARCH_SCRIPT = """// Simple-SSG search: SimpleSSGSearch.search('query').then(function (results) { ... })
+// resolves to a list of {url, title} for the pages containing every word of the query
+// (the last word may be a prefix).
+var SimpleSSGSearch = (function () {
+  var base = document.currentScript.src.replace(/[^\\/]*$/, '');
+  var index = null, shards = {};
+
+  function getIndex() {
+    if (!index) index = fetch(base + 'index.json').then(function (r) { return r.json(); });
+    return index;
+  }
+
+  // The same steps as normalize_text, tokenize and shard_key in search.py
+  function normalize(text) {
+    return text.normalize('NFKC').toLowerCase();
+  }
+
+  function terms(text) {
+    return (normalize(text).match(/[\\p{L}\\p{N}]+/gu) || []).filter(function (w) {
+      var length = Array.from(w).length;
+      return length >= %(min_length)d && length <= %(max_length)d;
+    });
+  }
+
+  function shardKey(word, length) {
+    var prefix = Array.from(word).slice(0, length).join('');
+    return Array.prototype.map.call(new TextEncoder().encode(prefix), function (b) {
+      return ('0' + b.toString(16)).slice(-2);
+    }).join('');
+  }
+
+  function getShard(name) {
+    if (!shards[name]) {
+      shards[name] = Promise.all([
+        fetch(base + name + '.json').then(function (r) { return r.json(); }),
+        fetch(base + name + '.bin').then(function (r) { return r.arrayBuffer(); })
+      ]).then(function (parts) { return {terms: parts[0], postings: new Uint8Array(parts[1])}; });
+    }
+    return shards[name];
+  }
+
+  function decode(bytes, offset, length) {
+    var ids = [], id = 0, value = 0, shift = 0;
+    for (var i = offset; i < offset + length; i++) {
+      value += (bytes[i] & 127) * Math.pow(2, shift);
+      if (bytes[i] & 128) { shift += 7; continue; }
+      id += value; ids.push(id); value = 0; shift = 0;
+    }
+    return ids;
+  }
+
+  function lookup(info, word, prefix) {
+    var ids = {}, name = shardKey(word, info.prefix);
+    if (info.shards.indexOf(name) === -1) return Promise.resolve(ids);
+    return getShard(name).then(function (shard) {
+      Object.keys(shard.terms).forEach(function (term) {
+        if (term === word || (prefix && term.lastIndexOf(word, 0) === 0)) {
+          var entry = shard.terms[term];
+          decode(shard.postings, entry[0], entry[1]).forEach(function (id) { ids[id] = true; });
+        }
+      });
+      return ids;
+    });
+  }
+
+  function search(query) {
+    var words = terms(query);
+    if (!words.length) return Promise.resolve([]);
+    return getIndex().then(function (info) {
+      return Promise.all(words.map(function (word, i) {
+        return lookup(info, word, i === words.length - 1);
+      })).then(function (sets) {
+        return Object.keys(sets[0]).filter(function (id) {
+          return sets.every(function (set) { return set[id]; });
+        }).map(function (id) { return {url: info.docs[id][0], title: info.docs[id][1]}; });
+      });
+    });
+  }
+
+  return {search: search};
+})();
+""" % {'min_length': MIN_TERM_LENGTH, 'max_length': MAX_TERM_LENGTH}
+
+def tokenize(html_content):
+    """
+    Get the search terms of a page.
+
+    Parameters:
+    - html_content: HTML of the page body
+
+    Returns:
+    - Sorted list of distinct lower-case terms
+    """
+    text = normalize_text(html.unescape(TAG_PATTERN.sub(' ', html_content)))
+    return sorted({term for term in TERM_PATTERN.findall(text)
+                   if MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH})
+
+def normalize_text(text):
+    """
+    Normalise text for the index: NFKC, then lower case. search.js applies
+    the same steps to queries (text.normalize('NFKC').toLowerCase()), so a
+    query matches however its characters were composed or capitalised.
+    """
+    return unicodedata.normalize('NFKC', text).lower()
+
+def encode_postings(doc_ids):
+    """
+    Encode ascending page numbers as variable-length deltas.
+
+    Parameters:
+    - doc_ids: Ascending list of page numbers
+
+    Returns:
+    - Bytes
+    """
+    data = bytearray()
+    previous = 0
+    for doc_id in doc_ids:
+        delta = doc_id - previous
+        previous = doc_id
+        while delta >= 0x80:
+            data.append((delta & 0x7f) | 0x80)
+            delta >>= 7
+        data.append(delta)
+    return bytes(data)
+
+def decode_postings(data):
+    """Decode bytes written by encode_postings back into page numbers."""
+    doc_ids = []
+    doc_id = value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        doc_id += value
+        doc_ids.append(doc_id)
+        value = shift = 0
+    return doc_ids
+
+def shard_name(prefix):
+    """Get the file name (without extension) of the shard for a term prefix."""
+    return prefix.encode('utf-8').hex()
+
+def shard_key(term):
+    """Get the shard name of a normalised term, as shardKey in search.js does."""
+    return shard_name(term[:PREFIX_LENGTH])
+
+class SearchIndex:
+    """
+    Inverted index of the pages of a build.
+    """
+
+    def __init__(self):
+        self.docs = []
+        self.postings = {}  # term -> ascending list of page numbers
+
+    def add(self, path, title, terms):
+        """
+        Add a page.
+
+        Parameters:
+        - path: Output path of the page relative to the output directory
+        - title: Page title (HTML, may be None)
+        - terms: Terms of the page, as a list or a space-separated string
+        """
+        doc_id = len(self.docs)
+        title = html.unescape(TAG_PATTERN.sub('', title)).strip() if title else path
+        self.docs.append((path, title))
+        if isinstance(terms, str):
+            terms = terms.split()
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is None:
+                self.postings[term] = [doc_id]
+            else:
+                postings.append(doc_id)
+
+    def write(self, output_dir):
+        """
+        Write the index, its shards and the lookup script.
+
+        Parameters:
+        - output_dir: Output directory of the site
+
+        Returns:
+        - Total size of the written index in bytes
+        """
+        search_dir = os.path.join(output_dir, SEARCH_DIR)
+        ensure_dir(search_dir)
+
+        shards = {}
+        for term in sorted(self.postings):
+            shards.setdefault(shard_key(term), []).append(term)
+
+        files = {'search.js': SEARCH_SCRIPT.encode('utf-8')}
+        for name, terms in shards.items():
+            table = {}
+            blob = bytearray()
+            for term in terms:
+                encoded = encode_postings(self.postings[term])
+                table[term] = [len(blob), len(encoded), len(self.postings[term])]
+                blob += encoded
+            files[f'{name}.json'] = json.dumps(table, ensure_ascii=False,
+                                               separators=(',', ':')).encode('utf-8')
+            files[f'{name}.bin'] = bytes(blob)
+
+        index = {'version': 1, 'prefix': PREFIX_LENGTH, 'docs': self.docs, 'shards': sorted(shards)}
+        files['index.json'] = json.dumps(index, ensure_ascii=False,
+                                         separators=(',', ':')).encode('utf-8')
+
+        for name, data in files.items():
+            write_if_changed(os.path.join(search_dir, name), data)
+
+        # Remove shards of prefixes that no longer occur
+        for name in os.listdir(search_dir):
+            if name not in files:
+                os.remove(os.path.join(search_dir, name))
+
+        return sum(len(data) for data in files.values())
+
+def write_search_index(config, index):
+    """
+    Write the search index of a build.
+
+    Parameters:
+    - config: Configuration object
+    - index: SearchIndex that has seen every page
+    """
+    try:
+        size = index.write(config.output_dir)
+        logger.info(f"Search index generated at {SEARCH_DIR}/ ({len(index.docs)} pages, "
+                    f"{len(index.postings)} terms, {size / 1024:.1f} KB)")
+    except Exception as e:
+        logger.error(f"Error generating search index: {str(e)}")
@@ -2,49 +2,184 @@
 SEO enhancement functionality for Simple-SSG.
 """
 
+import gzip
+import logging
 import os
 import re
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+from simple_ssg.utils.fs import replace_if_changed, write_if_changed
+from simple_ssg.enhancers.assets import HASH_LENGTH
+from simple_ssg.enhancers.compression import TEXT_EXTENSIONS, get_encodings
 
-def generate_sitemap(config):
+logger = logging.getLogger(__name__)
+
+# Limits of a single sitemap file (https://www.sitemaps.org/protocol.html)
+SITEMAP_MAX_URLS = 50000
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+
+SITEMAP_HEADER = (b'<?xml version="1.0" encoding="UTF-8"?>\n'
+                  b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+SITEMAP_FOOTER = b'</urlset>'
+
+# Split sitemap files: sitemap-1.xml, sitemap-2.xml.gz, ...
+SITEMAP_PART_PATTERN = re.compile(r'^sitemap-\d+\.xml(\.gz)?$')
+
+def format_lastmod(mtime):
+    """Format a modification time as a W3C datetime for <lastmod>."""
+    return datetime.fromtimestamp(mtime, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S+00:00')
+
+def iter_sitemap_urls(pages, base_url):
     """
-    Generate a sitemap.xml file.
-    
+    Generate the <url> elements of the sitemap.
+
+    Parameters:
+    - pages: Iterable of page records with 'path' (output path relative to
+      the output directory, with forward slashes) and 'lastmod' (source mtime)
+    - base_url: Base URL of the site, without a trailing slash
+
+    Returns:
+    - Iterator of encoded <url> elements, homepage first
+    """
+    pages = sorted(pages, key=lambda page: page['path'])
+
+    home = next((page for page in pages if page['path'] == 'index.html'), None)
+    lastmod = f"\n    <lastmod>{format_lastmod(home['lastmod'])}</lastmod>" if home else ''
+    yield (f'  <url>\n    <loc>{base_url}/</loc>{lastmod}\n'
+           f'    <priority>1.0</priority>\n  </url>\n').encode('utf-8')
+
+    for page in pages:
+        url_path = page['path']
+        name = url_path.rsplit('/', 1)[-1]
+        if name == '404.html' or url_path == 'index.html':
+            continue
+        if name == 'index.html':
+            url_path = url_path[:-len(name)]
+
+        # Set priority based on depth
+        depth = url_path.rstrip('/').count('/')
+        priority = 0.8 if depth == 0 else 0.6 if depth == 1 else 0.4
+
+        yield (f'  <url>\n    <loc>{escape(f"{base_url}/{url_path}")}</loc>\n'
+               f'    <lastmod>{format_lastmod(page["lastmod"])}</lastmod>\n'
+               f'    <priority>{priority}</priority>\n  </url>\n').encode('utf-8')
+
+class SitemapPartWriter:
+    """
+    Stream <url> elements into numbered sitemap files, starting a new file
+    whenever one would exceed the URL or size limit.
+    """
+
+    def __init__(self, output_dir, compress=False, max_urls=SITEMAP_MAX_URLS,
+                 max_bytes=SITEMAP_MAX_BYTES):
+        self.output_dir = output_dir
+        self.compress = compress
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        self.parts = []  # temporary file paths of the finished parts
+        self.file = None
+        self.stream = None
+
+    def write(self, url):
+        """Add one encoded <url> element."""
+        if self.stream is not None and (self.urls >= self.max_urls or
+                                        self.size + len(url) + len(SITEMAP_FOOTER) > self.max_bytes):
+            self.finish_part()
+        if self.stream is None:
+            self.start_part()
+        self.stream.write(url)
+        self.urls += 1
+        self.size += len(url)
+
+    def start_part(self):
+        suffix = '.gz' if self.compress else ''
+        temp_path = os.path.join(self.output_dir,
+                                 f"sitemap-{len(self.parts) + 1}.xml{suffix}.{os.getpid()}.tmp")
+        self.parts.append(temp_path)
+        self.file = open(temp_path, 'wb')
+        # mtime=0 keeps unchanged sitemaps byte-identical between builds
+        self.stream = (gzip.GzipFile(filename='', mode='wb', fileobj=self.file, mtime=0)
+                       if self.compress else self.file)
+        self.stream.write(SITEMAP_HEADER)
+        self.urls = 0
+        self.size = len(SITEMAP_HEADER)
+
+    def finish_part(self):
+        self.stream.write(SITEMAP_FOOTER)
+        if self.stream is not self.file:
+            self.stream.close()
+        self.file.close()
+        self.file = self.stream = None
+
+    def close(self):
+        """Finish the last file and return the temporary paths of all parts."""
+        if self.stream is not None:
+            self.finish_part()
+        return self.parts
+
+    def discard(self):
+        """Close and remove the files written so far."""
+        if self.file is not None:
+            self.file.close()
+        for temp_path in self.parts:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+def generate_sitemap(config, pages):
+    """
+    Generate sitemap.xml from the pages of the build.
+
+    The sitemap is streamed to disk. Sites with more URLs than fit in one
+    sitemap file (or with sitemap_gzip enabled) get numbered
+    sitemap-N.xml(.gz) files, and sitemap.xml becomes a sitemap index
+    listing them.
+
     Parameters:
     - config: Configuration object with sitemap settings
+    - pages: Iterable of page records with 'path' (output path relative to
+      the output directory) and 'lastmod' (modification time of the source)
     """
+    writer = None
     try:
-        print("Generating sitemap.xml...")
+        logger.debug("Generating sitemap.xml...")
         base_url = config.base_url.rstrip('/')
         output_dir = config.output_dir
-        
-        sitemap = '<?xml version="1.0" encoding="UTF-8"?>\n'
-        sitemap += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-        
-        # Add homepage
-        sitemap += f'  <url>\n    <loc>{base_url}/</loc>\n    <priority>1.0</priority>\n  </url>\n'
-        
-        # Add each HTML page
-        for root, _, files in os.walk(output_dir):
-            for file in files:
-                if file.endswith('.html') and file != 'index.html' and file != '404.html':
-                    rel_path = os.path.relpath(os.path.join(root, file), output_dir)
-                    url_path = rel_path.replace('\\', '/')  # Handle Windows paths
-                    
-                    # Set priority based on depth
-                    depth = url_path.count('/')
-                    priority = 0.8 if depth == 0 else 0.6 if depth == 1 else 0.4
-                    
-                    sitemap += f'  <url>\n    <loc>{base_url}/{url_path}</loc>\n    <priority>{priority}</priority>\n  </url>\n'
-        
-        sitemap += '</urlset>'
-        
-        # Write sitemap
-        with open(os.path.join(output_dir, 'sitemap.xml'), 'w', encoding='utf-8') as f:
-            f.write(sitemap)
-            
-        print(f"Sitemap generated at {output_dir}/sitemap.xml")
+
+        writer = SitemapPartWriter(output_dir, config.sitemap_gzip, config.sitemap_max_urls)
+        for url in iter_sitemap_urls(pages, base_url):
+            writer.write(url)
+        parts = writer.close()
+
+        sitemap_path = os.path.join(output_dir, 'sitemap.xml')
+        if len(parts) == 1 and not config.sitemap_gzip:
+            replace_if_changed(parts[0], sitemap_path)
+            names = []
+        else:
+            # Drop the ".<pid>.tmp" suffix
+            names = [os.path.basename(path).rsplit('.', 2)[0] for path in parts]
+            for temp_path, name in zip(parts, names):
+                replace_if_changed(temp_path, os.path.join(output_dir, name))
+
+            index = ['<?xml version="1.0" encoding="UTF-8"?>\n'
+                     '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n']
+            index.extend(f'  <sitemap>\n    <loc>{escape(f"{base_url}/{name}")}</loc>\n  </sitemap>\n'
+                         for name in names)
+            index.append('</sitemapindex>')
+            write_if_changed(sitemap_path, ''.join(index).encode('utf-8'))
+
+        # Remove split files left over from an earlier, larger sitemap
+        for name in os.listdir(output_dir):
+            if SITEMAP_PART_PATTERN.match(name) and name not in names:
+                os.remove(os.path.join(output_dir, name))
+
+        if names:
+            logger.info(f"Sitemap index generated at {output_dir}/sitemap.xml ({len(names)} sitemap files)")
+        else:
+            logger.info(f"Sitemap generated at {output_dir}/sitemap.xml")
     except Exception as e:
-        print(f"Error generating sitemap: {str(e)}")
+        if writer is not None:
+            writer.discard()
+        logger.error(f"Error generating sitemap: {str(e)}")
 
 def create_robots_txt(config):
     """
@@ -54,7 +189,7 @@ def create_robots_txt(config):
     - config: Configuration object with robots.txt settings
     """
     try:
-        print("Creating robots.txt...")
+        logger.debug("Creating robots.txt...")
         base_url = config.base_url.rstrip('/')
         output_dir = config.output_dir
         
@@ -62,12 +197,11 @@ def create_robots_txt(config):
 Allow: /
 Sitemap: {base_url}/sitemap.xml
 """
-        with open(os.path.join(output_dir, 'robots.txt'), 'w', encoding='utf-8') as f:
-            f.write(robots_content)
+        write_if_changed(os.path.join(output_dir, 'robots.txt'), robots_content.encode('utf-8'))
             
-        print(f"robots.txt created at {output_dir}/robots.txt")
+        logger.info(f"robots.txt created at {output_dir}/robots.txt")
     except Exception as e:
-        print(f"Error creating robots.txt: {str(e)}")
+        logger.error(f"Error creating robots.txt: {str(e)}")
 
 def create_htaccess(config):
     """
@@ -77,7 +211,7 @@ def create_htaccess(config):
     - config: Configuration object with .htaccess settings
     """
     try:
-        print("Creating .htaccess file...")
+        logger.debug("Creating .htaccess file...")
         output_dir = config.output_dir
         
         htaccess_content = """# Handle 404 errors
@@ -106,12 +240,85 @@ ErrorDocument 404 /404.html
   ExpiresDefault "access plus 2 days"
 </IfModule>
 """
-        with open(os.path.join(output_dir, '.htaccess'), 'w', encoding='utf-8') as f:
-            f.write(htaccess_content)
+        if config.fingerprint_assets:
+            htaccess_content += get_fingerprint_rules(config)
+        
+        if config.precompress:
+            htaccess_content += get_precompression_rules()
+        
+        write_if_changed(os.path.join(output_dir, '.htaccess'), htaccess_content.encode('utf-8'))
             
-        print(f".htaccess file created at {output_dir}/.htaccess")
+        logger.info(f".htaccess file created at {output_dir}/.htaccess")
     except Exception as e:
-        print(f"Error creating .htaccess: {str(e)}")
+        logger.error(f"Error creating .htaccess: {str(e)}")
+
+def get_fingerprint_rules(config):
+    """
+    Get .htaccess rules that let browsers cache fingerprinted assets forever.
+    
+    Parameters:
+    - config: Configuration object with fingerprint settings
+    
+    Returns:
+    - .htaccess rules as a string
+    """
+    extensions = '|'.join(re.escape(ext.lstrip('.')) for ext in config.fingerprint_extensions)
+    pattern = f'\\.[0-9a-f]{{{HASH_LENGTH}}}\\.({extensions})$'
+    
+    return f"""
+# Fingerprinted assets (name.<hash>.ext) never change: cache them for a year
+<FilesMatch "{pattern}">
+  <IfModule mod_expires.c>
+    ExpiresActive Off
+  </IfModule>
+  <IfModule mod_headers.c>
+    Header set Cache-Control "public, max-age=31536000, immutable"
+  </IfModule>
+</FilesMatch>
+"""
+
+def get_precompression_rules():
+    """
+    Get .htaccess rules that serve the precompressed variants of text files.
+    
+    Returns:
+    - .htaccess rules as a string
+    """
+    # Content types of the original files, since Apache would otherwise
+    # derive them from the .gz/.br/.zst suffix
+    content_types = {
+        'html': 'text/html', 'css': 'text/css', 'js': 'text/javascript',
+        'xml': 'application/xml', 'txt': 'text/plain', 'svg': 'image/svg+xml',
+        'json': 'application/json',
+    }
+    encodings = get_encodings()
+    suffixes = '|'.join(suffix.lstrip('.') for suffix, _, _ in encodings)
+    
+    rules = "\n# Serve precompressed files to clients that accept them\n"
+    rules += "<IfModule mod_rewrite.c>\n  RewriteEngine On\n"
+    # Prefer the smallest encodings: Brotli, then Zstandard, then gzip
+    for suffix, name, _ in sorted(encodings, key=lambda e: ('.br', '.zst', '.gz').index(e[0])):
+        rules += (f"  RewriteCond %{{HTTP:Accept-Encoding}} \\b{name}\\b\n"
+                  f"  RewriteCond %{{REQUEST_FILENAME}}{suffix} -s\n"
+                  f"  RewriteRule ^(.+)$ $1{suffix} [L]\n")
+    for ext in TEXT_EXTENSIONS:
+        ext = ext.lstrip('.')
+        rules += (f"  RewriteRule \\.{ext}\\.({suffixes})$ - "
+                  f"[T={content_types[ext]},E=no-gzip:1,E=no-brotli:1]\n")
+    rules += "</IfModule>\n"
+    
+    extensions = '|'.join(ext.lstrip('.') for ext in TEXT_EXTENSIONS)
+    rules += "<IfModule mod_headers.c>\n"
+    rules += (f'  <FilesMatch "\\.({extensions})$">\n'
+              f'    Header append Vary Accept-Encoding\n'
+              f'  </FilesMatch>\n')
+    for suffix, name, _ in encodings:
+        rules += (f'  <FilesMatch "\\{suffix}$">\n'
+                  f'    Header set Content-Encoding {name}\n'
+                  f'    Header append Vary Accept-Encoding\n'
+                  f'  </FilesMatch>\n')
+    rules += "</IfModule>\n"
+    return rules
 
 def update_meta_tags(html, page_title, description, base_url, page_path):
     """
@@ -173,5 +380,5 @@ def update_meta_tags(html, page_title, description, base_url, page_path):
         
         return html
     except Exception as e:
-        print(f"Error updating meta tags: {str(e)}")
+        logger.error(f"Error updating meta tags: {str(e)}")
         return html
@@ -1,18 +1,550 @@
 """
 Development server for Simple-SSG.
+
+A threaded HTTP/1.1 server with keep-alive. File contents are kept in an
+in-memory LRU cache keyed by path and modification time, responses carry
+strong ETags and Last-Modified headers so browsers can revalidate with a
+304, and compressible responses are gzipped for clients that accept it.
+
+In render-on-demand mode pages are rendered from their sources when they
+are first requested (and again when the source changes) instead of being
+built up front.
 """
 
+import gzip
+import logging
+import mimetypes
 import os
 import http.server
-import socketserver
-import webbrowser
+import posixpath
 import threading
 import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote, unquote, urlsplit
+from simple_ssg.utils.manifest import hash_bytes
+
+logger = logging.getLogger(__name__)
+
+# Default size of the in-memory file cache
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Responses smaller than this are not worth compressing
+MIN_GZIP_SIZE = 256
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json',
+                      'application/xml', 'image/svg+xml')
+
+# Server-sent events endpoint used by live reload
+LIVE_RELOAD_PATH = '/__livereload'
+
+# Script added to served HTML pages in live reload mode
+LIVE_RELOAD_SCRIPT = (
+    '<script>new EventSource("' + LIVE_RELOAD_PATH + '")'
+    '.onmessage = function () { location.reload(); };</script>'
+).encode('utf-8')
+
+class CachedFile:
+    """
+    A file's bytes and the response metadata derived from them.
+    """
+
+    def __init__(self, data, mtime, content_type):
+        """
+        Parameters:
+        - data: File contents
+        - mtime: Modification time (seconds since the epoch)
+        - content_type: Content-Type header value
+        """
+        self.data = data
+        self.mtime = mtime
+        self.content_type = content_type
+        self.etag = f'"{hash_bytes(data)[:32]}"'
+        self.compressible = (len(data) >= MIN_GZIP_SIZE
+                             and content_type.startswith(COMPRESSIBLE_TYPES))
+        self._gzip_data = None
+
+    @property
+    def gzip_data(self):
+        """The gzip-compressed contents (compressed on first use)."""
+        if self._gzip_data is None:
+            self._gzip_data = gzip.compress(self.data, compresslevel=6, mtime=0)
+        return self._gzip_data
+
+class FileCache:
+    """
+    Thread-safe LRU cache of CachedFile objects keyed by path and mtime.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, transform=None):
+        """
+        Parameters:
+        - max_bytes: Total size of file contents to keep in memory
+        - transform: Optional function (data, content_type) -> data applied
+          to files when they are read
+        """
+        self.max_bytes = max_bytes
+        self.transform = transform
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, path, render=None, content_type=None):
+        """
+        Get a file, reading it from disk if it is not cached or has changed.
+
+        Parameters:
+        - path: File system path
+        - render: Optional function producing the contents from the path
+          (default: read the file); it may return None on failure
+        - content_type: Content type to use instead of guessing it from the path
+
+        Returns:
+        - CachedFile, or None if the file does not exist
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+
+        with self.lock:
+            cached = self.entries.get(path)
+            if cached is not None and cached[0] == key:
+                self.entries.move_to_end(path)
+                return cached[1]
+
+        if render is not None:
+            data = render(path)
+            if data is None:
+                return None
+        else:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                return None
+
+        content_type = content_type or guess_content_type(path)
+        if self.transform:
+            data = self.transform(data, content_type)
+        entry = CachedFile(data, st.st_mtime, content_type)
+        self.put(path, key, entry)
+        return entry
+
+    def put(self, path, key, entry):
+        """
+        Store an entry, evicting the least recently used ones when full.
+
+        Parameters:
+        - path: Cache key path
+        - key: Version of the entry (e.g. mtime and size)
+        - entry: CachedFile
+        """
+        size = len(entry.data)
+        if size > self.max_bytes // 4:
+            # Large files are served without being cached
+            return
+
+        with self.lock:
+            old = self.entries.pop(path, None)
+            if old is not None:
+                self.size -= len(old[1].data)
+            self.entries[path] = (key, entry)
+            self.size += size
+            while self.size > self.max_bytes and self.entries:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted.data)
+
+    def clear(self):
+        """Remove all entries."""
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+def guess_content_type(path):
+    """Get the Content-Type for a file name."""
+    content_type, _ = mimetypes.guess_type(path)
+    if content_type is None:
+        return 'application/octet-stream'
+    if content_type.startswith('text/') or content_type in ('application/javascript',
+                                                             'application/json'):
+        return f'{content_type}; charset=utf-8'
+    return content_type
+
+def inject_live_reload(data, content_type):
+    """Add the live reload script to an HTML page."""
+    if not content_type.startswith('text/html'):
+        return data
+    position = data.rfind(b'</body>')
+    if position == -1:
+        return data + LIVE_RELOAD_SCRIPT
+    return data[:position] + LIVE_RELOAD_SCRIPT + data[position:]
+
+class LiveReload:
+    """
+    Reload notifications for browsers connected to the live reload endpoint.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        """Tell every connected browser to reload."""
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        """
+        Wait until a reload newer than `version` is announced.
+
+        Returns:
+        - The current version (unchanged on timeout)
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+def accepts_gzip(header):
+    """Check whether an Accept-Encoding header allows gzip."""
+    for item in (header or '').split(','):
+        name, _, params = item.partition(';')
+        if name.strip().lower() not in ('gzip', '*'):
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        return quality > 0
+    return False
+
+class SiteRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serve files from the server's directory through its file cache.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'SimpleSSG'
+
+    def do_GET(self):
+        self.send_resource(head=False)
+
+    def do_HEAD(self):
+        self.send_resource(head=True)
+
+    def send_resource(self, head=False):
+        """Answer a GET or HEAD request."""
+        url_path = unquote(urlsplit(self.path).path)
+        if url_path == LIVE_RELOAD_PATH and self.server.live_reload is not None:
+            self.send_events()
+            return
+
+        fs_path = self.translate_path(url_path)
+
+        if fs_path is not None and os.path.isdir(fs_path):
+            if not url_path.endswith('/'):
+                self.send_redirect(quote(url_path) + '/')
+                return
+            fs_path = os.path.join(fs_path, 'index.html')
+
+        entry = self.load(url_path, fs_path)
+        if entry is None:
+            self.send_not_found(head)
+            return
+
+        self.send_entry(entry, head)
+
+    def translate_path(self, url_path):
+        """
+        Map a URL path to a path under the served directory.
+
+        Returns:
+        - File system path, or None if the URL points outside the directory
+        """
+        parts = [part for part in posixpath.normpath(url_path).split('/')
+                 if part and part not in ('.', '..')]
+        if any(os.sep in part or (os.altsep and os.altsep in part) for part in parts):
+            return None
+        return os.path.join(self.server.directory, *parts)
+
+    def load(self, url_path, fs_path):
+        """
+        Get the CachedFile to send for a request.
+
+        Parameters:
+        - url_path: Decoded URL path
+        - fs_path: Result of translate_path (with index.html for directories)
+
+        Returns:
+        - CachedFile, or None if there is nothing to serve
+        """
+        if fs_path is None:
+            return None
+        return self.server.cache.get(fs_path)
+
+    def send_entry(self, entry, head=False):
+        """Send a cached file, honouring conditional requests and gzip."""
+        use_gzip = entry.compressible and accepts_gzip(self.headers.get('Accept-Encoding'))
+        etag = entry.etag[:-1] + '-gz"' if use_gzip else entry.etag
+
+        if self.is_not_modified(entry, etag):
+            self.send_response(304)
+            self.send_common_headers(entry, etag)
+            self.end_headers()
+            return
+
+        body = entry.gzip_data if use_gzip else entry.data
+        self.send_response(200)
+        self.send_common_headers(entry, etag)
+        self.send_header('Content-Type', entry.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+
+        if not head:
+            self.wfile.write(body)
+
+    def send_common_headers(self, entry, etag):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(entry.mtime, usegmt=True))
+        self.send_header('Cache-Control', 'no-cache')
+        if entry.compressible:
+            self.send_header('Vary', 'Accept-Encoding')
+
+    def is_not_modified(self, entry, etag):
+        """Check If-None-Match, or If-Modified-Since when there is no ETag to match."""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags
+
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            return int(entry.mtime) <= since
+        return False
+
+    def send_events(self):
+        """Stream reload events to a browser until it disconnects."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        live_reload = self.server.live_reload
+        version = live_reload.version
+        try:
+            self.wfile.write(b'retry: 1000\n\n')
+            self.wfile.flush()
+            while True:
+                current = live_reload.wait(version, timeout=15)
+                if current != version:
+                    version = current
+                    self.wfile.write(b'data: reload\n\n')
+                else:
+                    # Keep-alive comment; also notices closed connections
+                    self.wfile.write(b': ping\n\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def send_redirect(self, location):
+        self.send_response(301)
+        self.send_header('Location', location)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def send_not_found(self, head=False):
+        """Send 404.html from the served directory if there is one."""
+        entry = self.server.cache.get(os.path.join(self.server.directory, '404.html'))
+        body = entry.data if entry else b'<h1>404 Not Found</h1>'
+        self.send_response(404)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+class OnDemandRequestHandler(SiteRequestHandler):
+    """
+    Render pages from their sources when they are requested.
+
+    /about.html (or /about) is rendered from about.md in the content
+    directory, and files in static directories are served from their source
+    locations, so nothing has to be built before serving.
+    """
+
+    def translate_path(self, url_path):
+        """
+        Map a URL path to a source file.
+
+        Returns:
+        - File system path (the URL mapped into the content directory unless
+          it is in a static directory), or None if it points outside
+        """
+        parts = [part for part in posixpath.normpath(url_path).split('/')
+                 if part and part not in ('.', '..')]
+        if any(os.sep in part or (os.altsep and os.altsep in part) for part in parts):
+            return None
+
+        config = self.server.config
+        if parts and parts[0] in self.server.static_dirs:
+            return os.path.join(self.server.static_dirs[parts[0]], *parts[1:])
+        return os.path.join(config.content_dir, *parts)
+
+    def load(self, url_path, fs_path):
+        """
+        Get the rendered page or static file for a request.
+
+        Parameters:
+        - url_path: Decoded URL path
+        - fs_path: Result of translate_path (with index.html for directories)
+
+        Returns:
+        - CachedFile, or None if there is nothing to serve
+        """
+        if fs_path is None:
+            return None
+
+        base, ext = os.path.splitext(fs_path)
+        if ext in ('.html', ''):
+            for source_ext in ('.md', '.markdown'):
+                if os.path.isfile(base + source_ext):
+                    self.server.check_template()
+                    return self.server.cache.get(base + source_ext, self.server.render,
+                                                 'text/html; charset=utf-8')
+
+        if os.path.isfile(fs_path) and not fs_path.endswith(('.md', '.markdown')):
+            return self.server.cache.get(fs_path)
+
+        # A static index page is used when there is no index.md
+        config = self.server.config
+        if (os.path.normpath(fs_path) == os.path.join(config.content_dir, 'index.html')
+                and config.index_path):
+            return self.server.cache.get(os.path.abspath(config.index_path))
+        return None
+
+    def send_not_found(self, head=False):
+        """Send the rendered 404 page if there is one."""
+        entry = self.load('/404.html', os.path.join(self.server.config.content_dir, '404.html'))
+        body = entry.data if entry else b'<h1>404 Not Found</h1>'
+        self.send_response(404)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+class SiteServer(http.server.ThreadingHTTPServer):
+    """Threaded HTTP server with the served directory and its file cache."""
+
+    daemon_threads = True
+
+    def __init__(self, address, handler, directory, cache_bytes=DEFAULT_CACHE_BYTES,
+                 live_reload=None):
+        """
+        Parameters:
+        - address: (host, port) to listen on
+        - handler: Request handler class
+        - directory: The directory to serve
+        - cache_bytes: Size of the in-memory file cache
+        - live_reload: LiveReload instance to enable live reload, or None
+        """
+        self.directory = directory
+        self.live_reload = live_reload
+        self.cache = FileCache(cache_bytes, inject_live_reload if live_reload else None)
+        super().__init__(address, handler)
+
+class OnDemandServer(SiteServer):
+    """Server that renders pages from the content directory on request."""
+
+    def __init__(self, address, config, cache_bytes=DEFAULT_CACHE_BYTES):
+        """
+        Parameters:
+        - address: (host, port) to listen on
+        - config: Configuration object
+        - cache_bytes: Size of the in-memory cache of rendered pages and files
+        """
+        self.config = config
+        self.static_dirs = {os.path.basename(os.path.normpath(d)): os.path.abspath(d)
+                            for d in config.static_dirs}
+        self.template_mtime = None
+        self.template_lock = threading.Lock()
+        super().__init__(address, OnDemandRequestHandler, os.path.abspath(config.content_dir),
+                         cache_bytes)
+
+    def check_template(self):
+        """Recompile the template and drop rendered pages when the template changes."""
+        from simple_ssg.utils.templates import compile_template
+
+        try:
+            mtime = os.stat(self.config.template_path).st_mtime_ns
+        except OSError:
+            return
+        with self.template_lock:
+            if mtime != self.template_mtime:
+                compile_template(self.config)
+                self.cache.clear()
+                self.template_mtime = mtime
+
+    def render(self, content_path):
+        """Render a content file, returning the page bytes or None on failure."""
+        from simple_ssg.builder import render_page
+
+        start = time.perf_counter()
+        try:
+            page_html = render_page(content_path, self.config)
+        except Exception as e:
+            logger.error(f"Error rendering {content_path}: {str(e)}")
+            return None
+        if page_html is None:
+            return None
+        logger.info(f"Rendered {os.path.relpath(content_path, self.config.content_dir)} "
+                    f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return page_html.encode('utf-8')
+
+def create_server(directory, port=8000, live_reload=None):
+    """
+    Create a development server without starting it.
+
+    Parameters:
+    - directory: The directory to serve
+    - port: Server port
+    - live_reload: LiveReload instance to enable live reload, or None
+
+    Returns:
+    - SiteServer, or None if it could not be created
+    """
+    return _listen(port, lambda address: SiteServer(
+        address, SiteRequestHandler, os.path.abspath(directory), live_reload=live_reload))
+
+def _listen(port, create):
+    """Create a server on a port with `create(address)`, reporting failures."""
+    try:
+        return create(("", port))
+    except OSError as e:
+        if e.errno == 98:  # Address already in use
+            logger.error(f"Error: Port {port} is already in use. Try a different port.")
+        else:
+            logger.error(f"Error starting server: {str(e)}")
+        return None
 
 def serve(directory, port=8000, open_browser=True):
     """
     Start a development server to preview the site.
-    
+
     Parameters:
     - directory: The directory to serve
     - port: Server port (default: 8000)
@@ -20,39 +552,63 @@ def serve(directory, port=8000, open_browser=True):
     """
     # Normalize directory path
     directory = os.path.abspath(directory)
-    
+
     if not os.path.exists(directory):
-        print(f"Error: Directory {directory} does not exist.")
+        logger.error(f"Error: Directory {directory} does not exist.")
+        return
+
+    httpd = create_server(directory, port)
+    if httpd is None:
         return
-    
-    # Change to the directory
-    os.chdir(directory)
-    
-    # Create handler
-    handler = http.server.SimpleHTTPRequestHandler
-    
+
     try:
-        # Try to create the server
-        with socketserver.TCPServer(("", port), handler) as httpd:
-            print(f"Server started at http://localhost:{port}")
-            print(f"Serving files from: {directory}")
-            print("Press Ctrl+C to stop")
-            
+        with httpd:
+            logger.info(f"Server started at http://localhost:{port}")
+            logger.info(f"Serving files from: {directory}")
+            logger.info("Press Ctrl+C to stop")
+
             # Open browser in a separate thread
             if open_browser:
-                threading.Thread(target=lambda: open_browser_delayed(port)).start()
-            
+                threading.Thread(target=lambda: open_browser_delayed(port), daemon=True).start()
+
             # Start server
             httpd.serve_forever()
-    except OSError as e:
-        if e.errno == 98:  # Address already in use
-            print(f"Error: Port {port} is already in use. Try a different port.")
-        else:
-            print(f"Error starting server: {str(e)}")
     except KeyboardInterrupt:
-        print("\nServer stopped")
+        logger.info("Server stopped")
+
+def serve_on_demand(config, port=8000, open_browser=True):
+    """
+    Start a development server that renders pages when they are requested.
+
+    Parameters:
+    - config: Configuration object
+    - port: Server port (default: 8000)
+    - open_browser: Whether to open a browser (default: True)
+    """
+    if not os.path.isdir(config.content_dir):
+        logger.error(f"Error: Content directory {config.content_dir} does not exist.")
+        return
+
+    httpd = _listen(port, lambda address: OnDemandServer(address, config))
+    if httpd is None:
+        return
+
+    try:
+        with httpd:
+            logger.info(f"Server started at http://localhost:{port} (rendering on demand)")
+            logger.info(f"Rendering pages from: {os.path.abspath(config.content_dir)}")
+            logger.info("Press Ctrl+C to stop")
+
+            if open_browser:
+                threading.Thread(target=lambda: open_browser_delayed(port), daemon=True).start()
+
+            httpd.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Server stopped")
 
 def open_browser_delayed(port):
     """Open browser after a short delay."""
+    import webbrowser
+
     time.sleep(0.5)  # Wait for server to start
     webbrowser.open(f"http://localhost:{port}")
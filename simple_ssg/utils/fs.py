@@ -2,10 +2,19 @@
 File system utilities for Simple-SSG.
 """
 
+import filecmp
+import logging
 import os
 import shutil
 import sys
 
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 def ensure_dir(directory):
     """
     Ensure a directory exists, creating it if necessary.
@@ -20,30 +29,332 @@ def ensure_dir(directory):
         try:
             os.makedirs(directory)
         except Exception as e:
-            print(f"Error creating directory {directory}: {str(e)}")
+            logger.error(f"Error creating directory {directory}: {str(e)}")
             sys.exit(1)
 
-def copy_static_assets(static_dirs, output_dir):
+def write_file(path, data):
+    """
+    Write a file by replacing it rather than overwriting it in place.
+    
+    The data is written to a temporary file that is then renamed over the
+    target, so readers never see a partly written file and hard links to
+    the old file (e.g. from a previous build) keep their content.
+    
+    Parameters:
+    - path: Path of the file to write
+    - data: Bytes to write
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def write_if_changed(path, data, data_hash=None, stored=None):
+    """
+    Write a file only if its content differs from what is already there.
+    
+    Unchanged files keep their modification time, so sync tools and CDNs do
+    not see them as modified. Files of a different size are always written.
+    Otherwise a stored hash is used when the file still has the stored size
+    and modification time, and the existing bytes are compared if not.
+    
+    Parameters:
+    - path: Path of the file to write
+    - data: Bytes to write
+    - data_hash: Hash of data (needed to use a stored hash)
+    - stored: Dictionary with the 'hash', 'size' and 'mtime' (ns) recorded
+      when the file was last written, or None
+    
+    Returns:
+    - True if the file was written, False if it was already up to date
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        write_file(path, data)
+        return True
+    
+    if st.st_size == len(data):
+        if (stored and data_hash and stored.get('size') == st.st_size
+                and stored.get('mtime') == st.st_mtime_ns):
+            unchanged = stored.get('hash') == data_hash
+        else:
+            with open(path, 'rb') as f:
+                unchanged = f.read() == data
+        if unchanged:
+            return False
+    
+    write_file(path, data)
+    return True
+
+def replace_if_changed(temp_path, path):
+    """
+    Move a finished temporary file over a file, unless their contents are equal.
+    
+    Used for outputs that are streamed to disk rather than built in memory.
+    
+    Parameters:
+    - temp_path: Path of the newly written file (removed if it is not used)
+    - path: Path of the file to replace
+    
+    Returns:
+    - True if the file was replaced, False if it was already up to date
+    """
+    if os.path.isfile(path) and filecmp.cmp(temp_path, path, shallow=False):
+        os.remove(temp_path)
+        return False
+    os.replace(temp_path, path)
+    return True
+
+def copy_file(src, dst):
     """
-    Copy static assets to the output directory.
+    Copy a file by replacing the destination rather than overwriting it in place.
+    
+    Parameters:
+    - src: Source file path
+    - dst: Destination file path
+    """
+    temp_path = f"{dst}.{os.getpid()}.tmp"
+    try:
+        shutil.copy2(src, temp_path)
+        os.replace(temp_path, dst)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def new_sync_stats():
+    """Create an empty statistics dictionary for sync_tree."""
+    return {
+        'copied': 0,
+        'bytes_copied': 0,
+        'skipped': 0,
+        'bytes_skipped': 0,
+        'removed': 0,
+    }
+
+def clone_file(src, dst, link=False):
+    """
+    Copy a file as cheaply as the file system allows.
+    
+    Tries, in order: a hard link (only if link is set), a reflink (copy-on-write
+    clone), os.copy_file_range, and finally a regular copy. The copy replaces
+    dst rather than overwriting it in place, and keeps the source's timestamps.
+    
+    Parameters:
+    - src: Source file path
+    - dst: Destination file path
+    - link: Allow hard-linking dst to src (the output then shares the source
+      file, so editing the source in place also changes the output)
+    """
+    temp_path = f"{dst}.{os.getpid()}.tmp"
+    try:
+        if link:
+            try:
+                os.link(src, temp_path)
+                os.replace(temp_path, dst)
+                return
+            except OSError:
+                if os.path.lexists(temp_path):
+                    os.remove(temp_path)
+        
+        with open(src, 'rb') as fsrc, open(temp_path, 'wb') as fdst:
+            if not _fast_copy(fsrc, fdst):
+                shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+        shutil.copystat(src, temp_path)
+        os.replace(temp_path, dst)
+    except BaseException:
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+        raise
+
+# ioctl request for a copy-on-write clone on Linux (btrfs, XFS, ...)
+_FICLONE = 0x40049409
+
+def _fast_copy(fsrc, fdst):
+    """
+    Copy between open files inside the kernel, if the platform supports it.
+    
+    Returns:
+    - True if the file was copied, False if a regular copy is needed
+    """
+    if fcntl is not None and sys.platform.startswith('linux'):
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            return True
+        except OSError:
+            pass
+    
+    if hasattr(os, 'copy_file_range'):
+        try:
+            size = os.fstat(fsrc.fileno()).st_size
+            copied = 0
+            while copied < size:
+                count = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - copied)
+                if count == 0:
+                    break
+                copied += count
+            if copied == size:
+                return True
+        except OSError:
+            pass
+        # Start again from the beginning with a regular copy
+        fsrc.seek(0)
+        fdst.seek(0)
+        fdst.truncate()
+    
+    return False
+
+def files_match(src, dst, src_stat, dst_stat, checksum=False):
+    """
+    Check whether a destination file is an up-to-date copy of a source file.
+    
+    Parameters:
+    - src: Source file path
+    - dst: Destination file path
+    - src_stat: os.stat result of the source
+    - dst_stat: os.stat result of the destination
+    - checksum: Compare contents when the size matches but the mtime does not
+    
+    Returns:
+    - True if the destination does not need to be copied again
+    """
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
+    if not checksum:
+        return False
+    
+    from simple_ssg.utils.manifest import hash_file
+    if hash_file(src) != hash_file(dst):
+        return False
+    
+    # Same content: record the source mtime so the next check is a stat
+    os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return True
+
+def sync_tree(src, dst, checksum=False, link=False, stats=None, names=None, keep_suffixes=()):
+    """
+    Make dst an exact copy of src, copying only new or changed files.
+    
+    Files are compared by size and modification time (and by content with
+    checksum). Files and directories in dst that are not in src are removed.
+    
+    Parameters:
+    - src: Source directory
+    - dst: Destination directory
+    - checksum: Compare file contents when only the mtime differs
+    - link: Hard-link files instead of copying them (see clone_file)
+    - stats: Statistics dictionary to update (see new_sync_stats)
+    - names: Dictionary mapping source file paths to the file names to use
+      in dst (files not in it keep their name)
+    - keep_suffixes: Suffixes of files derived from synced files (such as
+      compressed variants) that are kept next to them
+    
+    Returns:
+    - Statistics dictionary
+    """
+    if stats is None:
+        stats = new_sync_stats()
+    
+    if os.path.lexists(dst) and not os.path.isdir(dst):
+        os.remove(dst)
+    os.makedirs(dst, exist_ok=True)
+    
+    existing = {entry.name: entry for entry in os.scandir(dst)}
+    
+    for entry in os.scandir(src):
+        if entry.is_dir():
+            target = os.path.join(dst, entry.name)
+            current = existing.pop(entry.name, None)
+            if current is not None and not current.is_dir(follow_symlinks=False):
+                os.remove(target)
+            sync_tree(entry.path, target, checksum, link, stats, names, keep_suffixes)
+            continue
+        
+        name = names.get(entry.path, entry.name) if names else entry.name
+        target = os.path.join(dst, name)
+        current = existing.pop(name, None)
+        for suffix in keep_suffixes:
+            existing.pop(name + suffix, None)
+        
+        src_stat = entry.stat()
+        if current is not None:
+            if current.is_dir(follow_symlinks=False):
+                shutil.rmtree(target)
+            elif files_match(entry.path, target, src_stat, current.stat(follow_symlinks=False), checksum):
+                stats['skipped'] += 1
+                stats['bytes_skipped'] += src_stat.st_size
+                continue
+        
+        clone_file(entry.path, target, link)
+        stats['copied'] += 1
+        stats['bytes_copied'] += src_stat.st_size
+    
+    # Whatever is left no longer exists in the source
+    for name, entry in existing.items():
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path)
+        else:
+            os.remove(entry.path)
+        stats['removed'] += 1
+    
+    return stats
+
+def format_size(size):
+    """Format a byte count for display."""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+def copy_static_assets(static_dirs, output_dir, checksum=False, link=False, names=None,
+                       keep_suffixes=()):
+    """
+    Sync static assets to the output directory.
+    
+    Only new or changed files are copied, and files removed from a static
+    directory are removed from the output.
     
     Parameters:
     - static_dirs: List of static directories to copy
     - output_dir: Output directory
+    - checksum: Compare file contents when only the mtime differs
+    - link: Hard-link files instead of copying them
+    - names: Dictionary mapping source file paths to output file names
+    - keep_suffixes: Suffixes of derived files kept next to synced files
+    
+    Returns:
+    - Statistics dictionary with copied, skipped and removed file counts and
+      bytes_copied and bytes_skipped totals
     """
+    total = new_sync_stats()
+    
     for static_dir in static_dirs:
         if os.path.exists(static_dir):
-            dir_name = os.path.basename(static_dir)
+            dir_name = os.path.basename(os.path.normpath(static_dir))
             try:
                 output_path = os.path.join(output_dir, dir_name)
-                if os.path.exists(output_path):
-                    shutil.rmtree(output_path)
-                shutil.copytree(static_dir, output_path)
-                print(f"Copied {static_dir} to {output_path}")
+                stats = sync_tree(static_dir, output_path, checksum, link,
+                                  names=names, keep_suffixes=keep_suffixes)
+                for key, value in stats.items():
+                    total[key] += value
+                logger.info(f"Synced {static_dir} to {output_path}: "
+                            f"{stats['copied']} copied ({format_size(stats['bytes_copied'])}), "
+                            f"{stats['skipped']} unchanged ({format_size(stats['bytes_skipped'])}), "
+                            f"{stats['removed']} removed")
             except Exception as e:
-                print(f"Error copying {static_dir}: {str(e)}")
+                logger.error(f"Error copying {static_dir}: {str(e)}")
         else:
-            print(f"Warning: Static directory {static_dir} does not exist. Skipping.")
+            logger.warning(f"Warning: Static directory {static_dir} does not exist. Skipping.")
+    
+    return total
 
 def get_relative_path(path, base_path):
     """
@@ -0,0 +1,171 @@
+"""
+Internal link checking for Simple-SSG.
+
+Collects every href and src of the site's HTML pages, resolves the internal
+ones against the output directory and reports the targets that do not
+exist, grouped by the page that refers to them. Each distinct target is
+checked once, and pages and targets are processed on a pool of threads.
+"""
+
+import logging
+import os
+import posixpath
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_PATTERN = re.compile(
+    r'''\s(?:href|src)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''', re.IGNORECASE)
+
+# URL schemes (http:, mailto:, data:, ...) mark references that are not checked
+SCHEME_PATTERN = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.-]*:')
+
+def extract_references(html):
+    """
+    Get the href and src values of an HTML page.
+
+    Parameters:
+    - html: HTML content
+
+    Returns:
+    - List of distinct references, in order of appearance
+    """
+    references = {}
+    for match in REFERENCE_PATTERN.finditer(html):
+        reference = match.group(1) or match.group(2) or match.group(3)
+        if reference:
+            references[reference] = None
+    return list(references)
+
+def resolve_reference(reference, page_dir):
+    """
+    Map an internal reference to a path in the site.
+
+    Parameters:
+    - reference: href or src value
+    - page_dir: Directory of the referring page relative to the output
+      directory, with forward slashes ('' for the top level)
+
+    Returns:
+    - Path relative to the output directory ('..' for a target outside it),
+      or None for references that are not checked (external URLs, fragments)
+    """
+    path = reference.strip().split('#', 1)[0].split('?', 1)[0]
+    if not path or path.startswith('//') or SCHEME_PATTERN.match(path):
+        return None
+
+    path = unquote(path)
+    if path.startswith('/'):
+        target = posixpath.normpath(path).lstrip('/')
+    else:
+        target = posixpath.normpath(posixpath.join(page_dir, path))
+
+    if target == '..' or target.startswith('../'):
+        return '..'
+    if target == '.':
+        target = ''
+    if path.endswith('/'):
+        target = posixpath.join(target, 'index.html')
+    return target
+
+def target_exists(output_dir, target):
+    """Check whether a resolved reference points at a file (or a directory index)."""
+    if target == '..':
+        return False
+    path = os.path.join(output_dir, *target.split('/'))
+    return os.path.isfile(path) or os.path.isfile(os.path.join(path, 'index.html'))
+
+def _in_batches(function, items, executor, workers):
+    """Apply a function to items on a thread pool, a batch of items per task."""
+    size = max(1, len(items) // (workers * 4))
+    batches = [items[i:i + size] for i in range(0, len(items), size)]
+    for results in executor.map(lambda batch: [function(item) for item in batch], batches):
+        yield from results
+
+def find_html_pages(output_dir):
+    """List the HTML pages of the output directory (paths relative to it)."""
+    pages = []
+    for root, _, files in os.walk(output_dir):
+        for name in files:
+            if name.endswith('.html'):
+                pages.append(os.path.relpath(os.path.join(root, name), output_dir).replace(os.sep, '/'))
+    return pages
+
+def _read_references(output_dir, page_path):
+    with open(os.path.join(output_dir, page_path), 'r', encoding='utf-8', errors='replace') as f:
+        return extract_references(f.read())
+
+def check_links(output_dir, page_references=None, workers=None):
+    """
+    Find internal references that point at missing files.
+
+    Parameters:
+    - output_dir: Output directory
+    - page_references: Dictionary mapping page paths (relative to the output
+      directory) to their references, or to None for pages that have to be
+      read from disk. By default every HTML page in the output is read.
+    - workers: Number of threads (default: a few per CPU)
+
+    Returns:
+    - Dictionary mapping page paths to their broken references
+    """
+    output_dir = os.path.abspath(output_dir)
+    if page_references is None:
+        page_references = dict.fromkeys(find_html_pages(output_dir))
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Read the pages the build did not keep in memory
+        unread = [page for page, references in page_references.items() if references is None]
+        page_references = dict(page_references)
+        read = _in_batches(lambda page: _read_references(output_dir, page), unread, executor, workers)
+        for page, references in zip(unread, read):
+            page_references[page] = references
+
+        # Resolve every reference (pages in one directory share the work),
+        # then test each distinct target once
+        resolved = {}
+        cache = {}
+        for page, references in page_references.items():
+            page_dir = posixpath.dirname(page)
+            pairs = []
+            for reference in references:
+                key = (page_dir, reference)
+                target = cache.get(key, cache)
+                if target is cache:
+                    target = cache[key] = resolve_reference(reference, page_dir)
+                if target is not None:
+                    pairs.append((reference, target))
+            resolved[page] = pairs
+
+        targets = list({target for pairs in resolved.values() for _, target in pairs})
+        exists = dict(zip(targets, _in_batches(lambda target: target_exists(output_dir, target),
+                                               targets, executor, workers)))
+
+    broken = {}
+    for page in sorted(resolved):
+        missing = [reference for reference, target in resolved[page] if not exists[target]]
+        if missing:
+            broken[page] = missing
+    return broken
+
+def print_link_report(broken, checked):
+    """
+    Log the broken references grouped by page.
+
+    Parameters:
+    - broken: Result of check_links
+    - checked: Number of pages checked
+    """
+    if not broken:
+        logger.info(f"Checked links of {checked} page(s): no broken links")
+        return
+
+    total = sum(len(references) for references in broken.values())
+    lines = [f"Found {total} broken link(s) in {len(broken)} of {checked} page(s):"]
+    for page, references in broken.items():
+        lines.append(f"  {page}")
+        lines.extend(f"    - {reference}" for reference in references)
+    logger.warning('\n'.join(lines), extra={'broken_links': broken})
@@ -0,0 +1,151 @@
+"""
+Logging for Simple-SSG.
+
+Every module logs through a logger named after it (simple_ssg.builder,
+simple_ssg.enhancers.seo, ...), so applications that use Simple-SSG as a
+library decide what is shown. The command line calls configure_logging:
+
+- normal: progress and results (INFO), with one aggregate progress line
+  every few seconds instead of one line per page
+- --verbose: also one line per page and other details (DEBUG)
+- --quiet: only warnings and errors
+
+An optional JSON-lines sink receives every record, including the DEBUG
+ones, with its level, logger name and any structured fields.
+"""
+
+import json
+import logging
+import sys
+import time
+
+ROOT_LOGGER = 'simple_ssg'
+
+QUIET = -1
+NORMAL = 0
+VERBOSE = 1
+
+# Seconds between aggregate progress lines
+PROGRESS_INTERVAL = 2.0
+
+# Attributes of every LogRecord; anything else was passed in `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message'}
+
+class StdoutHandler(logging.StreamHandler):
+    """Write log records to whatever sys.stdout is when they are emitted."""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format a log record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            'time': round(record.created, 3),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def configure_logging(verbosity=NORMAL, json_path=None):
+    """
+    Show the log of Simple-SSG on stdout.
+
+    Parameters:
+    - verbosity: QUIET (warnings and errors), NORMAL (progress and results)
+      or VERBOSE (also one line per page)
+    - json_path: Optional path of a file that receives every record as a
+      line of JSON, whatever the verbosity
+
+    Returns:
+    - The simple_ssg logger
+    """
+    logger = logging.getLogger(ROOT_LOGGER)
+    for handler in list(logger.handlers):
+        if getattr(handler, '_simple_ssg', False):
+            logger.removeHandler(handler)
+            handler.close()
+
+    console = StdoutHandler()
+    console.setLevel({QUIET: logging.WARNING, VERBOSE: logging.DEBUG}.get(verbosity, logging.INFO))
+    console.setFormatter(logging.Formatter('%(message)s'))
+    handlers = [console]
+
+    if json_path:
+        sink = logging.FileHandler(json_path, mode='w', encoding='utf-8')
+        sink.setLevel(logging.DEBUG)
+        sink.setFormatter(JsonLinesFormatter())
+        handlers.append(sink)
+
+    for handler in handlers:
+        handler._simple_ssg = True
+        logger.addHandler(handler)
+    logger.setLevel(min(handler.level for handler in handlers))
+    logger.propagate = False
+    return logger
+
+class Progress:
+    """
+    Log how far a long task has got, as one line every few seconds.
+    """
+
+    def __init__(self, logger, total, noun='pages', interval=PROGRESS_INTERVAL):
+        """
+        Parameters:
+        - logger: Logger to log the progress lines to (at INFO)
+        - total: Number of items the task will process
+        - noun: What the items are called in the progress lines
+        - interval: Minimum number of seconds between progress lines
+        """
+        self.logger = logger
+        self.total = total
+        self.noun = noun
+        self.interval = interval
+        self.done = 0
+        self.errors = 0
+        self.start = time.perf_counter()
+        self.next_report = self.start + interval
+
+    def update(self, errors=0):
+        """Count a processed item (and whether it failed), logging a line when one is due."""
+        self.done += 1
+        self.errors += errors
+        now = time.perf_counter()
+        if now >= self.next_report:
+            self.next_report = now + self.interval
+            self.report(now)
+
+    def finish(self):
+        """Log the final line."""
+        self.report(time.perf_counter(), final=True)
+
+    def report(self, now, final=False):
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        elapsed = now - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        errors = f", {self.errors} error(s)" if self.errors else ''
+        if final:
+            self.logger.info(f"Rendered {self.done} {self.noun} in {elapsed:.2f}s "
+                             f"({rate:.0f}/s){errors}",
+                             extra={'progress': self.done, 'total': self.total})
+        else:
+            percent = self.done * 100 // self.total if self.total else 100
+            self.logger.info(f"Rendered {self.done}/{self.total} {self.noun} ({percent}%, "
+                             f"{rate:.0f}/s){errors}",
+                             extra={'progress': self.done, 'total': self.total})
@@ -0,0 +1,167 @@
+"""
+Build manifest handling for incremental builds in Simple-SSG.
+
+The manifest lives in the output directory and records, for every rendered
+page, the hash of its source, the hashes of the inputs it was rendered with
+and the hash of the output that was written.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = '.simple-ssg-manifest.json'
+MANIFEST_VERSION = 1
+
+# Configuration options that change the HTML rendered for a page
+RENDER_CONFIG_KEYS = (
+    'content_dir',
+    'minify',
+    'wrap_sections',
+    'h1_section_class',
+    'h2_section_class',
+    'section_classes',
+    'nest_sections',
+    'content_placeholder',
+    'title_placeholder',
+    'description_placeholder',
+    'image_path_replacements',
+    'base_url',
+)
+
+def hash_bytes(data):
+    """
+    Hash a byte string.
+
+    Parameters:
+    - data: Bytes to hash
+
+    Returns:
+    - Hex digest of the data
+    """
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path):
+    """
+    Hash the contents of a file.
+
+    Parameters:
+    - path: Path to the file
+
+    Returns:
+    - Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_value(value):
+    """Hash a JSON-serializable value in a stable way."""
+    return hash_bytes(json.dumps(value, sort_keys=True, default=str).encode('utf-8'))
+
+def compute_input_hashes(config):
+    """
+    Compute the hashes of the inputs shared by every page.
+
+    Parameters:
+    - config: Configuration object
+
+    Returns:
+    - Dictionary with template, config, markdown extension and asset table hashes
+    """
+    from simple_ssg import __version__
+    from simple_ssg.enhancers.assets import get_asset_table
+
+    config_subset = {key: getattr(config, key, None) for key in RENDER_CONFIG_KEYS}
+    config_subset['version'] = __version__
+
+    return {
+        'template': hash_file(config.template_path),
+        'config': hash_value(config_subset),
+        'extensions': hash_value(config.markdown_extensions),
+        'assets': hash_value(get_asset_table()),
+    }
+
+def manifest_path(output_dir):
+    """Get the path of the manifest file for an output directory."""
+    return os.path.join(output_dir, MANIFEST_NAME)
+
+def load_manifest(output_dir):
+    """
+    Load the manifest from an output directory.
+
+    Parameters:
+    - output_dir: Output directory
+
+    Returns:
+    - Manifest dictionary, or None if it is missing or invalid
+    """
+    path = manifest_path(output_dir)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Warning: Ignoring unreadable build manifest {path}: {str(e)}")
+        return None
+
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return None
+    if not isinstance(manifest.get('pages'), dict):
+        return None
+
+    return manifest
+
+def new_manifest():
+    """Create an empty manifest."""
+    return {'version': MANIFEST_VERSION, 'pages': {}}
+
+def save_manifest(output_dir, manifest):
+    """
+    Write the manifest to an output directory.
+
+    Parameters:
+    - output_dir: Output directory
+    - manifest: Manifest dictionary
+    """
+    path = manifest_path(output_dir)
+    temp_path = path + '.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, sort_keys=True, separators=(',', ':'))
+        os.replace(temp_path, path)
+    except Exception as e:
+        logger.error(f"Error writing build manifest: {str(e)}")
+
+def page_is_current(entry, source_hash, inputs, output_dir):
+    """
+    Check whether a manifest entry is still up to date.
+
+    Parameters:
+    - entry: Manifest entry for the page (or None)
+    - source_hash: Hash of the current source file
+    - inputs: Current input hashes from compute_input_hashes
+    - output_dir: Output directory
+
+    Returns:
+    - True if the page does not need to be rendered again
+    """
+    if not entry:
+        return False
+    if entry.get('source_hash') != source_hash or entry.get('inputs') != inputs:
+        return False
+
+    # The output must still be the file this build wrote
+    try:
+        output_stat = os.stat(os.path.join(output_dir, entry.get('output', '')))
+    except OSError:
+        return False
+    return (output_stat.st_size == entry.get('output_size')
+            and output_stat.st_mtime_ns == entry.get('output_mtime'))
@@ -0,0 +1,249 @@
+"""
+Streaming pipelines for Simple-SSG.
+
+A pipeline runs items through a chain of stages. Each stage runs in its own
+thread and hands its results to the next stage through a bounded queue, so
+a stage that reads or writes files overlaps with the stages that use the
+CPU, and a slow stage holds back the ones before it instead of letting
+their results pile up in memory. Items come out in the order they went in.
+
+For every stage the pipeline records how many items it handled and how
+long it was busy (not waiting for input or for room in its output queue),
+and for every queue how full it was when items were added to it. A stage
+that is busy all the time with a full queue in front of it is the
+bottleneck.
+
+A pipeline can also run without threads, with every stage working in the
+thread that consumes the results. That gives up the overlap, but lets a
+profiler of that thread (cProfile only profiles the thread that enabled
+it) see the work of every stage.
+"""
+
+import queue
+import threading
+import time
+
+# Items a queue between two stages can hold
+DEFAULT_CAPACITY = 64
+
+# Seconds a blocked stage waits before checking whether the pipeline stopped
+_POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+class _Stopped(Exception):
+    """Raised in a stage thread when the consumer stopped the pipeline."""
+
+class _Failure:
+    """An unexpected error in a stage, passed on to the consumer."""
+
+    def __init__(self, error):
+        self.error = error
+
+class Pipeline:
+    """
+    A chain of stages connected by bounded queues.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, threads=True):
+        """
+        Parameters:
+        - capacity: Number of items each queue between stages can hold
+        - threads: Run each stage in its own thread; with False the stages
+          run one after the other in the thread that consumes the results
+        """
+        self.capacity = max(1, capacity)
+        self.threads = threads
+        self.stages = []
+        self.stats = {}
+
+    def add_stage(self, name, function):
+        """
+        Add a stage that maps each item to one result.
+
+        Parameters:
+        - name: Name of the stage in the statistics
+        - function: Function called with each item
+        """
+        return self.add_stream_stage(name, lambda items: map(function, items))
+
+    def add_stream_stage(self, name, transform):
+        """
+        Add a stage that turns the stream of items into a stream of results,
+        e.g. by handing them to a pool of processes.
+
+        Parameters:
+        - name: Name of the stage in the statistics
+        - transform: Function that takes an iterator of items and returns an
+          iterator of results, one per item and in the same order
+        """
+        self.stages.append((name, transform))
+        return self
+
+    def run(self, items):
+        """
+        Run items through the stages.
+
+        Parameters:
+        - items: Iterable of items for the first stage
+
+        Returns:
+        - Iterator of the results of the last stage. The statistics are in
+          `stats` once it is exhausted or closed.
+        """
+        if not self.threads:
+            return self._run_serial(items)
+        return self._run_threaded(items)
+
+    def _run_threaded(self, items):
+        stop = threading.Event()
+        outputs = [queue.Queue(self.capacity) for _ in self.stages]
+        inputs = [iter(items)] + outputs[:-1]
+        start = time.perf_counter()
+        stage_stats = {name: {'items': 0, 'wait': 0.0, 'end': start} for name, _ in self.stages}
+        queue_stats = {name: {'puts': 0, 'depth': 0, 'max_depth': 0} for name, _ in self.stages}
+
+        threads = []
+        for (name, transform), source, output in zip(self.stages, inputs, outputs):
+            thread = threading.Thread(
+                target=self._run_stage, name=f'simple-ssg-{name}', daemon=True,
+                args=(transform, source, output, stop, stage_stats[name], queue_stats[name]))
+            thread.start()
+            threads.append(thread)
+
+        try:
+            while True:
+                item = outputs[-1].get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            self.stats = self._summarize(start, time.perf_counter(), stage_stats, queue_stats)
+
+    def _run_stage(self, transform, source, output, stop, stats, output_stats):
+        """Run one stage in its thread until its input is exhausted or the pipeline stops."""
+        failures = []
+
+        def take():
+            while True:
+                waited = time.perf_counter()
+                item = self._get(source, stop)
+                stats['wait'] += time.perf_counter() - waited
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    # An earlier stage failed: finish the items before it, then pass it on
+                    failures.append(item)
+                    return
+                yield item
+
+        try:
+            try:
+                for result in transform(take()):
+                    waited = time.perf_counter()
+                    self._put(output, result, stop, output_stats)
+                    stats['wait'] += time.perf_counter() - waited
+                    stats['items'] += 1
+            except _Stopped:
+                raise
+            except Exception as e:
+                failures.append(_Failure(e))
+            self._put(output, failures[0] if failures else _DONE, stop)
+        except _Stopped:
+            pass
+        finally:
+            stats['end'] = time.perf_counter()
+
+    def _get(self, source, stop):
+        """Take the next item from a queue (or the iterator of the first stage)."""
+        if not isinstance(source, queue.Queue):
+            return next(source, _DONE)
+        while True:
+            try:
+                return source.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if stop.is_set():
+                    raise _Stopped()
+
+    def _put(self, output, item, stop, stats=None):
+        """Add an item to a queue, waiting while it is full."""
+        if stats is not None:
+            depth = output.qsize()
+            stats['puts'] += 1
+            stats['depth'] += depth
+            stats['max_depth'] = max(stats['max_depth'], depth)
+        while True:
+            try:
+                output.put(item, timeout=_POLL_INTERVAL)
+                return
+            except queue.Full:
+                if stop.is_set():
+                    raise _Stopped()
+
+    def _run_serial(self, items):
+        """Run the stages in the calling thread, each pulling items from the one before it."""
+        start = time.perf_counter()
+        # Seconds spent getting each stage's results, including the stages before it
+        totals = {name: 0.0 for name, _ in self.stages}
+        counts = {name: 0 for name, _ in self.stages}
+
+        def timed(name, results):
+            while True:
+                started = time.perf_counter()
+                try:
+                    result = next(results)
+                except StopIteration:
+                    return
+                finally:
+                    totals[name] += time.perf_counter() - started
+                counts[name] += 1
+                yield result
+
+        stream = iter(items)
+        for name, transform in self.stages:
+            stream = timed(name, iter(transform(stream)))
+        try:
+            yield from stream
+        finally:
+            stream.close()
+            stage_stats = {}
+            upstream = 0.0
+            for name, _ in self.stages:
+                # Time in earlier stages is counted as waiting for input
+                stage_stats[name] = {'items': counts[name], 'wait': upstream,
+                                     'end': start + totals[name]}
+                upstream = totals[name]
+            queue_stats = {name: {'puts': 0, 'depth': 0, 'max_depth': 0} for name, _ in self.stages}
+            self.stats = self._summarize(start, time.perf_counter(), stage_stats, queue_stats)
+
+    def _summarize(self, start, end, stage_stats, queue_stats):
+        elapsed = end - start
+        stages = {}
+        for name, stats in stage_stats.items():
+            busy = max(0.0, stats['end'] - start - stats['wait'])
+            stages[name] = {
+                'items': stats['items'],
+                'busy': round(busy, 6),
+                'utilization': round(busy / elapsed, 3) if elapsed > 0 else 0.0,
+            }
+        queues = {}
+        for name, stats in queue_stats.items():
+            queues[name] = {
+                'capacity': self.capacity,
+                'max_depth': stats['max_depth'],
+                'mean_depth': round(stats['depth'] / stats['puts'], 2) if stats['puts'] else 0.0,
+            }
+        return {'elapsed': round(elapsed, 6), 'stages': stages, 'queues': queues}
+
+def format_pipeline_stats(stats):
+    """Format pipeline statistics as 'read 12% busy, ...; queues (max/capacity) read 3/64, ...'."""
+    stages = ', '.join(f"{name} {values['utilization']:.0%} busy"
+                       for name, values in stats['stages'].items())
+    queues = ', '.join(f"{name} {values['max_depth']}/{values['capacity']}"
+                       for name, values in stats['queues'].items())
+    return f"{stages}; queue depth (max/capacity): {queues}"
@@ -0,0 +1,233 @@
+"""
+Atomic output publishing for Simple-SSG.
+
+With atomic publishing, every build is written to its own directory next to
+the output directory, and output_dir itself is a symlink to the live build:
+
+    build -> .build-builds/20250101-120000-000000
+    .build-builds/
+        20250101-110000-000000/   (previous build, kept for rollback)
+        20250101-120000-000000/   (live build)
+
+A build only becomes live once it has finished without errors, by replacing
+the symlink in a single rename. A new build starts as a hard-linked copy of
+the previous one and every output is written by replacing its file, never in
+place, so unchanged files stay shared with the previous build and keeping
+several builds costs little disk space.
+"""
+
+import copy
+import logging
+import os
+import shutil
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+def get_builds_dir(output_dir):
+    """Get the directory holding the builds for an output directory."""
+    output_dir = os.path.abspath(output_dir)
+    parent, name = os.path.split(output_dir)
+    return os.path.join(parent, f'.{name}-builds')
+
+def get_live_build(output_dir):
+    """
+    Get the build directory that output_dir currently points to.
+
+    Parameters:
+    - output_dir: Output directory (symlink)
+
+    Returns:
+    - Path of the live build, or None if output_dir is not a published build
+    """
+    if not os.path.islink(output_dir):
+        return None
+    return os.path.realpath(output_dir)
+
+def list_builds(output_dir):
+    """
+    List the kept builds, oldest first.
+
+    Parameters:
+    - output_dir: Output directory
+
+    Returns:
+    - List of build directory paths
+    """
+    builds_dir = get_builds_dir(output_dir)
+    if not os.path.isdir(builds_dir):
+        return []
+    return [os.path.join(builds_dir, name) for name in sorted(os.listdir(builds_dir))
+            if not name.endswith('.tmp') and os.path.isdir(os.path.join(builds_dir, name))]
+
+def link_tree(src, dst):
+    """
+    Recreate a directory tree using hard links, copying where linking fails.
+
+    Parameters:
+    - src: Source directory
+    - dst: Destination directory (created if needed)
+    """
+    for root, dirs, files in os.walk(src):
+        target_root = os.path.join(dst, os.path.relpath(root, src))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            source = os.path.join(root, name)
+            target = os.path.join(target_root, name)
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+
+def begin_staging(config):
+    """
+    Create a staging directory for a new build.
+
+    The staging directory starts as a hard-linked copy of the live build.
+    Outputs whose bytes did not change are left alone (see write_if_changed),
+    so they stay linked; changed ones are replaced with new files, which
+    leaves the live build as it was. Files of the live build that the new
+    build does not produce are removed by the builder.
+
+    Parameters:
+    - config: Configuration object
+
+    Returns:
+    - Copy of the configuration whose output_dir is the staging directory
+    """
+    builds_dir = get_builds_dir(config.output_dir)
+    os.makedirs(builds_dir, exist_ok=True)
+
+    build_id = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    staging_dir = os.path.join(builds_dir, f'{build_id}.tmp')
+
+    previous = get_live_build(config.output_dir)
+    if previous is None and os.path.isdir(config.output_dir):
+        previous = config.output_dir
+
+    os.makedirs(staging_dir)
+    if previous:
+        link_tree(previous, staging_dir)
+
+    staging_config = copy.copy(config)
+    staging_config.output_dir = staging_dir
+    return staging_config
+
+def publish_build(staging_dir, config):
+    """
+    Make a finished staging directory the live build.
+
+    Parameters:
+    - staging_dir: Staging directory returned by begin_staging
+    - config: Configuration object (with the real output_dir)
+
+    Returns:
+    - Path of the published build
+    """
+    output_dir = os.path.abspath(config.output_dir)
+    build_dir = staging_dir[:-len('.tmp')] if staging_dir.endswith('.tmp') else staging_dir
+    os.rename(staging_dir, build_dir)
+
+    # A plain output directory from a non-atomic build becomes the first old build
+    if os.path.isdir(output_dir) and not os.path.islink(output_dir):
+        legacy_dir = os.path.join(get_builds_dir(output_dir), '00000000-000000-000000')
+        if os.path.exists(legacy_dir):
+            shutil.rmtree(legacy_dir)
+        # Swap the directory for a link to the new build in one step where
+        # possible, so the served path never disappears
+        temp_link = _make_temp_link(output_dir, build_dir)
+        if exchange_paths(temp_link, output_dir):
+            os.rename(temp_link, legacy_dir)
+        else:
+            os.remove(temp_link)
+            os.rename(output_dir, legacy_dir)
+            switch_build(output_dir, build_dir)
+    else:
+        switch_build(output_dir, build_dir)
+
+    prune_builds(output_dir, config.keep_builds)
+    logger.info(f"Published build {os.path.basename(build_dir)}")
+    return build_dir
+
+def switch_build(output_dir, build_dir):
+    """Point output_dir at a build directory with a single atomic rename."""
+    output_dir = os.path.abspath(output_dir)
+    os.replace(_make_temp_link(output_dir, build_dir), output_dir)
+
+def _make_temp_link(output_dir, build_dir):
+    """Create a symlink to a build next to output_dir, to be renamed over it."""
+    temp_link = f'{output_dir}.tmp-link'
+    if os.path.lexists(temp_link):
+        os.remove(temp_link)
+    os.symlink(os.path.relpath(build_dir, os.path.dirname(output_dir)), temp_link)
+    return temp_link
+
+def exchange_paths(first, second):
+    """
+    Swap two paths in a single step, with Linux's renameat2(RENAME_EXCHANGE).
+
+    A rename cannot replace a directory with a symlink, but an exchange can
+    swap them.
+
+    Parameters:
+    - first: Path of a file, directory or symlink
+    - second: Path of another one, on the same file system
+
+    Returns:
+    - True if the paths were swapped, False if the system or file system
+      does not support it
+    """
+    try:
+        import ctypes
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (AttributeError, OSError, TypeError):
+        return False
+    at_fdcwd, rename_exchange = -100, 2
+    return renameat2(at_fdcwd, os.fsencode(first), at_fdcwd, os.fsencode(second),
+                     rename_exchange) == 0
+
+def discard_staging(staging_dir):
+    """Remove the staging directory of a failed build."""
+    if os.path.isdir(staging_dir):
+        shutil.rmtree(staging_dir)
+
+def prune_builds(output_dir, keep):
+    """
+    Remove old builds, keeping the live build and the `keep` newest others.
+
+    Parameters:
+    - output_dir: Output directory
+    - keep: Number of previous builds to keep
+    """
+    live = get_live_build(output_dir)
+    old_builds = [path for path in list_builds(output_dir) if os.path.realpath(path) != live]
+    for path in old_builds[:max(0, len(old_builds) - keep)]:
+        shutil.rmtree(path, ignore_errors=True)
+
+def rollback(output_dir, steps=1):
+    """
+    Point output_dir back at an earlier build.
+
+    Parameters:
+    - output_dir: Output directory
+    - steps: How many builds to go back
+
+    Returns:
+    - Path of the build that is now live, or None if there is nothing to roll back to
+    """
+    live = get_live_build(output_dir)
+    builds = list_builds(output_dir)
+    real_builds = [os.path.realpath(path) for path in builds]
+
+    if live not in real_builds:
+        logger.error(f"Error: {output_dir} is not a published build.")
+        return None
+
+    index = real_builds.index(live) - steps
+    if index < 0:
+        logger.error("Error: No earlier build to roll back to.")
+        return None
+
+    switch_build(output_dir, builds[index])
+    logger.info(f"Rolled back to build {os.path.basename(builds[index])}")
+    return builds[index]
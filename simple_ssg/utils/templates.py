@@ -2,75 +2,216 @@
 Template handling utilities for Simple-SSG.
 """
 
+import logging
 import os
 import re
-from simple_ssg.enhancers.seo import update_meta_tags
+from simple_ssg.enhancers.assets import rewrite_asset_references
 
-def inject_content(content, content_path, config):
+logger = logging.getLogger(__name__)
+
+# Meta tags rewritten per page; each slot keeps its template text when the page
+# has no value for it. The patterns match the ones used by update_meta_tags.
+_META_SLOT_PATTERN = re.compile(
+    r'(?P<title><title>.*?</title>)'
+    r'|(?P<description><meta name="description" content="[^"]*")'
+    r'|(?P<og_title><meta property="og:title" content="[^"]*")'
+    r'|(?P<og_description><meta property="og:description" content="[^"]*")'
+    r'|(?P<og_url><meta property="og:url" content="[^"]*")'
+    r'|(?P<twitter_title><meta name="twitter:title" content="[^"]*")'
+    r'|(?P<twitter_description><meta name="twitter:description" content="[^"]*")'
+    r'|(?P<canonical><link rel="canonical" href="[^"]*")'
+)
+
+_SLOT_NAMES = {
+    'title': 'title',
+    'description': 'description',
+    'og_title': 'og:title',
+    'og_description': 'og:description',
+    'og_url': 'og:url',
+    'twitter_title': 'twitter:title',
+    'twitter_description': 'twitter:description',
+    'canonical': 'canonical',
+}
+
+_CONTENT_FALLBACK_PATTERN = re.compile(
+    r'<div id="content-container">\s*<div class="loading">.*?</div>\s*</div>'
+)
+
+# Compiled templates for this process, keyed by template path and placeholder
+_compiled_templates = {}
+
+class CompiledTemplate:
     """
-    Inject content into the template.
-    
+    A page template split into static segments and named slots.
+
+    The template is read and scanned once; rendering a page only fills in
+    the slots (content, title, description, og:*, twitter:*, canonical)
+    and joins the pre-split strings.
+    """
+
+    def __init__(self, template, content_placeholder='<div id="content-container">'):
+        """
+        Compile a template.
+
+        Parameters:
+        - template: Template HTML
+        - content_placeholder: Opening tag of the element that receives the content
+        """
+        # List of (slot name, template text) pairs; the slot name is None for static text
+        self.parts = []
+
+        for slot, text in self._split_content(template, content_placeholder):
+            if slot:
+                self.parts.append((slot, text))
+            else:
+                self._split_meta(text)
+
+    def _split_content(self, template, placeholder):
+        """Split the template around the content placeholder."""
+        closing_div = '</div>'
+
+        if placeholder in template:
+            # Everything between the placeholder and the next closing div is replaced
+            start_pos = template.find(placeholder) + len(placeholder)
+            end_pos = template.find(closing_div, start_pos)
+
+            if end_pos == -1:
+                logger.warning("Warning: Could not find closing tag for content placeholder in template.")
+                return [(None, template)]
+
+            return [
+                (None, template[:start_pos] + '\n'),
+                ('content', ''),
+                (None, '\n' + template[end_pos:]),
+            ]
+
+        # Fallback: replace the default loading container
+        parts = []
+        last_end = 0
+        for match in _CONTENT_FALLBACK_PATTERN.finditer(template):
+            parts.append((None, template[last_end:match.start()] + '<div id="content-container">\n'))
+            parts.append(('content', ''))
+            parts.append((None, '\n</div>'))
+            last_end = match.end()
+        parts.append((None, template[last_end:]))
+        return parts
+
+    def _split_meta(self, text):
+        """Split static text around the meta tags that are rewritten per page."""
+        last_end = 0
+        for match in _META_SLOT_PATTERN.finditer(text):
+            if match.start() > last_end:
+                self.parts.append((None, text[last_end:match.start()]))
+            self.parts.append((_SLOT_NAMES[match.lastgroup], match.group(0)))
+            last_end = match.end()
+        if last_end < len(text):
+            self.parts.append((None, text[last_end:]))
+
+    def render_parts(self, content, title=None, description=None, base_url=None, page_path=None):
+        """
+        Render a page as a list of string parts.
+
+        Parameters:
+        - content: The HTML content to inject
+        - title: Page title (or None to keep the template's)
+        - description: Page description (or None to keep the template's)
+        - base_url: Base URL of the site
+        - page_path: Path of the page relative to the site root
+
+        Returns:
+        - List of strings that join to the complete page
+        """
+        values = {'content': content}
+
+        if title or description:
+            if title:
+                values['title'] = f'<title>{title}</title>'
+                values['og:title'] = f'<meta property="og:title" content="{title}"'
+                values['twitter:title'] = f'<meta name="twitter:title" content="{title}"'
+            if description:
+                values['description'] = f'<meta name="description" content="{description}"'
+                values['og:description'] = f'<meta property="og:description" content="{description}"'
+                values['twitter:description'] = f'<meta name="twitter:description" content="{description}"'
+            if base_url and page_path:
+                values['og:url'] = f'<meta property="og:url" content="{base_url}/{page_path}"'
+                values['canonical'] = f'<link rel="canonical" href="{base_url}/{page_path}"'
+
+        return [text if slot is None else values.get(slot, text) for slot, text in self.parts]
+
+    def render(self, content, title=None, description=None, base_url=None, page_path=None):
+        """Render a page as a single string (see render_parts)."""
+        return ''.join(self.render_parts(content, title, description, base_url, page_path))
+
+def compile_template(config):
+    """
+    Read and compile the template, replacing any cached copy.
+
+    Parameters:
+    - config: Configuration object
+
+    Returns:
+    - CompiledTemplate instance
+    """
+    with open(config.template_path, 'r', encoding='utf-8') as f:
+        template = CompiledTemplate(rewrite_asset_references(f.read()), config.content_placeholder)
+
+    _compiled_templates[(config.template_path, config.content_placeholder)] = template
+    return template
+
+def get_compiled_template(config):
+    """
+    Get the compiled template for a configuration, compiling it on first use.
+
+    Parameters:
+    - config: Configuration object
+
+    Returns:
+    - CompiledTemplate instance
+    """
+    template = _compiled_templates.get((config.template_path, config.content_placeholder))
+    if template is None:
+        template = compile_template(config)
+    return template
+
+def inject_content_parts(content, content_path, config):
+    """
+    Inject content into the template, returning the page as a list of parts.
+
     Parameters:
     - content: The HTML content to inject
     - content_path: Path to the original content file (for metadata extraction)
     - config: Configuration object
-    
+
     Returns:
-    - Complete HTML page with content injected
+    - List of strings that join to the complete HTML page
     """
     try:
-        # Read template
-        with open(config.template_path, 'r', encoding='utf-8') as f:
-            template = f.read()
-        
+        template = get_compiled_template(config)
+
         # Extract metadata from content
         title, description = extract_metadata(content)
         base_name = os.path.basename(content_path).replace('.md', '').replace('.html', '')
-        
-        # Replace content placeholder
-        placeholder = config.content_placeholder
-        closing_div = '</div>'
-        
-        if placeholder in template:
-            # Find the position of the placeholder
-            start_pos = template.find(placeholder)
-            
-            # Find the position of the next closing div after the placeholder
-            end_pos = template.find(closing_div, start_pos)
-            
-            # Replace everything between placeholder and closing div
-            if start_pos != -1 and end_pos != -1:
-                template = (
-                    template[:start_pos + len(placeholder)] + 
-                    f"\n{content}\n" + 
-                    template[end_pos:]
-                )
-            else:
-                print(f"Warning: Could not find closing tag for content placeholder in template.")
-                template = template.replace(placeholder + closing_div, placeholder + f"\n{content}\n" + closing_div)
-        else:
-            # Fallback: Try a regex approach
-            template = re.sub(
-                r'<div id="content-container">\s*<div class="loading">.*?</div>\s*</div>', 
-                f'<div id="content-container">\n{content}\n</div>', 
-                template
-            )
-        
-        # Update meta tags
-        if title or description:
-            template = update_meta_tags(
-                template, 
-                title, 
-                description, 
-                config.base_url, 
-                f"{base_name}.html"
-            )
-        
-        return template
-        
+
+        return template.render_parts(content, title, description,
+                                     config.base_url, f"{base_name}.html")
+
     except Exception as e:
-        print(f"Error injecting content into template: {str(e)}")
-        return f"<html><body><h1>Error</h1><p>{str(e)}</p><div>{content}</div></body></html>"
+        logger.error(f"Error injecting content into template: {str(e)}")
+        return [f"<html><body><h1>Error</h1><p>{str(e)}</p><div>{content}</div></body></html>"]
+
+def inject_content(content, content_path, config):
+    """
+    Inject content into the template.
+    
+    Parameters:
+    - content: The HTML content to inject
+    - content_path: Path to the original content file (for metadata extraction)
+    - config: Configuration object
+    
+    Returns:
+    - Complete HTML page with content injected
+    """
+    return ''.join(inject_content_parts(content, content_path, config))
 
 def extract_metadata(content):
     """
@@ -0,0 +1,211 @@
+"""
+Build timing for Simple-SSG.
+
+A build records how long each of its phases takes (setting up the output,
+copying static assets, rendering pages, the sitemap, ...) and, for every
+page, how long it took and how that time splits between reading,
+conversion, section wrapping, template injection, minification and
+writing. Each stage of a page (read, render, write) also records when it
+started and ended and on which process and thread it ran, so a trace shows
+the time pages spend waiting between stages. All times come from the
+monotonic time.perf_counter() clock, which worker processes share with the
+main process, so page timings from parallel builds line up with the
+build's own phases in a trace.
+
+With profiling, the timings are also written as a Chrome trace-event file
+(open it in chrome://tracing or https://ui.perfetto.dev), next to a
+cProfile dump of the main process.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+class PageClock:
+    """
+    Time the consecutive phases of rendering one page.
+    """
+
+    def __init__(self, phases=None):
+        """
+        Parameters:
+        - phases: Dictionary that receives the seconds spent in each phase,
+          or None to not record anything
+        """
+        self.phases = phases
+        self.start = self.last = time.perf_counter()
+
+    def lap(self, name):
+        """Attribute the time since the previous lap to a phase."""
+        now = time.perf_counter()
+        if self.phases is not None:
+            self.phases[name] = self.phases.get(name, 0.0) + now - self.last
+        self.last = now
+
+def stage_span(name, start, end=None):
+    """
+    Describe a stage of building a page that ran in the calling thread.
+
+    Parameters:
+    - name: Name of the stage
+    - start: perf_counter value when the stage started
+    - end: perf_counter value when it ended (default: now)
+
+    Returns:
+    - Dictionary with the 'name', 'start', 'end', the 'pid' and 'tid' of the
+      process and thread that ran it and the thread's name
+    """
+    thread = threading.current_thread()
+    return {'name': name, 'start': start, 'end': time.perf_counter() if end is None else end,
+            'pid': os.getpid(), 'tid': threading.get_native_id(), 'thread': thread.name}
+
+class BuildTimer:
+    """
+    Timings of one build.
+    """
+
+    def __init__(self, trace=False):
+        """
+        Parameters:
+        - trace: Keep the start and end of every phase and page for
+          write_trace
+        """
+        self.origin = time.perf_counter()
+        self.phases = {}  # build phase -> seconds
+        self.page_phases = {}  # page phase -> seconds, summed over all pages
+        self.page_times = {}  # page -> seconds
+        self.events = [] if trace else None
+        self.threads = {}  # (pid, tid) -> thread name, for the trace
+
+    @contextmanager
+    def phase(self, name):
+        """Time a phase of the build (a with block)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, start, time.perf_counter())
+
+    def add_phase(self, name, start, end):
+        """Record a phase of the build that ran from start to end (perf_counter values)."""
+        self.phases[name] = self.phases.get(name, 0.0) + end - start
+        if self.events is not None:
+            span = stage_span(name, start, end)
+            self.events.append(self._event(name, 'build', span))
+
+    def add_page(self, name, timing):
+        """
+        Record the timing of a rendered page.
+
+        Parameters:
+        - name: Name of the page in reports (its source path)
+        - timing: Dictionary with the page's 'start' (perf_counter value),
+          'seconds' of work, 'phases' (see PageClock) and 'stages' (see
+          stage_span)
+        """
+        self.page_times[name] = timing['seconds']
+        for phase, seconds in timing['phases'].items():
+            self.page_phases[phase] = self.page_phases.get(phase, 0.0) + seconds
+
+        if self.events is None:
+            return
+        for span in timing['stages']:
+            self.events.append(self._event(name, 'page', span, {'stage': span['name']}))
+            if span['name'] != 'render':
+                continue
+            # The rendering phases ran one after the other within the stage
+            start = span['start']
+            for phase, seconds in timing['phases'].items():
+                if phase in ('read', 'write'):
+                    continue
+                phase_span = dict(span, start=start, end=start + seconds)
+                self.events.append(self._event(phase, 'phase', phase_span, {'page': name}))
+                start += seconds
+
+        # The page from reading to writing, including its waits between stages
+        stages = timing['stages']
+        first, last = stages[0], stages[-1]
+        args = {'page': name, 'seconds': round(last['end'] - first['start'], 6)}
+        self.events.append(dict(self._event(name, 'latency', first, args),
+                                ph='b', id=len(self.page_times)))
+        self.events.append(dict(self._event(name, 'latency', dict(last, start=last['end'])),
+                                ph='e', id=len(self.page_times)))
+
+    def _event(self, name, category, span, args=None):
+        self.threads.setdefault((span['pid'], span['tid']), span['thread'])
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round((span['start'] - self.origin) * 1e6, 1),
+            'dur': round((span['end'] - span['start']) * 1e6, 1),
+            'pid': span['pid'],
+            'tid': span['tid'],
+        }
+        if args:
+            event['args'] = args
+        return event
+
+    def write_trace(self, path):
+        """
+        Write the recorded phases and pages as a Chrome trace-event file.
+
+        Every process and thread gets its own track: the build's phases on
+        the main thread, the read and write stages of pages on the pipeline
+        threads that ran them and the render stages on the thread or worker
+        process that rendered them. Each page's time from reading to
+        writing is an async 'latency' span, so waits between stages show.
+
+        Parameters:
+        - path: Path of the JSON file
+        """
+        main_pid = os.getpid()
+        names = [{
+            'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+            'args': {'name': 'build' if pid == main_pid else f'worker {pid}'},
+        } for pid in sorted({pid for pid, _ in self.threads})]
+        names += [{
+            'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name},
+        } for (pid, tid), name in sorted(self.threads.items())]
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': names + self.events, 'displayTimeUnit': 'ms'}, f)
+
+def start_profile():
+    """Start profiling the current process with cProfile."""
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def write_profile(prefix, profiler, timer):
+    """
+    Stop profiling and write the profile and the trace of a build.
+
+    Parameters:
+    - prefix: Path prefix of the files: <prefix>.prof (cProfile data, for
+      pstats or snakeviz) and <prefix>.trace.json (Chrome trace events)
+    - profiler: Profiler returned by start_profile
+    - timer: BuildTimer of the build, created with trace=True
+    """
+    profiler.disable()
+    try:
+        directory = os.path.dirname(prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(f"{prefix}.prof")
+        timer.write_trace(f"{prefix}.trace.json")
+        logger.info(f"Profile written to {prefix}.prof, trace to {prefix}.trace.json")
+    except Exception as e:
+        logger.error(f"Error writing profile: {str(e)}")
+
+def format_phases(phases):
+    """Format phase timings as 'name 1.23s, ...', slowest first."""
+    return ', '.join(f"{name} {seconds:.2f}s"
+                     for name, seconds in sorted(phases.items(), key=lambda item: item[1],
+                                                 reverse=True))
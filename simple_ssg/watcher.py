@@ -0,0 +1,418 @@
+"""
+Watch mode for Simple-SSG.
+
+Watches the content directory, template, config file and static directories,
+and rebuilds only the outputs affected by each change:
+
+- a content file re-renders (or removes) its own page
+- the template or config file re-renders every page
+- a static directory is synced to the output directory again
+
+Changes are detected with inotify when the optional inotify_simple package is
+installed, and by polling file stats otherwise.
+"""
+
+import logging
+import os
+import threading
+import time
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+from simple_ssg.builder import (
+    build_site, collect_site_pages, copy_index_page, get_output_path, has_index_page,
+    rebuild_pages, sync_static_assets)
+from simple_ssg.config import SiteConfig
+from simple_ssg.enhancers.compression import precompress_site
+from simple_ssg.enhancers.seo import generate_sitemap
+from simple_ssg.enhancers.server import LiveReload, create_server, open_browser_delayed
+
+logger = logging.getLogger(__name__)
+
+# Seconds between scans when polling in live-reload mode, short enough for a
+# reload within about 100 ms of a save
+LIVE_POLL_INTERVAL = 0.05
+
+class PollingWatcher:
+    """
+    Detect changes by comparing file stats between scans.
+    """
+
+    def __init__(self, dirs, files, interval=0.5):
+        """
+        Start watching.
+
+        Parameters:
+        - dirs: Directories to watch recursively
+        - files: Individual files to watch
+        - interval: Seconds between scans
+        """
+        self.dirs = [os.path.abspath(d) for d in dirs]
+        self.files = [os.path.abspath(f) for f in files]
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        """Collect (mtime, size) for every watched file."""
+        snapshot = {}
+        for directory in self.dirs:
+            self._scan_dir(directory, snapshot)
+        for path in self.files:
+            try:
+                st = os.stat(path)
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                pass
+        return snapshot
+
+    def _scan_dir(self, directory, snapshot):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    self._scan_dir(entry.path, snapshot)
+                else:
+                    st = entry.stat()
+                    snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                pass
+
+    def wait(self, timeout=None):
+        """
+        Wait for changes.
+
+        Parameters:
+        - timeout: Seconds to wait, or None to wait until something changes
+
+        Returns:
+        - Set of changed, created or deleted paths (empty on timeout)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, max(0, deadline - time.monotonic()))
+            time.sleep(delay)
+
+            snapshot = self.scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+class InotifyWatcher:
+    """
+    Detect changes with Linux inotify (requires the inotify_simple package).
+    """
+
+    def __init__(self, dirs, files):
+        """
+        Start watching.
+
+        Parameters:
+        - dirs: Directories to watch recursively
+        - files: Individual files to watch
+        """
+        self.inotify = INotify()
+        self.mask = (flags.CREATE | flags.MODIFY | flags.CLOSE_WRITE | flags.DELETE
+                     | flags.MOVED_FROM | flags.MOVED_TO | flags.ATTRIB)
+        self.paths = {}
+        self.recursive = set()
+        self.files = {os.path.abspath(f) for f in files}
+
+        for directory in dirs:
+            self._add_tree(os.path.abspath(directory))
+
+        # Editors often replace files by renaming, so watch their directories
+        for path in self.files:
+            parent = os.path.dirname(path)
+            if parent not in self.paths.values() and os.path.isdir(parent):
+                self._add_watch(parent)
+
+    def _add_watch(self, directory):
+        try:
+            wd = self.inotify.add_watch(directory, self.mask)
+            self.paths[wd] = directory
+        except OSError as e:
+            logger.warning(f"Warning: Cannot watch {directory}: {str(e)}")
+
+    def _add_tree(self, directory):
+        """Watch a directory and all of its subdirectories."""
+        created = []
+        for root, dirs, files in os.walk(directory):
+            self.recursive.add(root)
+            self._add_watch(root)
+            created.extend(os.path.join(root, name) for name in files)
+        return created
+
+    def wait(self, timeout=None):
+        """
+        Wait for changes.
+
+        Parameters:
+        - timeout: Seconds to wait, or None to wait until something changes
+
+        Returns:
+        - Set of changed, created or deleted paths (empty on timeout)
+        """
+        changed = set()
+        events = self.inotify.read(timeout=None if timeout is None else int(timeout * 1000))
+
+        for event in events:
+            directory = self.paths.get(event.wd)
+            if directory is None or not event.name:
+                continue
+            path = os.path.join(directory, event.name)
+
+            if event.mask & flags.ISDIR:
+                if event.mask & (flags.CREATE | flags.MOVED_TO) and directory in self.recursive:
+                    changed.update(self._add_tree(path))
+                changed.add(path)
+            elif directory in self.recursive or path in self.files:
+                changed.add(path)
+
+        return changed
+
+def create_watcher(dirs, files, poll_interval=0.5):
+    """
+    Create the best available watcher.
+
+    Parameters:
+    - dirs: Directories to watch recursively
+    - files: Individual files to watch
+    - poll_interval: Seconds between scans when falling back to polling
+
+    Returns:
+    - Watcher with a wait(timeout) method
+    """
+    if INotify is not None:
+        try:
+            return InotifyWatcher(dirs, files)
+        except OSError as e:
+            logger.warning(f"Warning: inotify unavailable ({str(e)}), falling back to polling.")
+    return PollingWatcher(dirs, files, poll_interval)
+
+def is_within(path, directory):
+    """Check whether a path is inside a directory."""
+    directory = os.path.abspath(directory)
+    return path == directory or path.startswith(directory + os.sep)
+
+def classify_changes(changed, config, config_file=None):
+    """
+    Map changed paths to the outputs they affect.
+
+    Parameters:
+    - changed: Set of changed absolute paths
+    - config: Configuration object
+    - config_file: Path to the config file being watched (if any)
+
+    Returns:
+    - Dictionary with 'config', 'full', 'pages', 'static' and 'index' entries
+    """
+    actions = {'config': False, 'full': False, 'pages': set(), 'static': set(), 'index': False}
+
+    for path in changed:
+        if config_file and path == os.path.abspath(config_file):
+            actions['config'] = True
+        elif path == os.path.abspath(config.template_path):
+            actions['full'] = True
+        elif config.index_path and path == os.path.abspath(config.index_path):
+            actions['index'] = True
+        elif is_within(path, config.content_dir):
+            name = os.path.basename(path)
+            if name.endswith(('.md', '.markdown')) and name != 'README.md':
+                actions['pages'].add(path)
+            elif os.path.isdir(path) or not os.path.splitext(name)[1]:
+                # A directory was added or removed: rescan the content
+                actions['full'] = True
+        else:
+            for static_dir in config.static_dirs:
+                if is_within(path, static_dir):
+                    actions['static'].add(static_dir)
+                    break
+
+    return actions
+
+def watch_site(load_config_dict, config_file=None, jobs=1, debounce=0.1, poll_interval=0.5,
+               on_start=None, on_rebuild=None):
+    """
+    Build the site, then rebuild affected outputs whenever sources change.
+
+    Parameters:
+    - load_config_dict: Callable returning the configuration dictionary
+      (called again when the config file changes)
+    - config_file: Path to the config file to watch for changes
+    - jobs: Number of worker processes used for full rebuilds
+    - debounce: Seconds without new events before a rebuild starts
+    - poll_interval: Seconds between scans when polling
+    - on_start: Optional callable receiving the configuration after the
+      first build
+    - on_rebuild: Optional callable receiving the set of changed paths after
+      each rebuild
+    """
+    config_dict = dict(load_config_dict(), incremental=True)
+    build_site(config_dict=config_dict, jobs=jobs)
+    config = SiteConfig(config_dict=config_dict)
+
+    if on_start:
+        on_start(config)
+
+    while True:
+        dirs = [config.content_dir] + [d for d in config.static_dirs if os.path.isdir(d)]
+        files = [path for path in (config.template_path, config.index_path, config_file) if path]
+        watcher = create_watcher(dirs, files, poll_interval)
+        logger.info(f"Watching for changes ({type(watcher).__name__}). Press Ctrl+C to stop.")
+
+        try:
+            while True:
+                changed = watcher.wait()
+                if not changed:
+                    continue
+
+                # Coalesce the burst of events a single save usually produces
+                first_event = time.perf_counter()
+                while True:
+                    more = watcher.wait(debounce)
+                    if not more:
+                        break
+                    changed |= more
+
+                actions = classify_changes(changed, config, config_file)
+                if actions['config']:
+                    try:
+                        config_dict = dict(load_config_dict(), incremental=True)
+                        config = SiteConfig(config_dict=config_dict)
+                    except SystemExit:
+                        logger.error("Error: Could not reload configuration, keeping the previous one.")
+                        continue
+                    actions['full'] = True
+
+                rebuild_start = time.perf_counter()
+                summary = rebuild(actions, config, config_dict, jobs)
+                finished = time.perf_counter()
+
+                if summary:
+                    logger.info(f"Rebuilt {summary} in {(finished - rebuild_start) * 1000:.0f} ms "
+                                f"(latency {(finished - first_event) * 1000:.0f} ms)")
+                    if on_rebuild:
+                        on_rebuild(changed)
+
+                if actions['config']:
+                    # The watched paths may have changed
+                    break
+        except KeyboardInterrupt:
+            logger.info("Stopped watching.")
+            return
+
+def serve_live(load_config_dict, config_file=None, port=8000, open_browser=True, jobs=1,
+               poll_interval=LIVE_POLL_INTERVAL):
+    """
+    Serve the site and reload connected browsers after every rebuild.
+
+    The site is built, then served from its output directory while sources
+    are watched. Each change re-renders only the affected outputs, and a
+    reload event is pushed to the browsers over server-sent events.
+
+    Parameters:
+    - load_config_dict: Callable returning the configuration dictionary
+    - config_file: Path to the config file to watch for changes
+    - port: Server port
+    - open_browser: Whether to open a browser
+    - jobs: Number of worker processes used for full rebuilds
+    - poll_interval: Seconds between scans when polling
+    """
+    live_reload = LiveReload()
+    servers = []
+
+    if INotify is None:
+        logger.warning(f"Warning: inotify_simple is not installed, so changes are found by scanning "
+                       f"every {poll_interval * 1000:.0f} ms. On large sites that may not keep "
+                       f"reloads within 100 ms of a save; install simple-ssg[watch] for inotify.")
+
+    def start_server(config):
+        httpd = create_server(config.output_dir, port, live_reload)
+        if httpd is None:
+            raise KeyboardInterrupt
+        servers.append(httpd)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        logger.info(f"Server started at http://localhost:{port} (live reload)")
+        if open_browser:
+            threading.Thread(target=lambda: open_browser_delayed(port), daemon=True).start()
+
+    def reload_browsers(changed):
+        live_reload.notify()
+        # Measure from the moment the changed files were saved
+        saved = [os.stat(path).st_mtime for path in changed if os.path.exists(path)]
+        if saved:
+            logger.info(f"Reload sent {(time.time() - max(saved)) * 1000:.0f} ms after save")
+
+    try:
+        # A short debounce: one save rarely produces events more than a few ms apart
+        watch_site(load_config_dict, config_file, jobs, debounce=0.02,
+                   poll_interval=poll_interval, on_start=start_server,
+                   on_rebuild=reload_browsers)
+    except KeyboardInterrupt:
+        logger.info("Server stopped")
+    finally:
+        for httpd in servers:
+            httpd.shutdown()
+            httpd.server_close()
+
+def rebuild(actions, config, config_dict, jobs=1):
+    """
+    Rebuild the outputs affected by a set of changes.
+
+    Parameters:
+    - actions: Result of classify_changes
+    - config: Configuration object
+    - config_dict: Configuration dictionary (for full rebuilds)
+    - jobs: Number of worker processes used for full rebuilds
+
+    Returns:
+    - Short description of what was rebuilt, or an empty string
+    """
+    done = []
+
+    # Changed static files get new fingerprints, which every page refers to
+    if actions['static'] and config.fingerprint_assets:
+        actions['full'] = True
+
+    if actions['full']:
+        stats = build_site(config_dict=config_dict, jobs=jobs)
+        done.append(f"{stats['processed']} page(s) (full)")
+    elif actions['pages']:
+        pages = sorted(actions['pages'])
+        created = [path for path in pages
+                   if os.path.exists(path) and not os.path.exists(get_output_path(path, config))]
+
+        stats = rebuild_pages(pages, config, jobs if len(pages) > 20 else 1)
+        done.append(f"{stats['processed']} page(s)")
+        if stats['removed']:
+            done.append(f"removed {stats['removed']} page(s)")
+
+        # New or deleted pages change the sitemap (edits only move a <lastmod>,
+        # which the next build catches up on)
+        if config.generate_sitemap and (created or stats['removed']):
+            generate_sitemap(config, collect_site_pages(config))
+
+    if actions['static'] and not actions['full']:
+        sync_static_assets(config, sorted(actions['static']))
+        done.append(f"{len(actions['static'])} static dir(s)")
+
+    if actions['index'] and not actions['full'] and not has_index_page(config):
+        if os.path.exists(config.index_path):
+            copy_index_page(config)
+            done.append("index.html")
+
+    if config.precompress and done and not actions['full']:
+        precompress_site(config)
+
+    return ', '.join(done)
@@ -0,0 +1,69 @@
+"""
+Tests for the benchmark corpus and report.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from simple_ssg.bench import STAGES, CorpusGenerator, run_bench
+from simple_ssg.converters.markdown import convert_markdown_to_html
+
+def read_tree(directory):
+    """Map the relative paths of a directory's files to their contents."""
+    files = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                files[os.path.relpath(path, directory)] = f.read()
+    return files
+
+class TestBench(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_corpus_is_reproducible(self):
+        """Test that a seed always generates the same site."""
+        first = os.path.join(self.test_dir, 'first')
+        second = os.path.join(self.test_dir, 'second')
+        other = os.path.join(self.test_dir, 'other')
+        corpus = CorpusGenerator(seed=7, scale=0.01).write(first)
+        CorpusGenerator(seed=7, scale=0.01).write(second)
+        CorpusGenerator(seed=8, scale=0.01).write(other)
+
+        self.assertEqual(read_tree(first), read_tree(second))
+        self.assertNotEqual(read_tree(first), read_tree(other))
+        self.assertEqual(corpus['pages'], sum(1 for path in read_tree(first) if path.endswith('.md')))
+        self.assertTrue(os.path.isdir(os.path.join(first, 'content', 'deep', 'level-0', 'level-1')))
+
+    def test_annotated_page_renders_classes(self):
+        """Test that every annotation of an annotated page becomes a class."""
+        html = convert_markdown_to_html(CorpusGenerator(seed=3).annotated_page(0, 8))
+
+        self.assertIn('<h1 class="title">Annotated 0</h1>', html)
+        self.assertIn('<h2 class="block b3">Block 3</h2>', html)
+        self.assertEqual(html.count('<p class="lead">'), 8)
+        self.assertEqual(html.count('<li class="item">'), 8)
+        self.assertEqual(html.count('<li class="item alt">'), 8)
+        self.assertEqual(html.count('<blockquote>\n<p class="note">'), 8)
+        self.assertNotIn('{.', html)
+
+    def test_report(self):
+        """Test that the report has throughput figures for the requested stages."""
+        report = run_bench(seed=1, scale=0.01, repeat=1, stages=('convert', 'sitemap', 'asset_copy'),
+                           directory=self.test_dir)
+
+        self.assertEqual(report['seed'], 1)
+        self.assertEqual(set(report['stages']), {'convert', 'sitemap', 'asset_copy', 'asset_sync_unchanged'})
+        for result in report['stages'].values():
+            self.assertGreater(result['items'], 0)
+            self.assertGreater(result['items_per_second'], 0)
+        self.assertEqual(report['stages']['convert']['bytes'], report['corpus']['content_bytes'])
+        self.assertIn('build', STAGES)
+
+if __name__ == '__main__':
+    unittest.main()
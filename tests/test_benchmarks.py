@@ -0,0 +1,76 @@
+"""
+Benchmarks for performance-sensitive parts of Simple-SSG.
+
+These run as regular tests with small corpora. They print their timings and
+only assert on generous ratios so they stay reliable on slow CI machines.
+"""
+
+import time
+import unittest
+from unittest import mock
+import markdown
+from simple_ssg.builder import wrap_sections
+from simple_ssg.config import SiteConfig
+from simple_ssg.converters.markdown import DEFAULT_EXTENSIONS, convert_markdown_to_html
+
+def make_small_pages(count):
+    """Create a corpus of small Markdown pages."""
+    return [
+        f'# Page {i}\n\nSome *emphasis* and a "quote" on page {i}.\n\n'
+        f'## Section\n\n- item one\n- item two\n\n| a | b |\n|---|---|\n| {i} | x |\n'
+        for i in range(count)
+    ]
+
+class TestMarkdownBenchmark(unittest.TestCase):
+    def test_converter_reuse_per_page_saving(self):
+        """Benchmark reusing one Markdown instance against creating one per page."""
+        pages = make_small_pages(300)
+
+        # Warm up imports of the extension modules
+        convert_markdown_to_html(pages[0])
+
+        start = time.perf_counter()
+        fresh = [markdown.Markdown(extensions=DEFAULT_EXTENSIONS).convert(page) for page in pages]
+        fresh_time = time.perf_counter() - start
+
+        with mock.patch.object(markdown, 'Markdown', wraps=markdown.Markdown) as constructor:
+            start = time.perf_counter()
+            reused = [convert_markdown_to_html(page) for page in pages]
+            reused_time = time.perf_counter() - start
+
+        print(f"\nMarkdown per page: fresh instance {fresh_time / len(pages) * 1e6:.0f} us, "
+              f"reused instance {reused_time / len(pages) * 1e6:.0f} us")
+
+        self.assertEqual(fresh, reused)
+        # The warm-up's converter serves every page
+        self.assertEqual(constructor.call_count, 0)
+
+def make_long_page(size):
+    """Create a single HTML page of roughly `size` bytes with only a few headings."""
+    paragraph = '<p>' + 'lorem ipsum dolor sit amet ' * 10 + '</p>\n'
+    half = [paragraph] * (size // len(paragraph) // 2)
+    return '<h1>Title</h1>\n' + ''.join(half) + '<h2>Middle</h2>\n' + ''.join(half)
+
+class TestWrapSectionsBenchmark(unittest.TestCase):
+    def test_runtime_grows_linearly(self):
+        """Benchmark wrap_sections on pages up to 5 MB."""
+        config = SiteConfig(test_mode=True)
+        timings = {}
+
+        for size in (1250000, 2500000, 5000000):
+            html = make_long_page(size)
+            start = time.perf_counter()
+            wrapped = wrap_sections(html, config)
+            timings[size] = time.perf_counter() - start
+
+            self.assertEqual(wrapped.count('<section'), 2)
+            self.assertEqual(wrapped.count('</section>'), 2)
+
+        print("\nwrap_sections: " + ", ".join(
+            f"{size / 1e6:.2f} MB {elapsed * 1000:.1f} ms" for size, elapsed in timings.items()))
+
+        # Four times the input should take nowhere near sixteen times as long
+        self.assertLess(timings[5000000], timings[1250000] * 12 + 0.05)
+
+if __name__ == '__main__':
+    unittest.main()
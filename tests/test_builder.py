@@ -2,11 +2,15 @@
 Tests for the builder module.
 """
 
+import json
+import multiprocessing
 import os
+import pstats
 import shutil
 import tempfile
+import threading
 import unittest
-from simple_ssg.builder import build_site
+from simple_ssg.builder import build_pages, build_site, compile_template, wrap_sections
 from simple_ssg.config import SiteConfig
 
 class TestBuilder(unittest.TestCase):
@@ -91,5 +95,483 @@ class TestBuilder(unittest.TestCase):
             self.assertIn('Test Page', content)
             self.assertIn('This is a test page.', content)
 
+    def test_parallel_build_matches_serial(self):
+        """Test that a parallel build produces the same stats and output as a serial one."""
+        for i in range(6):
+            with open(os.path.join(self.content_dir, f'page{i}.md'), 'w', encoding='utf-8') as f:
+                f.write(f'# Page {i}\n\nParagraph for page {i}.\n\n## Details\n\nMore text.')
+        
+        outputs = {}
+        for jobs in (1, 2):
+            output_dir = os.path.join(self.test_dir, f'build-{jobs}')
+            config_dict = {
+                'content_dir': self.content_dir,
+                'template_path': self.template_path,
+                'output_dir': output_dir,
+                'static_dirs': [],
+                'base_url': 'http://example.com'
+            }
+            
+            stats = build_site(config_dict=config_dict, jobs=jobs)
+            self.assertEqual(stats['processed'], 6)
+            self.assertEqual(stats['errors'], 0)
+            
+            outputs[jobs] = {}
+            for name in sorted(os.listdir(output_dir)):
+                if name.endswith('.html'):
+                    with open(os.path.join(output_dir, name), 'rb') as f:
+                        outputs[jobs][name] = f.read()
+        
+        self.assertEqual(outputs[1], outputs[2])
+    
+    @unittest.skipUnless(hasattr(os, 'register_at_fork') and multiprocessing.get_start_method() == 'fork',
+                         'needs the fork start method')
+    def test_workers_forked_before_stage_threads(self):
+        """Test that a parallel build forks its workers before the pipeline's threads start."""
+        for i in range(4):
+            with open(os.path.join(self.content_dir, f'page{i}.md'), 'w', encoding='utf-8') as f:
+                f.write(f'# Page {i}')
+        
+        forks = []
+        recording = [True]
+        os.register_at_fork(before=lambda: recording[0] and forks.append(
+            [thread.name for thread in threading.enumerate()]))
+        try:
+            stats = build_site(config_dict={
+                'content_dir': self.content_dir,
+                'template_path': self.template_path,
+                'output_dir': self.output_dir,
+                'static_dirs': [],
+                'base_url': 'http://example.com'
+            }, jobs=2)
+        finally:
+            recording[0] = False
+        
+        self.assertEqual(stats['processed'], 4)
+        self.assertEqual(len(forks), 2)
+        for threads in forks:
+            self.assertFalse([name for name in threads if name.startswith('simple-ssg-')])
+    
+    def test_pipeline_error_accounting(self):
+        """Test that failed pages are counted as errors and the pipeline is reported."""
+        for i in range(5):
+            with open(os.path.join(self.content_dir, f'page{i}.md'), 'w', encoding='utf-8') as f:
+                f.write(f'# Page {i}\n\nText.')
+        with open(os.path.join(self.content_dir, 'broken.md'), 'wb') as f:
+            f.write(b'# Broken \xff\xfe\n')
+        
+        for jobs in (1, 2):
+            stats = build_site(config_dict={
+                'content_dir': self.content_dir,
+                'template_path': self.template_path,
+                'output_dir': os.path.join(self.test_dir, f'build-{jobs}'),
+                'static_dirs': [],
+                'base_url': 'http://example.com',
+                'pipeline_queue_size': 2
+            }, jobs=jobs)
+            self.assertEqual(stats['processed'], 5)
+            self.assertEqual(stats['errors'], 1)
+            self.assertEqual(set(stats['pipeline']['stages']), {'read', 'render', 'write'})
+            self.assertEqual(stats['pipeline']['stages']['write']['items'], 6)
+            self.assertLessEqual(stats['pipeline']['queues']['read']['max_depth'], 2)
+
+    def test_incremental_build(self):
+        """Test that incremental builds only re-render changed pages."""
+        for name in ('one', 'two', 'three'):
+            with open(os.path.join(self.content_dir, f'{name}.md'), 'w', encoding='utf-8') as f:
+                f.write(f'# Page {name}\n\nText for {name}.')
+        
+        config_dict = {
+            'content_dir': self.content_dir,
+            'template_path': self.template_path,
+            'output_dir': self.output_dir,
+            'static_dirs': [],
+            'base_url': 'http://example.com',
+            'incremental': True
+        }
+        
+        stats = build_site(config_dict=config_dict)
+        self.assertEqual(stats['processed'], 3)
+        self.assertEqual(stats['skipped'], 0)
+        
+        # Nothing changed
+        stats = build_site(config_dict=config_dict)
+        self.assertEqual(stats['processed'], 0)
+        self.assertEqual(stats['skipped'], 3)
+        
+        # One source edited, one deleted
+        with open(os.path.join(self.content_dir, 'one.md'), 'w', encoding='utf-8') as f:
+            f.write('# Page one\n\nUpdated text.')
+        os.remove(os.path.join(self.content_dir, 'three.md'))
+        
+        stats = build_site(config_dict=config_dict)
+        self.assertEqual(stats['processed'], 1)
+        self.assertEqual(stats['skipped'], 1)
+        self.assertEqual(stats['removed'], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, 'three.html')))
+        with open(os.path.join(self.output_dir, 'one.html'), 'r', encoding='utf-8') as f:
+            self.assertIn('Updated text.', f.read())
+        
+        # A template change re-renders every page
+        with open(self.template_path, 'a', encoding='utf-8') as f:
+            f.write('\n')
+        
+        stats = build_site(config_dict=config_dict)
+        self.assertEqual(stats['processed'], 2)
+        self.assertEqual(stats['skipped'], 0)
+    
+    def test_unchanged_output_not_rewritten(self):
+        """Test that pages whose HTML did not change keep their output file."""
+        for name in ('one', 'two'):
+            with open(os.path.join(self.content_dir, f'{name}.md'), 'w', encoding='utf-8') as f:
+                f.write(f'# Page {name}\n\nText for {name}.')
+        
+        config_dict = {
+            'content_dir': self.content_dir,
+            'template_path': self.template_path,
+            'output_dir': self.output_dir,
+            'static_dirs': [],
+            'base_url': 'http://example.com',
+            'clean_output': False
+        }
+        
+        stats = build_site(config_dict=config_dict)
+        self.assertEqual(stats['written'], 2)
+        self.assertEqual(stats['unchanged'], 0)
+        
+        two_path = os.path.join(self.output_dir, 'two.html')
+        os.utime(two_path, ns=(1000000000, 1000000000))
+        with open(os.path.join(self.content_dir, 'one.md'), 'w', encoding='utf-8') as f:
+            f.write('# Page one\n\nUpdated text.')
+        
+        stats = build_site(config_dict=config_dict)
+        self.assertEqual(stats['processed'], 2)
+        self.assertEqual(stats['written'], 1)
+        self.assertEqual(stats['unchanged'], 1)
+        self.assertEqual(os.stat(two_path).st_mtime_ns, 1000000000)
+    
+    def test_fingerprinted_assets(self):
+        """Test that static files are fingerprinted and references rewritten."""
+        
+        css_dir = os.path.join(self.test_dir, 'css')
+        os.makedirs(css_dir)
+        with open(os.path.join(css_dir, 'styles.css'), 'w', encoding='utf-8') as f:
+            f.write('body { color: red; }')
+        with open(self.template_path, 'w', encoding='utf-8') as f:
+            f.write('<html><head><link rel="stylesheet" href="css/styles.css"></head>'
+                    '<body><div id="content-container"></div></body></html>')
+        with open(os.path.join(self.content_dir, 'page.md'), 'w', encoding='utf-8') as f:
+            f.write('# Page\n\n[Stylesheet](css/styles.css)')
+        
+        config_dict = {
+            'content_dir': self.content_dir,
+            'template_path': self.template_path,
+            'output_dir': self.output_dir,
+            'static_dirs': [css_dir],
+            'base_url': 'http://example.com',
+            'fingerprint_assets': True
+        }
+        
+        stats = build_site(config_dict=config_dict)
+        self.assertEqual(stats['errors'], 0)
+        
+        with open(os.path.join(self.output_dir, 'asset-manifest.json'), 'r', encoding='utf-8') as f:
+            asset_manifest = json.load(f)
+        fingerprinted = asset_manifest['css/styles.css']
+        self.assertRegex(fingerprinted, r'^css/styles\.[0-9a-f]{8}\.css$')
+        self.assertEqual(os.listdir(os.path.join(self.output_dir, 'css')),
+                         [os.path.basename(fingerprinted)])
+        
+        with open(os.path.join(self.output_dir, 'page.html'), 'r', encoding='utf-8') as f:
+            html = f.read()
+        self.assertEqual(html.count(fingerprinted), 2)
+        self.assertNotIn('css/styles.css', html)
+        
+        with open(os.path.join(self.output_dir, '.htaccess'), 'r', encoding='utf-8') as f:
+            self.assertIn('immutable', f.read())
+    
+    def test_atomic_publish(self):
+        """Test publishing builds through a staging directory and rolling back."""
+        from simple_ssg.utils.publish import get_builds_dir, list_builds, rollback
+        
+        for name in ('one', 'two'):
+            with open(os.path.join(self.content_dir, f'{name}.md'), 'w', encoding='utf-8') as f:
+                f.write(f'# Page {name}\n\nText for {name}.')
+        
+        config_dict = {
+            'content_dir': self.content_dir,
+            'template_path': self.template_path,
+            'output_dir': self.output_dir,
+            'static_dirs': [],
+            'base_url': 'http://example.com',
+            'incremental': True,
+            'atomic_publish': True,
+            'keep_builds': 1
+        }
+        
+        stats = build_site(config_dict=config_dict)
+        self.assertEqual(stats['errors'], 0)
+        self.assertTrue(os.path.islink(self.output_dir))
+        first_build = os.path.realpath(self.output_dir)
+        
+        with open(os.path.join(self.content_dir, 'one.md'), 'w', encoding='utf-8') as f:
+            f.write('# Page one\n\nUpdated text.')
+        
+        stats = build_site(config_dict=config_dict)
+        self.assertEqual(stats['processed'], 1)
+        self.assertEqual(stats['skipped'], 1)
+        second_build = os.path.realpath(self.output_dir)
+        self.assertNotEqual(first_build, second_build)
+        
+        # The unchanged page is shared with the previous build, the changed one is not
+        self.assertTrue(os.path.samefile(os.path.join(first_build, 'two.html'),
+                                         os.path.join(second_build, 'two.html')))
+        with open(os.path.join(first_build, 'one.html'), 'r', encoding='utf-8') as f:
+            self.assertIn('Text for one.', f.read())
+        with open(os.path.join(self.output_dir, 'one.html'), 'r', encoding='utf-8') as f:
+            self.assertIn('Updated text.', f.read())
+        
+        # Only keep_builds previous builds are kept
+        build_site(config_dict=config_dict)
+        self.assertEqual(len(list_builds(self.output_dir)), 2)
+        self.assertFalse(os.path.exists(first_build))
+        
+        # Rolling back points the output directory at the previous build
+        live = os.path.realpath(self.output_dir)
+        self.assertEqual(rollback(self.output_dir), second_build)
+        self.assertEqual(os.path.realpath(self.output_dir), second_build)
+        self.assertNotEqual(live, second_build)
+        self.assertTrue(os.path.isdir(get_builds_dir(self.output_dir)))
+
+    
+    def test_atomic_publish_links_unchanged_files(self):
+        """Test that a full atomic build shares unchanged outputs with the previous build."""
+        from simple_ssg.utils.publish import get_builds_dir
+        
+        for name in ('one', 'two', 'three'):
+            with open(os.path.join(self.content_dir, f'{name}.md'), 'w', encoding='utf-8') as f:
+                f.write(f'# Page {name}\n\nText for {name}.')
+        
+        config_dict = {
+            'content_dir': self.content_dir,
+            'template_path': self.template_path,
+            'output_dir': self.output_dir,
+            'static_dirs': [],
+            'base_url': 'http://example.com'
+        }
+        
+        # A plain output directory is swapped for the link and kept as the first old build
+        build_site(config_dict=config_dict)
+        legacy_page = os.path.join(get_builds_dir(self.output_dir), '00000000-000000-000000', 'two.html')
+        config_dict.update(atomic_publish=True, keep_builds=2)
+        self.assertEqual(build_site(config_dict=config_dict)['errors'], 0)
+        self.assertTrue(os.path.islink(self.output_dir))
+        self.assertTrue(os.path.samefile(legacy_page, os.path.join(self.output_dir, 'two.html')))
+        first_build = os.path.realpath(self.output_dir)
+        
+        with open(os.path.join(self.content_dir, 'one.md'), 'w', encoding='utf-8') as f:
+            f.write('# Page one\n\nUpdated text.')
+        os.remove(os.path.join(self.content_dir, 'three.md'))
+        stats = build_site(config_dict=config_dict)
+        second_build = os.path.realpath(self.output_dir)
+        
+        self.assertEqual(stats['removed'], 1)
+        self.assertFalse(os.path.exists(os.path.join(second_build, 'three.html')))
+        self.assertTrue(os.path.exists(os.path.join(first_build, 'three.html')))
+        self.assertTrue(os.path.samefile(os.path.join(first_build, 'two.html'),
+                                         os.path.join(second_build, 'two.html')))
+        self.assertFalse(os.path.samefile(os.path.join(first_build, 'one.html'),
+                                          os.path.join(second_build, 'one.html')))
+        with open(os.path.join(first_build, 'one.html'), 'r', encoding='utf-8') as f:
+            self.assertIn('Text for one.', f.read())
+
+    def test_feeds(self):
+        """Test that feeds list the newest pages of their directory."""
+        blog_dir = os.path.join(self.content_dir, 'blog')
+        os.makedirs(blog_dir)
+        for day in range(1, 6):
+            with open(os.path.join(blog_dir, f'2024-01-0{day}-post.md'), 'w', encoding='utf-8') as f:
+                f.write(f'# Post {day} & more\n\nSummary of post {day}.')
+        with open(os.path.join(self.content_dir, 'about.md'), 'w', encoding='utf-8') as f:
+            f.write('# About\n\nNot a post.')
+        
+        config_dict = {
+            'content_dir': self.content_dir,
+            'template_path': self.template_path,
+            'output_dir': self.output_dir,
+            'static_dirs': [],
+            'base_url': 'http://example.com',
+            'incremental': True,
+            'feeds': [{'directory': 'blog', 'limit': 3, 'title': 'Blog'},
+                      {'directory': 'blog', 'format': 'rss'}]
+        }
+        build_site(config_dict=config_dict)
+        
+        with open(os.path.join(self.output_dir, 'blog', 'feed.xml'), 'r', encoding='utf-8') as f:
+            atom = f.read()
+        self.assertEqual(atom.count('<entry>'), 3)
+        self.assertLess(atom.index('Post 5 &amp; more'), atom.index('Post 3'))
+        self.assertNotIn('Post 2', atom)
+        self.assertNotIn('About', atom)
+        self.assertIn('<summary>Summary of post 5.</summary>', atom)
+        self.assertIn('<updated>2024-01-05T00:00:00Z</updated>', atom)
+        
+        with open(os.path.join(self.output_dir, 'blog', 'rss.xml'), 'r', encoding='utf-8') as f:
+            rss = f.read()
+        self.assertEqual(rss.count('<item>'), 5)
+        self.assertIn('<pubDate>Fri, 05 Jan 2024 00:00:00 +0000</pubDate>', rss)
+        
+        # Skipped pages contribute the titles recorded in the manifest
+        stats = build_site(config_dict=config_dict)
+        self.assertEqual(stats['skipped'], 6)
+        with open(os.path.join(self.output_dir, 'blog', 'feed.xml'), 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), atom)
+
+    def test_search_index(self):
+        """Test that the search index is built from rendered pages, also incrementally."""
+        with open(os.path.join(self.content_dir, 'first.md'), 'w', encoding='utf-8') as f:
+            f.write('# First\n\nShared words and unique alpha.')
+        with open(os.path.join(self.content_dir, 'second.md'), 'w', encoding='utf-8') as f:
+            f.write('# Second\n\nShared words and unique beta.')
+        
+        config_dict = {
+            'content_dir': self.content_dir,
+            'template_path': self.template_path,
+            'output_dir': self.output_dir,
+            'static_dirs': [],
+            'base_url': 'http://example.com',
+            'incremental': True,
+            'search_index': True
+        }
+        build_site(config_dict=config_dict)
+        index_path = os.path.join(self.output_dir, 'search', 'index.json')
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = f.read()
+        self.assertIn('["first.html","First"]', index)
+        
+        with open(os.path.join(self.output_dir, 'search', '7368.json'), 'r', encoding='utf-8') as f:
+            self.assertIn('"shared":[0,2,2]', f.read())
+        
+        # Skipped pages keep their terms
+        stats = build_site(config_dict=config_dict)
+        self.assertEqual(stats['skipped'], 2)
+        with open(index_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), index)
+
+    def test_check_links(self):
+        """Test that build reports broken links found in the rendered pages."""
+        with open(os.path.join(self.content_dir, 'index.md'), 'w', encoding='utf-8') as f:
+            f.write('# Home\n\n[About](about.html) and [Old post](post1.html)')
+        with open(os.path.join(self.content_dir, 'about.md'), 'w', encoding='utf-8') as f:
+            f.write('# About\n\n[Home](index.html)')
+        
+        stats = build_site(config_dict={
+            'content_dir': self.content_dir,
+            'template_path': self.template_path,
+            'output_dir': self.output_dir,
+            'static_dirs': [],
+            'base_url': 'http://example.com',
+            'check_links': True
+        })
+        self.assertEqual(stats['broken_links'], 1)
+    
+    def test_timings_and_profile(self):
+        """Test that build times its phases and pages and writes a profile and trace."""
+        os.makedirs(os.path.join(self.content_dir, 'blog'))
+        for name in ('index.md', 'blog/post.md'):
+            with open(os.path.join(self.content_dir, name), 'w', encoding='utf-8') as f:
+                f.write('# Title\n\n## Section\n\nText')
+        
+        profile = os.path.join(self.test_dir, 'profile', 'build')
+        stats = build_site(config_dict={
+            'content_dir': self.content_dir,
+            'template_path': self.template_path,
+            'output_dir': self.output_dir,
+            'static_dirs': [],
+            'base_url': 'http://example.com'
+        }, profile=profile)
+        
+        self.assertEqual(set(stats['page_times']), {'index.md', 'blog/post.md'})
+        for phase in ('static_assets', 'pages', 'sitemap'):
+            self.assertIn(phase, stats['phases'])
+        for phase in ('read', 'convert', 'wrap_sections', 'inject_content', 'minify_html', 'write'):
+            self.assertIn(phase, stats['page_phases'])
+        self.assertGreaterEqual(stats['build_time'], stats['phases']['pages'])
+        
+        self.assertTrue(os.path.getsize(f'{profile}.prof') > 0)
+        # The render and write stages show up in the profile
+        functions = {name for _, _, name in pstats.Stats(f'{profile}.prof').stats}
+        for function in ('render_source', 'convert_markdown_to_html', 'wrap_sections', 'write_page'):
+            self.assertIn(function, functions)
+        with open(f'{profile}.trace.json', 'r', encoding='utf-8') as f:
+            events = json.load(f)['traceEvents']
+        pages = [event for event in events if event.get('cat') == 'page']
+        self.assertTrue(all(event['ph'] == 'X' and event['dur'] >= 0 for event in pages))
+        thread_names = {(event['pid'], event['tid']): event['args']['name'] for event in events
+                        if event['name'] == 'thread_name'}
+        for name in ('index.md', 'blog/post.md'):
+            stages = {event['args']['stage']: event for event in pages if event['name'] == name}
+            self.assertEqual(set(stages), {'read', 'render', 'write'})
+            # A profiled build runs the stages one after the other in its own thread
+            self.assertEqual({(event['pid'], event['tid']) for event in stages.values()},
+                             {(os.getpid(), threading.get_native_id())})
+            for event in stages.values():
+                self.assertIn((event['pid'], event['tid']), thread_names)
+            self.assertLessEqual(stages['read']['ts'] + stages['read']['dur'], stages['render']['ts'])
+            self.assertLessEqual(stages['render']['ts'] + stages['render']['dur'],
+                                 stages['write']['ts'])
+
+    def test_page_stages_on_pipeline_threads(self):
+        """Test that each page stage records its real times and the thread that ran it."""
+        for name in ('a.md', 'b.md'):
+            with open(os.path.join(self.content_dir, name), 'w', encoding='utf-8') as f:
+                f.write('# Title')
+        config = SiteConfig(config_dict={
+            'content_dir': self.content_dir,
+            'template_path': self.template_path,
+            'output_dir': self.output_dir,
+            'static_dirs': []
+        })
+        compile_template(config)
+        os.makedirs(self.output_dir)
+        
+        content_files = [os.path.join(self.content_dir, name) for name in ('a.md', 'b.md')]
+        for page in build_pages(content_files, config):
+            stages = page['timing']['stages']
+            self.assertEqual([stage['name'] for stage in stages], ['read', 'render', 'write'])
+            self.assertEqual(len({stage['tid'] for stage in stages}), 3)
+            self.assertNotIn(threading.get_native_id(), {stage['tid'] for stage in stages})
+            for before, after in zip(stages, stages[1:]):
+                self.assertLessEqual(before['start'], before['end'])
+                self.assertLessEqual(before['end'], after['start'])
+
+class TestWrapSections(unittest.TestCase):
+    def test_default_sections(self):
+        """Test wrapping h1 and h2 headings with the default classes."""
+        config = SiteConfig(test_mode=True)
+        html = '<p>Intro</p><h1>Title</h1><p>A</p><h2>One</h2><p>B</p><h2>Two</h2><p>C</p>'
+        
+        self.assertEqual(
+            wrap_sections(html, config),
+            '<p>Intro</p><section class="hero"><h1>Title</h1><p>A</p></section>'
+            '<section class="section"><h2>One</h2><p>B</p></section>'
+            '<section class="section"><h2>Two</h2><p>C</p></section>'
+        )
+    
+    def test_nested_sections(self):
+        """Test nesting sections for configurable heading levels."""
+        config = SiteConfig(config_dict={
+            'section_classes': {'h1': 'hero', 'h2': 'section', 'h3': 'sub'},
+            'nest_sections': True
+        }, test_mode=True)
+        html = '<h1>T</h1><h2>A</h2><h3>A1</h3><p>x</p><h2>B</h2>'
+        
+        self.assertEqual(
+            wrap_sections(html, config),
+            '<section class="hero"><h1>T</h1>'
+            '<section class="section"><h2>A</h2><section class="sub"><h3>A1</h3><p>x</p></section></section>'
+            '<section class="section"><h2>B</h2></section></section>'
+        )
+
 if __name__ == '__main__':
     unittest.main()
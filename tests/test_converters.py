@@ -2,8 +2,10 @@
 Tests for the converters module.
 """
 
+import threading
 import unittest
-from simple_ssg.converters.markdown import convert_markdown_to_html, process_class_annotations
+from simple_ssg.converters.markdown import (
+    borrow_converter, convert_markdown_to_html, process_class_annotations)
 from simple_ssg.converters.html import convert_html_to_html
 
 class TestMarkdownConverter(unittest.TestCase):
@@ -43,6 +45,40 @@ class TestMarkdownConverter(unittest.TestCase):
         # Check that both classes are preserved
         self.assertIn('class="existing new-class"', processed)
         
+    def test_markdown_class_annotations(self):
+        """Test class annotations written in Markdown."""
+        html = convert_markdown_to_html('[Home](index.html){.button}\n\n## Title {.a.b}')
+        
+        self.assertIn('<a class="button" href="index.html">Home</a>', html)
+        self.assertIn('<h2 class="a b">Title</h2>', html)
+        self.assertNotIn('{.', html)
+    
+    def test_nested_class_annotations(self):
+        """Test class annotations on nested inline elements."""
+        html = convert_markdown_to_html('a **b *c*{.inner}**{.outer}')
+        
+        self.assertEqual(html, '<p>a <strong class="outer">b <em class="inner">c</em></strong></p>')
+    
+    def test_class_annotations_in_code(self):
+        """Test that annotations inside code blocks are left alone."""
+        html = convert_markdown_to_html('    code {.x}')
+        
+        self.assertIn('code {.x}', html)
+        
+    def test_annotations_after_raw_html(self):
+        """Test that annotations after inline raw HTML go on that HTML element."""
+        self.assertEqual(convert_markdown_to_html('<span>x</span>{.c}'),
+                         '<p><span class="c">x</span></p>')
+        self.assertEqual(convert_markdown_to_html('a <b>bold</b>{.k} and <i>i</i>{.m}'),
+                         '<p>a <b class="k">bold</b> and <i class="m">i</i></p>')
+    
+    def test_block_annotations(self):
+        """Test that paragraphs and list items only take annotations on a line of their own."""
+        self.assertEqual(convert_markdown_to_html('para {.note}'), '<p>para {.note}</p>')
+        self.assertEqual(convert_markdown_to_html('* item {.x}'), '<ul>\n<li>item {.x}</li>\n</ul>')
+        self.assertEqual(convert_markdown_to_html('para\n{.note}'), '<p class="note">para</p>')
+        self.assertEqual(convert_markdown_to_html('# Head {.c}'), '<h1 class="c">Head</h1>')
+        
     def test_config_attribute_error(self):
         """Test handling of AttributeError in configuration."""
         # Create an object with no markdown_extensions attribute
@@ -51,6 +87,24 @@ class TestMarkdownConverter(unittest.TestCase):
             
         html = convert_markdown_to_html("# Test", BadConfig())
         self.assertIn('<p>Error in configuration:', html)
+    
+    def test_converter_reused_across_threads(self):
+        """Test that short-lived threads reuse converters and concurrent ones get their own."""
+        converters = []
+        
+        def convert():
+            with borrow_converter(['extra']) as converter:
+                converters.append(converter)
+                self.assertEqual(converter.convert('*a*'), '<p><em>a</em></p>')
+        
+        for _ in range(3):
+            thread = threading.Thread(target=convert)
+            thread.start()
+            thread.join()
+        self.assertEqual(len({id(converter) for converter in converters}), 1)
+        
+        with borrow_converter(['extra']) as first, borrow_converter(['extra']) as second:
+            self.assertIsNot(first, second)
 
 class TestHtmlConverter(unittest.TestCase):
     def test_html_passthrough(self):
@@ -0,0 +1,433 @@
+"""
+Tests for the enhancers module.
+"""
+
+import gzip
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import unittest
+from simple_ssg.config import SiteConfig
+from simple_ssg.enhancers.assets import rewrite_asset_references, set_asset_table
+from simple_ssg.enhancers.compression import precompress_site
+from simple_ssg.enhancers.minifier import minify_html
+from simple_ssg.enhancers.search import (
+    SEARCH_SCRIPT, SearchIndex, decode_postings, encode_postings, normalize_text, shard_key,
+    shard_name, tokenize)
+from simple_ssg.enhancers.seo import generate_sitemap
+from simple_ssg.enhancers.server import (
+    LIVE_RELOAD_PATH, LiveReload, OnDemandServer, SiteRequestHandler, SiteServer)
+
+class TestMinifier(unittest.TestCase):
+    def test_collapses_whitespace(self):
+        """Test that insignificant whitespace is removed."""
+        html = '<html>\n  <body>\n    <p>  Some   text\n  here  </p>\n  </body>\n</html>\n'
+        self.assertEqual(minify_html(html), '<html><body><p>Some text here</p></body></html>')
+    
+    def test_removes_comments(self):
+        """Test that comments are removed but conditional comments are kept."""
+        html = '<div><!-- note --><p>Text</p><!--[if IE]><p>IE</p><![endif]--></div>'
+        minified = minify_html(html)
+        
+        self.assertNotIn('note', minified)
+        self.assertIn('<!--[if IE]><p>IE</p><![endif]-->', minified)
+    
+    def test_preserves_whitespace_sensitive_elements(self):
+        """Test that pre, textarea and script contents are left untouched."""
+        html = ('<div>\n<pre><code>line 1\n    line 2</code></pre>\n'
+                '<textarea>  a\n  b</textarea>\n'
+                '<script>\n// comment\nvar x = 1;\n</script>\n</div>')
+        minified = minify_html(html)
+        
+        self.assertIn('<pre><code>line 1\n    line 2</code></pre>', minified)
+        self.assertIn('<textarea>  a\n  b</textarea>', minified)
+        self.assertIn('<script>\n// comment\nvar x = 1;\n</script>', minified)
+    
+    def test_chunked_input(self):
+        """Test that minifying chunks gives the same result as minifying a string."""
+        html = ('<!DOCTYPE html>\n<html>\n<head>\n  <title>Test</title>\n</head>\n<body>\n'
+                '  <!-- comment -->\n  <p>Hello   <b>world</b> !</p>\n'
+                '  <pre>  keep   this  </pre>\n</body>\n</html>')
+        expected = minify_html(html)
+        
+        for size in (1, 3, 16):
+            chunks = [html[i:i + size] for i in range(0, len(html), size)]
+            self.assertEqual(minify_html(iter(chunks)), expected)
+
+class TestAssetReferences(unittest.TestCase):
+    def tearDown(self):
+        set_asset_table(None)
+    
+    def test_rewrites_references(self):
+        """Test that references to static files use their fingerprinted names."""
+        set_asset_table({
+            'css/styles.css': 'css/styles.0123abcd.css',
+            'js/app.js': 'js/app.89abcdef.js',
+        })
+        html = ('<link href="css/styles.css"><link href="../css/styles.css?v=2">'
+                '<script src="/js/app.js"></script>'
+                '<a href="css/styles.css.map">map</a><a href="mycss/styles.css">other</a>')
+        
+        self.assertEqual(rewrite_asset_references(html), (
+            '<link href="css/styles.0123abcd.css"><link href="../css/styles.0123abcd.css?v=2">'
+            '<script src="/js/app.89abcdef.js"></script>'
+            '<a href="css/styles.css.map">map</a><a href="mycss/styles.css">other</a>'))
+    
+    def test_keeps_external_urls(self):
+        """Test that URLs on other hosts ending in a static path are not rewritten."""
+        set_asset_table({'css/styles.css': 'css/styles.0123abcd.css'})
+        html = ('<link href="https://cdn.example.com/css/styles.css">'
+                '<link href="//cdn.example.com/css/styles.css">'
+                "<style>a{background:url(http://cdn.example.com/css/styles.css)}</style>"
+                '<link href="/css/styles.css">')
+        
+        self.assertEqual(rewrite_asset_references(html), (
+            '<link href="https://cdn.example.com/css/styles.css">'
+            '<link href="//cdn.example.com/css/styles.css">'
+            "<style>a{background:url(http://cdn.example.com/css/styles.css)}</style>"
+            '<link href="/css/styles.0123abcd.css">'))
+    
+    def test_only_rewrites_url_values(self):
+        """Test that srcset and url() are rewritten but prose and code are not."""
+        set_asset_table({
+            'css/styles.css': 'css/styles.0123abcd.css',
+            'images/a.png': 'images/a.456789ab.png',
+        })
+        html = ('<p>Edit css/styles.css to change the colours.</p>'
+                '<pre><code>&lt;link href="css/styles.css"&gt;</code></pre>'
+                '<img srcset="images/a.png 1x, ./images/a.png?v=1 2x" src=/images/a.png>'
+                "<div style=\"background: url('../images/a.png#top')\"></div>")
+        
+        self.assertEqual(rewrite_asset_references(html), (
+            '<p>Edit css/styles.css to change the colours.</p>'
+            '<pre><code>&lt;link href="css/styles.css"&gt;</code></pre>'
+            '<img srcset="images/a.456789ab.png 1x, images/a.456789ab.png?v=1 2x" '
+            'src=/images/a.456789ab.png>'
+            "<div style=\"background: url('../images/a.456789ab.png#top')\"></div>"))
+    
+    def test_no_table(self):
+        """Test that HTML is unchanged without a lookup table."""
+        html = '<link href="css/styles.css">'
+        self.assertEqual(rewrite_asset_references(html), html)
+
+class TestPrecompression(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.config = SiteConfig(config_dict={'output_dir': self.output_dir}, test_mode=True)
+        self.page = os.path.join(self.output_dir, 'page.html')
+        self.write(self.page, b'<p>' + b'text ' * 200 + b'</p>')
+        self.write(os.path.join(self.output_dir, 'photo.jpg'), b'binary')
+    
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+    
+    def write(self, path, data):
+        with open(path, 'wb') as f:
+            f.write(data)
+    
+    def test_writes_and_skips_variants(self):
+        """Test that text files get .gz variants that are only rewritten on change."""
+        stats = precompress_site(self.config)
+        self.assertEqual(stats['compressed'], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, 'photo.jpg.gz')))
+        with gzip.open(self.page + '.gz', 'rb') as f:
+            self.assertEqual(f.read(), b'<p>' + b'text ' * 200 + b'</p>')
+        
+        stats = precompress_site(self.config)
+        self.assertEqual(stats['compressed'], 0)
+        self.assertEqual(stats['skipped'], 1)
+        
+        # Rewritten with the same bytes: hashed again, but not recompressed
+        self.write(self.page, b'<p>' + b'text ' * 200 + b'</p>')
+        os.utime(self.page, ns=(1000000000, 1000000000))
+        self.assertEqual(precompress_site(self.config)['compressed'], 0)
+        
+        self.write(self.page, b'<p>changed</p>')
+        self.assertEqual(precompress_site(self.config)['compressed'], 1)
+        with gzip.open(self.page + '.gz', 'rb') as f:
+            self.assertEqual(f.read(), b'<p>changed</p>')
+        
+        os.remove(self.page)
+        self.assertEqual(precompress_site(self.config)['removed'], 1)
+        self.assertFalse(os.path.exists(self.page + '.gz'))
+
+class TestSitemap(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.pages = [{'path': 'index.html', 'lastmod': 0},
+                      {'path': '404.html', 'lastmod': 0}]
+        self.pages += [{'path': f'posts/post-{i}.html', 'lastmod': 86400 * i} for i in range(5)]
+    
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+    
+    def generate(self, **options):
+        config = SiteConfig(config_dict=dict(options, output_dir=self.output_dir,
+                                             base_url='https://example.org'), test_mode=True)
+        generate_sitemap(config, self.pages)
+        with open(os.path.join(self.output_dir, 'sitemap.xml'), 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    def test_single_sitemap(self):
+        """Test a sitemap with lastmod from the page records."""
+        sitemap = self.generate()
+        self.assertIn('<loc>https://example.org/</loc>\n    <lastmod>1970-01-01T00:00:00+00:00</lastmod>', sitemap)
+        self.assertIn('<loc>https://example.org/posts/post-2.html</loc>\n'
+                      '    <lastmod>1970-01-03T00:00:00+00:00</lastmod>', sitemap)
+        self.assertNotIn('404.html', sitemap)
+        self.assertEqual(sitemap.count('<url>'), 6)
+        self.assertEqual(sorted(os.listdir(self.output_dir)), ['sitemap.xml'])
+    
+    def test_split_sitemap_index(self):
+        """Test splitting into gzipped sitemap files listed in a sitemap index."""
+        index = self.generate(sitemap_max_urls=4, sitemap_gzip=True)
+        self.assertIn('<sitemapindex', index)
+        self.assertIn('<loc>https://example.org/sitemap-2.xml.gz</loc>', index)
+        
+        urls = 0
+        for name in ('sitemap-1.xml.gz', 'sitemap-2.xml.gz'):
+            with gzip.open(os.path.join(self.output_dir, name), 'rt', encoding='utf-8') as f:
+                part = f.read()
+            self.assertTrue(part.endswith('</urlset>'))
+            urls += part.count('<url>')
+        self.assertEqual(urls, 6)
+        
+        # Split files are removed again once they are no longer needed
+        self.generate()
+        self.assertEqual(sorted(os.listdir(self.output_dir)), ['sitemap.xml'])
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+    
+    def test_tokenize(self):
+        """Test extracting distinct lower-case terms from page HTML."""
+        self.assertEqual(tokenize('<h1 class="x">Caf&eacute; Menu</h1><p>menu a <b>b2</b></p>'),
+                         ['b2', 'café', 'menu'])
+    
+    def test_postings_round_trip(self):
+        """Test delta and variable-length encoding of page numbers."""
+        doc_ids = [0, 1, 5, 200, 70000, 70001]
+        data = encode_postings(doc_ids)
+        self.assertEqual(len(data), 1 + 1 + 1 + 2 + 3 + 1)
+        self.assertEqual(decode_postings(data), doc_ids)
+    
+    def test_sharded_index(self):
+        """Test that terms are split into prefix shards with binary postings."""
+        index = SearchIndex()
+        index.add('a.html', 'Page <em>A</em>', 'apple banana')
+        index.add('b.html', None, ['apple', 'apricot'])
+        index.write(self.output_dir)
+        
+        search_dir = os.path.join(self.output_dir, 'search')
+        with open(os.path.join(search_dir, 'index.json'), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        self.assertEqual(info['docs'], [['a.html', 'Page A'], ['b.html', 'b.html']])
+        self.assertEqual(info['shards'], [shard_name('ap'), shard_name('ba')])
+        
+        with open(os.path.join(search_dir, shard_name('ap') + '.json'), 'r', encoding='utf-8') as f:
+            table = json.load(f)
+        with open(os.path.join(search_dir, shard_name('ap') + '.bin'), 'rb') as f:
+            blob = f.read()
+        offset, length, count = table['apple']
+        self.assertEqual(decode_postings(blob[offset:offset + length]), [0, 1])
+        self.assertEqual(count, 2)
+        self.assertTrue(os.path.exists(os.path.join(search_dir, 'search.js')))
+        
+        # Shards of prefixes that are gone are removed
+        index = SearchIndex()
+        index.add('a.html', 'A', 'apple')
+        index.write(self.output_dir)
+        self.assertFalse(os.path.exists(os.path.join(search_dir, shard_name('ba') + '.bin')))
+
+    def test_shard_key_round_trip(self):
+        """Test that a mixed-case, differently composed query finds the shard of the indexed term."""
+        index = SearchIndex()
+        index.add('a.html', 'A', tokenize('<p>Élan and 𠀀𠀁 text</p>'))
+        index.write(self.output_dir)
+        
+        search_dir = os.path.join(self.output_dir, 'search')
+        # A query typed in upper case with a combining accent (as search.js sees it)
+        for query, term in (('E\u0301LAN', 'élan'), ('𠀀𠀁', '𠀀𠀁')):
+            word = normalize_text(query)
+            self.assertEqual(word, term)
+            with open(os.path.join(search_dir, shard_key(word) + '.json'), 'r', encoding='utf-8') as f:
+                self.assertIn(word, json.load(f))
+        
+        with open(os.path.join(search_dir, 'search.js'), 'r', encoding='utf-8') as f:
+            script = f.read()
+        self.assertIn("text.normalize('NFKC').toLowerCase()", script)
+        self.assertIn('Array.from(word).slice(0, length)', script)
+    
+    def test_script_terms_match_tokenize(self):
+        """Test that search.js splits a query into the same terms as tokenize, long words included."""
+        node = shutil.which('node')
+        if not node:
+            self.skipTest('node is not installed')
+        text = f"Short x {'b' * 40} {'c' * 41} {'𠀀' * 40} {'𠀁' * 41}"
+        # Run the script with a stand-in document and expose its terms function
+        script = ("var document = {currentScript: {src: 'search/search.js'}};\n"
+                  + SEARCH_SCRIPT.replace('return {search: search};',
+                                          'return {search: search, terms: terms};')
+                  + f"console.log(JSON.stringify(SimpleSSGSearch.terms({json.dumps(text)})));\n")
+        result = subprocess.run([node], input=script, capture_output=True, text=True, check=True)
+        
+        self.assertEqual(sorted(set(json.loads(result.stdout))), tokenize(text))
+        self.assertEqual(tokenize(text), ['b' * 40, 'short', '𠀀' * 40])
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.html = b'<html><body>' + b'<p>hello</p>' * 100 + b'</body></html>'
+        with open(os.path.join(self.directory, 'index.html'), 'wb') as f:
+            f.write(self.html)
+        
+        self.live_reload = LiveReload()
+        self.server = SiteServer(('127.0.0.1', 0), SiteRequestHandler, self.directory,
+                                 live_reload=self.live_reload)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1])
+    
+    def tearDown(self):
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+    
+    def request(self, path, headers=None):
+        self.connection.request('GET', path, headers=headers or {})
+        response = self.connection.getresponse()
+        return response, response.read()
+    
+    def test_etag_and_conditional_requests(self):
+        """Test ETag, 304 responses and keep-alive on one connection."""
+        response, body = self.request('/')
+        self.assertEqual(response.status, 200)
+        etag = response.getheader('ETag')
+        self.assertTrue(etag.startswith('"'))
+        
+        response, body = self.request('/index.html', {'If-None-Match': etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b'')
+        
+        response, _ = self.request('/index.html', {
+            'If-Modified-Since': response.getheader('Last-Modified')})
+        self.assertEqual(response.status, 304)
+        
+        # A changed file gets a new ETag
+        with open(os.path.join(self.directory, 'index.html'), 'wb') as f:
+            f.write(b'<p>changed</p>')
+        response, body = self.request('/index.html', {'If-None-Match': etag})
+        self.assertEqual(response.status, 200)
+        self.assertTrue(body.startswith(b'<p>changed</p>'))
+    
+    def test_gzip_negotiation(self):
+        """Test that gzip is used only when the client accepts it."""
+        response, body = self.request('/', {'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.getheader('Content-Encoding'), 'gzip')
+        plain = gzip.decompress(body)
+        
+        response, body = self.request('/', {'Accept-Encoding': 'gzip;q=0'})
+        self.assertIsNone(response.getheader('Content-Encoding'))
+        self.assertEqual(body, plain)
+    
+    def test_live_reload(self):
+        """Test script injection and the reload event stream."""
+        _, body = self.request('/')
+        self.assertIn(LIVE_RELOAD_PATH.encode('utf-8'), body)
+        self.assertTrue(body.endswith(b'</body></html>'))
+        
+        events = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=5)
+        events.request('GET', LIVE_RELOAD_PATH)
+        response = events.getresponse()
+        self.assertEqual(response.getheader('Content-Type'), 'text/event-stream')
+        self.assertTrue(response.fp.readline().startswith(b'retry:'))
+        
+        self.live_reload.notify()
+        lines = [response.fp.readline() for _ in range(2)]
+        self.assertIn(b'data: reload\n', lines)
+        events.close()
+    
+    def test_not_found_and_traversal(self):
+        """Test 404s, including for paths outside the served directory."""
+        response, _ = self.request('/missing.html')
+        self.assertEqual(response.status, 404)
+        response, _ = self.request('/../' + os.path.basename(self.directory) + '/index.html')
+        self.assertEqual(response.status, 404)
+
+class TestOnDemandServer(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.content_dir = os.path.join(self.test_dir, 'content')
+        self.css_dir = os.path.join(self.test_dir, 'css')
+        os.makedirs(self.content_dir)
+        os.makedirs(self.css_dir)
+        
+        self.template_path = os.path.join(self.test_dir, 'template.html')
+        with open(self.template_path, 'w', encoding='utf-8') as f:
+            f.write('<html><body><div id="content-container"></div></body></html>')
+        with open(os.path.join(self.content_dir, 'about.md'), 'w', encoding='utf-8') as f:
+            f.write('# About\n\nFirst version.')
+        with open(os.path.join(self.css_dir, 'styles.css'), 'w', encoding='utf-8') as f:
+            f.write('body { margin: 0; }')
+        
+        config = SiteConfig(config_dict={
+            'content_dir': self.content_dir,
+            'template_path': self.template_path,
+            'output_dir': os.path.join(self.test_dir, 'build'),
+            'static_dirs': [self.css_dir],
+            'index_path': None
+        }, test_mode=True)
+        self.server = OnDemandServer(('127.0.0.1', 0), config)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1])
+    
+    def tearDown(self):
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.test_dir)
+    
+    def request(self, path):
+        self.connection.request('GET', path)
+        response = self.connection.getresponse()
+        return response, response.read()
+    
+    def test_render_on_request(self):
+        """Test that pages are rendered from sources and re-rendered when they change."""
+        response, body = self.request('/about.html')
+        self.assertEqual(response.status, 200)
+        self.assertIn(b'First version.', body)
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, 'build')))
+        
+        _, body = self.request('/about')
+        self.assertIn(b'First version.', body)
+        
+        about = os.path.join(self.content_dir, 'about.md')
+        with open(about, 'w', encoding='utf-8') as f:
+            f.write('# About\n\nSecond version.')
+        st = os.stat(about)
+        os.utime(about, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        _, body = self.request('/about.html')
+        self.assertIn(b'Second version.', body)
+    
+    def test_static_files_and_missing_pages(self):
+        """Test serving static files from their sources and 404s."""
+        response, body = self.request('/css/styles.css')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b'body { margin: 0; }')
+        
+        response, _ = self.request('/missing.html')
+        self.assertEqual(response.status, 404)
+        response, _ = self.request('/about.md')
+        self.assertEqual(response.status, 404)
+
+if __name__ == '__main__':
+    unittest.main()
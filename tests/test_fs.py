@@ -0,0 +1,81 @@
+"""
+Tests for the file system utilities.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from simple_ssg.utils.fs import copy_static_assets, sync_tree
+
+class TestSyncTree(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.src = os.path.join(self.test_dir, 'images')
+        self.output_dir = os.path.join(self.test_dir, 'build')
+        self.dst = os.path.join(self.output_dir, 'images')
+        os.makedirs(os.path.join(self.src, 'photos'))
+        self.write(os.path.join(self.src, 'logo.png'), b'logo')
+        self.write(os.path.join(self.src, 'photos', 'a.jpg'), b'a' * 1000)
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def write(self, path, data):
+        with open(path, 'wb') as f:
+            f.write(data)
+    
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    def test_only_changed_files_are_copied(self):
+        """Test that a second sync copies only new or changed files."""
+        stats = copy_static_assets([self.src], self.output_dir)
+        self.assertEqual(stats['copied'], 2)
+        self.assertEqual(stats['bytes_copied'], 1004)
+        self.assertEqual(self.read(os.path.join(self.dst, 'photos', 'a.jpg')), b'a' * 1000)
+        
+        stats = copy_static_assets([self.src], self.output_dir)
+        self.assertEqual(stats['copied'], 0)
+        self.assertEqual(stats['skipped'], 2)
+        self.assertEqual(stats['bytes_skipped'], 1004)
+        
+        self.write(os.path.join(self.src, 'logo.png'), b'new logo')
+        self.write(os.path.join(self.src, 'photos', 'b.jpg'), b'b')
+        stats = copy_static_assets([self.src], self.output_dir)
+        self.assertEqual(stats['copied'], 2)
+        self.assertEqual(stats['skipped'], 1)
+        self.assertEqual(self.read(os.path.join(self.dst, 'logo.png')), b'new logo')
+    
+    def test_removed_files_are_deleted(self):
+        """Test that files and directories gone from the source are removed."""
+        sync_tree(self.src, self.dst)
+        os.remove(os.path.join(self.src, 'logo.png'))
+        shutil.rmtree(os.path.join(self.src, 'photos'))
+        
+        stats = sync_tree(self.src, self.dst)
+        self.assertEqual(stats['removed'], 2)
+        self.assertEqual(os.listdir(self.dst), [])
+    
+    def test_checksum_skips_touched_files(self):
+        """Test that checksum mode does not copy files whose only change is the mtime."""
+        sync_tree(self.src, self.dst)
+        os.utime(os.path.join(self.src, 'logo.png'), ns=(1000000000, 1000000000))
+        
+        stats = sync_tree(self.src, self.dst, checksum=True)
+        self.assertEqual(stats['copied'], 0)
+        self.assertEqual(os.stat(os.path.join(self.dst, 'logo.png')).st_mtime_ns, 1000000000)
+        
+        os.utime(os.path.join(self.src, 'logo.png'))
+        stats = sync_tree(self.src, self.dst)
+        self.assertEqual(stats['copied'], 1)
+    
+    def test_link_mode(self):
+        """Test that link mode hard-links files into the output."""
+        sync_tree(self.src, self.dst, link=True)
+        self.assertTrue(os.path.samefile(os.path.join(self.src, 'logo.png'),
+                                         os.path.join(self.dst, 'logo.png')))
+
+if __name__ == '__main__':
+    unittest.main()
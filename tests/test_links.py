@@ -0,0 +1,57 @@
+"""
+Tests for the link checker.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from simple_ssg.utils.links import check_links, extract_references, resolve_reference
+
+class TestLinks(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.output_dir, 'blog'))
+        os.makedirs(os.path.join(self.output_dir, 'images'))
+        self.write('index.html', '<a href="blog/">Blog</a> <a href="about.html#team">About</a>')
+        self.write('blog/index.html', '<a href="../index.html">Home</a> <img src="../images/a.png">'
+                                      ' <a href="https://example.com/x.html">External</a>'
+                                      ' <a href="#top">Top</a> <a href="/missing.html?x=1">Missing</a>')
+        self.write('images/logo.png', '')
+    
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+    
+    def write(self, path, content):
+        with open(os.path.join(self.output_dir, path), 'w', encoding='utf-8') as f:
+            f.write(content)
+    
+    def test_extract_references(self):
+        """Test collecting href and src values in all quoting styles."""
+        html = '<a href="a.html">a</a><img src=\'b.png\'><a class=x href=c.html>c</a><a href="a.html">'
+        self.assertEqual(extract_references(html), ['a.html', 'b.png', 'c.html'])
+    
+    def test_resolve_reference(self):
+        """Test resolving references relative to the referring page."""
+        self.assertEqual(resolve_reference('../images/a.png', 'blog'), 'images/a.png')
+        self.assertEqual(resolve_reference('/css/styles.css?v=2', 'blog'), 'css/styles.css')
+        self.assertEqual(resolve_reference('posts/', ''), 'posts/index.html')
+        self.assertEqual(resolve_reference('../../etc/passwd', 'blog'), '..')
+        self.assertIsNone(resolve_reference('mailto:me@example.com', ''))
+        self.assertIsNone(resolve_reference('//cdn.example.com/x.js', ''))
+        self.assertIsNone(resolve_reference('#section', ''))
+    
+    def test_check_links(self):
+        """Test that broken references are reported by page, read from disk or given."""
+        broken = check_links(self.output_dir)
+        self.assertEqual(broken, {
+            'blog/index.html': ['../images/a.png', '/missing.html?x=1'],
+            'index.html': ['about.html#team'],
+        })
+        
+        # References already in memory are used instead of reading the page
+        broken = check_links(self.output_dir, {'index.html': ['images/logo.png', 'blog']})
+        self.assertEqual(broken, {})
+
+if __name__ == '__main__':
+    unittest.main()
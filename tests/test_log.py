@@ -0,0 +1,84 @@
+"""
+Tests for logging and progress reporting.
+"""
+
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from simple_ssg.utils.log import (
+    NORMAL, QUIET, ROOT_LOGGER, VERBOSE, Progress, configure_logging
+)
+
+class TestLogging(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.logger = logging.getLogger(ROOT_LOGGER + '.test')
+
+    def tearDown(self):
+        root = logging.getLogger(ROOT_LOGGER)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+        root.setLevel(logging.NOTSET)
+        root.propagate = True
+        shutil.rmtree(self.test_dir)
+
+    def log_all(self, verbosity, json_path=None):
+        """Log a record at every level and return what was shown on stdout."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            configure_logging(verbosity, json_path)
+            self.logger.debug('page done')
+            self.logger.info('sitemap done')
+            self.logger.warning('Warning: odd')
+            self.logger.error('Error: broken')
+        return output.getvalue().splitlines()
+
+    def test_verbosity(self):
+        """Test that --quiet and --verbose choose the levels shown on stdout."""
+        self.assertEqual(self.log_all(QUIET), ['Warning: odd', 'Error: broken'])
+        self.assertEqual(self.log_all(NORMAL), ['sitemap done', 'Warning: odd', 'Error: broken'])
+        self.assertEqual(self.log_all(VERBOSE)[0], 'page done')
+
+    def test_json_sink(self):
+        """Test that the JSON sink gets every record, with its extra fields."""
+        path = os.path.join(self.test_dir, 'log.jsonl')
+        self.assertEqual(len(self.log_all(QUIET, path)), 2)
+        self.logger.debug('Processed a.md', extra={'page': 'a.md', 'seconds': 0.5})
+        logging.getLogger(ROOT_LOGGER).handlers[-1].flush()
+
+        with open(path, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record['level'] for record in records],
+                         ['debug', 'info', 'warning', 'error', 'debug'])
+        self.assertEqual(records[-1]['logger'], ROOT_LOGGER + '.test')
+        self.assertEqual(records[-1]['page'], 'a.md')
+        self.assertEqual(records[-1]['seconds'], 0.5)
+
+    def test_progress(self):
+        """Test that progress is logged as aggregate lines rather than per item."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            configure_logging(NORMAL)
+            progress = Progress(self.logger, 1000, interval=3600)
+            for number in range(1000):
+                progress.update(errors=number % 500 == 0)
+            progress.finish()
+
+            progress = Progress(self.logger, 2, interval=0)
+            progress.update()
+            progress.update()
+        lines = output.getvalue().splitlines()
+
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('Rendered 1000 pages in '))
+        self.assertIn('2 error(s)', lines[0])
+        self.assertTrue(lines[1].startswith('Rendered 1/2 pages (50%'))
+
+if __name__ == '__main__':
+    unittest.main()
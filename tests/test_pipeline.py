@@ -0,0 +1,75 @@
+"""
+Tests for the streaming pipeline.
+"""
+
+import threading
+import time
+import unittest
+from simple_ssg.utils.pipeline import Pipeline, format_pipeline_stats
+
+class TestPipeline(unittest.TestCase):
+    def test_order_and_stats(self):
+        """Test that items come out in order and every stage and queue is reported."""
+        def slow_square(value):
+            time.sleep(0.001)
+            return value * value
+
+        pipeline = (Pipeline(capacity=4)
+                    .add_stage('double', lambda value: value * 2)
+                    .add_stage('square', slow_square)
+                    .add_stream_stage('pairs', lambda values: ((value, -value) for value in values)))
+        results = list(pipeline.run(range(50)))
+
+        self.assertEqual(results, [((i * 2) ** 2, -(i * 2) ** 2) for i in range(50)])
+        stats = pipeline.stats
+        self.assertEqual(list(stats['stages']), ['double', 'square', 'pairs'])
+        self.assertEqual(stats['stages']['square']['items'], 50)
+        self.assertGreater(stats['stages']['square']['utilization'], stats['stages']['double']['utilization'])
+        for queue in stats['queues'].values():
+            self.assertLessEqual(queue['max_depth'], 4)
+        # The fast first stage fills the queue in front of the slow one
+        self.assertEqual(stats['queues']['double']['max_depth'], 4)
+        self.assertIn('square', format_pipeline_stats(stats))
+
+    def test_without_threads(self):
+        """Test that a pipeline without threads runs every stage in the calling thread."""
+        caller = threading.get_ident()
+        seen = set()
+
+        def record(value):
+            seen.add(threading.get_ident())
+            return value + 1
+
+        pipeline = Pipeline(capacity=2, threads=False).add_stage('one', record).add_stage('two', record)
+        self.assertEqual(list(pipeline.run(range(5))), [2, 3, 4, 5, 6])
+        self.assertEqual(seen, {caller})
+        self.assertEqual(pipeline.stats['stages']['two']['items'], 5)
+        self.assertEqual(pipeline.stats['queues']['one']['max_depth'], 0)
+
+    def test_stage_error(self):
+        """Test that an unexpected error in a stage reaches the consumer after the earlier items."""
+        def fail_on_three(value):
+            if value == 3:
+                raise ValueError('three')
+            return value
+
+        pipeline = Pipeline(capacity=2).add_stage('check', fail_on_three).add_stage('copy', lambda value: value)
+        results = []
+        with self.assertRaises(ValueError):
+            for value in pipeline.run(range(10)):
+                results.append(value)
+        self.assertEqual(results, [0, 1, 2])
+
+    def test_early_stop(self):
+        """Test that closing the results stops the stage threads."""
+        threads = threading.active_count()
+        pipeline = Pipeline(capacity=2).add_stage('copy', lambda value: value)
+        results = pipeline.run(iter(range(1000000)))
+        self.assertEqual(next(results), 0)
+        results.close()
+
+        self.assertEqual(threading.active_count(), threads)
+        self.assertLess(pipeline.stats['stages']['copy']['items'], 1000)
+
+if __name__ == '__main__':
+    unittest.main()
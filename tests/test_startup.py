@@ -0,0 +1,71 @@
+"""
+Startup regression tests for the command-line interface.
+
+Quick commands must not import Markdown, YAML or the builder. The imported
+modules are listed with `python -X importtime` in a fresh interpreter;
+the tests check which modules are imported rather than how long that takes,
+which depends on the machine and its load.
+"""
+
+import subprocess
+import sys
+import unittest
+
+# Modules only needed to build a site
+HEAVY_MODULES = ('markdown', 'yaml', 'simple_ssg.builder', 'simple_ssg.converters.markdown',
+                 'concurrent.futures.process')
+
+# Modules that only commands doing more than printing need
+SERVER_MODULES = ('concurrent.futures', 'http.server', 'socketserver')
+
+def import_times(code):
+    """
+    Run code in a fresh interpreter and collect its import times.
+    
+    Returns:
+    - Dictionary mapping module names to cumulative import times (microseconds)
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+class TestStartup(unittest.TestCase):
+    def assert_light(self, times, module, heavy_modules=HEAVY_MODULES):
+        self.assertIn(module, times)
+        for heavy in heavy_modules:
+            self.assertNotIn(heavy, times, f"{heavy} is imported at startup")
+    
+    def test_version(self):
+        """Test that `simple-ssg --version` only imports the CLI."""
+        times = import_times(
+            "import sys\n"
+            "sys.argv = ['simple-ssg', '--version']\n"
+            "from simple_ssg.cli import main\n"
+            "try:\n"
+            "    main()\n"
+            "except SystemExit:\n"
+            "    pass\n")
+        self.assert_light(times, 'simple_ssg.cli', HEAVY_MODULES + SERVER_MODULES)
+    
+    def test_serve(self):
+        """Test that `simple-ssg serve` imports the server but not the builder."""
+        times = import_times("import simple_ssg.cli, simple_ssg.enhancers.server")
+        self.assert_light(times, 'simple_ssg.enhancers.server')
+    
+    def test_package_import(self):
+        """Test that build_site is still available from the package."""
+        times = import_times("import simple_ssg")
+        self.assertNotIn('simple_ssg.builder', times)
+        
+        import simple_ssg
+        from simple_ssg.builder import build_site
+        self.assertIs(simple_ssg.build_site, build_site)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+Tests for the template utilities.
+"""
+
+import unittest
+from simple_ssg.utils.templates import CompiledTemplate
+
+TEMPLATE = ('<html><head><title>Site</title>'
+            '<meta name="description" content="Default">'
+            '<link rel="canonical" href="https://example.com"></head>'
+            '<body><div id="content-container"><div class="loading">Loading...</div></div></body></html>')
+
+class TestCompiledTemplate(unittest.TestCase):
+    def test_render_fills_slots(self):
+        """Test that content and meta slots are filled in."""
+        template = CompiledTemplate(TEMPLATE)
+        html = template.render('<h1>Hello</h1>', 'Hello', 'A page', 'https://example.com', 'hello.html')
+
+        self.assertIn('<title>Hello</title>', html)
+        self.assertIn('<meta name="description" content="A page">', html)
+        self.assertIn('<link rel="canonical" href="https://example.com/hello.html">', html)
+        self.assertIn('<div id="content-container">\n<h1>Hello</h1>\n</div>', html)
+        self.assertNotIn('Loading...', html)
+
+    def test_render_keeps_template_text_without_metadata(self):
+        """Test that meta tags are left alone when the page has no title or description."""
+        template = CompiledTemplate(TEMPLATE)
+        html = template.render('<p>Text</p>', None, None, 'https://example.com', 'page.html')
+
+        self.assertIn('<title>Site</title>', html)
+        self.assertIn('<link rel="canonical" href="https://example.com">', html)
+
+    def test_template_is_reusable(self):
+        """Test that rendering one page does not affect the next."""
+        template = CompiledTemplate(TEMPLATE)
+        template.render('<h1>First</h1>', 'First', None, 'https://example.com', 'first.html')
+        html = template.render('<h1>Second</h1>', 'Second', None, 'https://example.com', 'second.html')
+
+        self.assertIn('<title>Second</title>', html)
+        self.assertNotIn('First', html)
+
+if __name__ == '__main__':
+    unittest.main()
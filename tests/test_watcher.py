@@ -0,0 +1,144 @@
+"""
+Tests for watch mode.
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from simple_ssg import watcher
+from simple_ssg.config import SiteConfig
+from simple_ssg.builder import build_site
+from simple_ssg.watcher import PollingWatcher, classify_changes, rebuild
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.content_dir = os.path.join(self.test_dir, 'content')
+        self.static_dir = os.path.join(self.test_dir, 'css')
+        os.makedirs(self.content_dir)
+        os.makedirs(self.static_dir)
+        
+        self.config = SiteConfig(config_dict={
+            'content_dir': self.content_dir,
+            'template_path': os.path.join(self.test_dir, 'template.html'),
+            'static_dirs': [self.static_dir],
+            'index_path': None
+        }, test_mode=True)
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def test_classify_changes(self):
+        """Test mapping changed paths to the outputs they affect."""
+        page = os.path.join(self.content_dir, 'page.md')
+        actions = classify_changes({page}, self.config)
+        self.assertEqual(actions['pages'], {page})
+        self.assertFalse(actions['full'])
+        
+        actions = classify_changes({os.path.abspath(self.config.template_path)}, self.config)
+        self.assertTrue(actions['full'])
+        
+        stylesheet = os.path.join(self.static_dir, 'styles.css')
+        actions = classify_changes({stylesheet}, self.config)
+        self.assertEqual(actions['static'], {self.static_dir})
+        self.assertEqual(actions['pages'], set())
+    
+    def test_polling_watcher_detects_changes(self):
+        """Test that the polling watcher reports created, modified and deleted files."""
+        page = os.path.join(self.content_dir, 'page.md')
+        with open(page, 'w', encoding='utf-8') as f:
+            f.write('# One')
+        
+        watcher = PollingWatcher([self.content_dir], [], interval=0.01)
+        self.assertEqual(watcher.wait(0.02), set())
+        
+        with open(page, 'w', encoding='utf-8') as f:
+            f.write('# One, edited')
+        new_page = os.path.join(self.content_dir, 'new.md')
+        with open(new_page, 'w', encoding='utf-8') as f:
+            f.write('# New')
+        self.assertEqual(watcher.wait(1), {page, new_page})
+        
+        os.remove(page)
+        self.assertEqual(watcher.wait(1), {page})
+
+    def test_static_change_keeps_compressed_files(self):
+        """Test that rebuilding a changed static file keeps the other files' compressed variants."""
+        with open(self.config.template_path, 'w', encoding='utf-8') as f:
+            f.write('<html><body>{{content}}</body></html>')
+        for name in ('styles.css', 'other.css'):
+            with open(os.path.join(self.static_dir, name), 'w', encoding='utf-8') as f:
+                f.write('body { color: black; }\n' * 100)
+        
+        config_dict = {
+            'content_dir': self.content_dir,
+            'template_path': self.config.template_path,
+            'output_dir': os.path.join(self.test_dir, 'build'),
+            'static_dirs': [self.static_dir],
+            'index_path': None,
+            'precompress': True
+        }
+        build_site(config_dict=config_dict)
+        config = SiteConfig(config_dict=config_dict)
+        compressed = os.path.join(config.output_dir, 'css', 'other.css.gz')
+        before = os.stat(compressed)
+        
+        stylesheet = os.path.join(self.static_dir, 'styles.css')
+        with open(stylesheet, 'w', encoding='utf-8') as f:
+            f.write('body { color: red; }\n' * 100)
+        rebuild(classify_changes({stylesheet}, config), config, config_dict)
+        
+        after = os.stat(compressed)
+        self.assertEqual((after.st_ino, after.st_mtime_ns), (before.st_ino, before.st_mtime_ns))
+        with gzip.open(os.path.join(config.output_dir, 'css', 'styles.css.gz'), 'rt') as f:
+            self.assertIn('red', f.read())
+
+    def test_index_change_keeps_fingerprints(self):
+        """Test that a changed index page is published with fingerprinted asset names."""
+        with open(self.config.template_path, 'w', encoding='utf-8') as f:
+            f.write('<html><body>{{content}}</body></html>')
+        with open(os.path.join(self.static_dir, 'styles.css'), 'w', encoding='utf-8') as f:
+            f.write('body { color: black; }')
+        index_path = os.path.join(self.test_dir, 'index.html')
+        with open(index_path, 'w', encoding='utf-8') as f:
+            f.write('<link href="css/styles.css">')
+        
+        config_dict = {
+            'content_dir': self.content_dir,
+            'template_path': self.config.template_path,
+            'output_dir': os.path.join(self.test_dir, 'build'),
+            'static_dirs': [self.static_dir],
+            'index_path': index_path,
+            'fingerprint_assets': True
+        }
+        build_site(config_dict=config_dict)
+        config = SiteConfig(config_dict=config_dict)
+        
+        with open(index_path, 'w', encoding='utf-8') as f:
+            f.write('<h1>New</h1><link href="css/styles.css">')
+        rebuild(classify_changes({os.path.abspath(index_path)}, config), config, config_dict)
+        
+        with open(os.path.join(config.output_dir, 'index.html'), 'r', encoding='utf-8') as f:
+            html = f.read()
+        self.assertIn('<h1>New</h1>', html)
+        self.assertNotIn('css/styles.css', html)
+        self.assertRegex(html, r'css/styles\.[0-9a-f]{8}\.css')
+
+    def test_live_polling_interval(self):
+        """Test that live reload polls often and warns when inotify is missing."""
+        calls = []
+        with mock.patch.object(watcher, 'INotify', None), \
+                mock.patch.object(watcher, 'watch_site',
+                                  lambda *args, **kwargs: calls.append(kwargs['poll_interval'])), \
+                self.assertLogs('simple_ssg.watcher', 'WARNING') as logs:
+            watcher.serve_live(dict, open_browser=False)
+        
+        self.assertEqual(calls, [watcher.LIVE_POLL_INTERVAL])
+        self.assertLessEqual(watcher.LIVE_POLL_INTERVAL, 0.05)
+        self.assertIn('inotify_simple is not installed', logs.output[0])
+
+if __name__ == '__main__':
+    unittest.main()